@@ -0,0 +1,110 @@
+"""
+Microbenchmark of the cost per message type of the paths that go through common.Buffer.
+
+Run from the repository root with:
+    python -m benchmarks.buffer [--number N]
+"""
+import argparse
+import timeit
+from typing import Callable
+
+from airtouch2.common.Buffer import Buffer
+from airtouch2.protocol.at2.enums import ACMode
+from airtouch2.protocol.at2.messages import ChangeSetTemperature, RequestState, SetMode
+from airtouch2.protocol.at2plus.control_status_common import ControlStatusSubHeader
+from airtouch2.protocol.at2plus.enums import (AcFanSpeed, AcMode, AcPower, AcSetMode, AcSetPower, GroupPower,
+                                              GroupSetDamper, GroupSetPower)
+from airtouch2.protocol.at2plus.extended_common import ExtendedSubHeader
+from airtouch2.protocol.at2plus.message_common import HEADER_LENGTH
+from airtouch2.protocol.at2plus.messages.AcAbilityMessage import AcAbility, AcAbilityMessage, SetpointLimits
+from airtouch2.protocol.at2plus.messages.AcControl import AcControlMessage, AcSettings
+from airtouch2.protocol.at2plus.messages.AcStatus import AcStatus, AcStatusMessage
+from airtouch2.protocol.at2plus.messages.GroupControl import GroupControlMessage, GroupSettings
+from airtouch2.protocol.at2plus.messages.GroupStatus import GroupStatus, GroupStatusMessage
+
+
+def _decode_control_status(frame: bytes, from_bytes: Callable) -> Callable[[], object]:
+    """The receive path of At2PlusClient for a control/status message"""
+    data = frame[HEADER_LENGTH:-2]
+
+    def decode():
+        buffer = Buffer.from_bytes(data)
+        subheader = ControlStatusSubHeader.from_buffer(buffer)
+        return from_bytes(buffer.read_view(subheader.subdata_length.total()))
+    return decode
+
+
+def _decode_extended(frame: bytes, from_bytes: Callable) -> Callable[[], object]:
+    """The receive path of At2PlusClient for an extended message"""
+    data = frame[HEADER_LENGTH:-2]
+
+    def decode():
+        buffer = Buffer.from_bytes(data)
+        ExtendedSubHeader.from_buffer(buffer)
+        return from_bytes(buffer.read_remaining_view())
+    return decode
+
+
+def _fill(size: int, chunk: int) -> Callable[[], object]:
+    data = bytes(chunk)
+
+    def fill():
+        buffer = Buffer(size)
+        for _ in range(size // chunk):
+            buffer.append_bytes(data)
+        return buffer.to_bytes()
+    return fill
+
+
+def _read(size: int, chunk: int) -> Callable[[], object]:
+    data = bytes(size)
+
+    def read():
+        buffer = Buffer.from_bytes(data)
+        return [buffer.read_view(chunk) for _ in range(size // chunk)]
+    return read
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    ac_status = AcStatusMessage([AcStatus(i, AcPower.ON, AcMode.COOL, AcFanSpeed.LOW, 22, 23.5,
+                                          False, False, False, False, 0) for i in range(8)])
+    group_status = GroupStatusMessage([GroupStatus(i, GroupPower.ON, 50, False, False) for i in range(16)])
+    ac_control = AcControlMessage([AcSettings(i, AcSetPower.ON, AcSetMode.COOL, AcFanSpeed.UNCHANGED, 22)
+                                   for i in range(8)])
+    group_control = GroupControlMessage([GroupSettings(i, GroupSetDamper.SET, GroupSetPower.ON, 50)
+                                         for i in range(16)])
+    ac_ability = AcAbilityMessage([AcAbility(i, f"AC{i}", 0, 4, [AcSetMode.COOL, AcSetMode.HEAT],
+                                             [AcFanSpeed.LOW, AcFanSpeed.HIGH], SetpointLimits(16, 30))
+                                   for i in range(8)])
+    return {
+        "Buffer fill 400B in 8B appends": _fill(400, 8),
+        "Buffer fill 400B in 1 append": _fill(400, 400),
+        "Buffer read 400B in 8B reads": _read(400, 8),
+        "AcStatusMessage (8) encode": ac_status.to_bytes,
+        "AcStatusMessage (8) decode": _decode_control_status(ac_status.to_bytes(), AcStatusMessage.from_bytes),
+        "GroupStatusMessage (16) encode": group_status.to_bytes,
+        "GroupStatusMessage (16) decode": _decode_control_status(group_status.to_bytes(),
+                                                                 GroupStatusMessage.from_bytes),
+        "AcControlMessage (8) encode": ac_control.to_bytes,
+        "GroupControlMessage (16) encode": group_control.to_bytes,
+        "AcAbilityMessage (8) encode": ac_ability.to_bytes,
+        "AcAbilityMessage (8) decode": _decode_extended(ac_ability.to_bytes(), AcAbilityMessage.from_bytes),
+        "AT2 RequestState encode": RequestState().to_bytes,
+        "AT2 ChangeSetTemperature encode": ChangeSetTemperature(0, True).to_bytes,
+        "AT2 SetMode encode": SetMode(1, ACMode.COOL).to_bytes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="calls per repeat")
+    parser.add_argument("--repeat", type=int, default=5, help="repeats, the fastest is reported")
+    args = parser.parse_args()
+
+    for name, func in cases().items():
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        print(f"{name:<36}{best / args.number * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
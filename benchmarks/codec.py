@@ -0,0 +1,180 @@
+"""
+Benchmark of encoding and decoding every protocol message type: time per call and peak memory allocated per call.
+
+Results can be saved as JSON and compared against a saved baseline, exiting with status 1 if any case got slower
+(or allocates more) than the baseline by more than --tolerance.
+
+Run from the repository root with:
+    python -m benchmarks.codec [--save results.json] [--baseline baseline.json]
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from typing import Callable
+
+from airtouch2.protocol.at2.enums import ACBrand, ACFanSpeed, ACMode
+from airtouch2.protocol.at2.messages import (ChangeDamper, ChangeSetTemperature, RequestState, SetFanSpeed, SetMode,
+                                             SystemInfo, ToggleAc, ToggleGroup)
+from airtouch2.protocol.at2.messages.SystemInfo import AcInfo, GroupInfo
+from airtouch2.protocol.at2plus.control_status_common import (CONTROL_STATUS_SUBHEADER_LENGTH, ControlStatusSubHeader,
+                                                              ControlStatusSubType, SubDataLength)
+from airtouch2.protocol.at2plus.crc16_modbus import crc16
+from airtouch2.protocol.at2plus.enums import (AcFanSpeed, AcMode, AcPower, AcSetMode, AcSetPower, GroupPower,
+                                              GroupSetDamper, GroupSetPower)
+from airtouch2.protocol.at2plus.extended_common import EXTENDED_SUBHEADER_LENGTH
+from airtouch2.protocol.at2plus.message_common import HEADER_LENGTH, AddressMsgType, Header, MessageType
+from airtouch2.protocol.at2plus.messages.AcAbilityMessage import AcAbility, AcAbilityMessage, SetpointLimits
+from airtouch2.protocol.at2plus.messages.AcControl import AcControlMessage, AcSettings
+from airtouch2.protocol.at2plus.messages.AcStatus import AcStatus, AcStatusMessage
+from airtouch2.protocol.at2plus.messages.GroupControl import GroupControlMessage, GroupSettings
+from airtouch2.protocol.at2plus.messages.GroupNames import GroupNamesMessage, group_names_from_subdata
+from airtouch2.protocol.at2plus.messages.GroupStatus import GroupStatus, GroupStatusMessage
+
+
+def _control_status_subdata(frame: bytes) -> bytes:
+    return frame[HEADER_LENGTH + CONTROL_STATUS_SUBHEADER_LENGTH:-2]
+
+
+def _extended_subdata(frame: bytes) -> bytes:
+    return frame[HEADER_LENGTH + EXTENDED_SUBHEADER_LENGTH:-2]
+
+
+def _bind(func: Callable, arg: object) -> Callable[[], object]:
+    return lambda: func(arg)
+
+
+def _system_info() -> SystemInfo:
+    """A fully populated AT2 system: 2 ACs and 16 groups"""
+    speeds = [ACFanSpeed.AUTO, ACFanSpeed.LOW, ACFanSpeed.MEDIUM, ACFanSpeed.HIGH]
+    return SystemInfo(
+        {number: AcInfo(number, f"AC{number}", True, ACMode.COOL, speeds, ACFanSpeed.LOW, 22, 24, ACBrand.FUJITSU,
+                        0, False, 0, True, False, False, False) for number in range(2)},
+        {number: GroupInfo(f"GROUP{number}", number, True, 5, False, False) for number in range(16)},
+        23, "HOUSE")
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    header = Header(AddressMsgType.NORMAL, MessageType.CONTROL_STATUS, 200)
+    subheader = ControlStatusSubHeader(ControlStatusSubType.AC_STATUS, SubDataLength(0, 8, 10))
+    ac_status = AcStatusMessage([AcStatus(i, AcPower.ON, AcMode.COOL, AcFanSpeed.LOW, 22, 23.5,
+                                          False, False, False, False, 0) for i in range(8)])
+    group_status = GroupStatusMessage([GroupStatus(i, GroupPower.ON, 50, False, False) for i in range(16)])
+    ac_control = AcControlMessage([AcSettings(i, AcSetPower.ON, AcSetMode.COOL, AcFanSpeed.UNCHANGED, 22)
+                                   for i in range(8)])
+    group_control = GroupControlMessage([GroupSettings(i, GroupSetDamper.SET, GroupSetPower.ON, 50)
+                                         for i in range(16)])
+    ac_ability = AcAbilityMessage([AcAbility(i, f"AC{i}", 0, 4, [AcSetMode.COOL, AcSetMode.HEAT],
+                                             [AcFanSpeed.LOW, AcFanSpeed.HIGH], SetpointLimits(16, 30))
+                                   for i in range(8)])
+    group_names = GroupNamesMessage({i: f"Group {i}" for i in range(16)})
+    group_status_frame = group_status.to_bytes()
+    system_info = _system_info()
+    speeds = system_info.aircons_by_id[0].supported_fan_speeds
+
+    return {
+        "Header encode": header.to_bytes,
+        "Header decode": _bind(Header.from_bytes, header.to_bytes()),
+        "ControlStatusSubHeader encode": subheader.to_bytes,
+        "ControlStatusSubHeader decode": _bind(ControlStatusSubHeader.from_bytes, subheader.to_bytes()),
+        "AcStatusMessage (8) encode": ac_status.to_bytes,
+        "AcStatusMessage (8) decode": _bind(AcStatusMessage.from_bytes, _control_status_subdata(ac_status.to_bytes())),
+        "GroupStatusMessage (16) encode": group_status.to_bytes,
+        "GroupStatusMessage (16) decode": _bind(GroupStatusMessage.from_bytes,
+                                                _control_status_subdata(group_status_frame)),
+        "AcControlMessage (8) encode": ac_control.to_bytes,
+        "AcControlMessage (8) decode": _bind(AcControlMessage.from_bytes,
+                                             _control_status_subdata(ac_control.to_bytes())),
+        "GroupControlMessage (16) encode": group_control.to_bytes,
+        "GroupControlMessage (16) decode": _bind(GroupControlMessage.from_bytes,
+                                                 _control_status_subdata(group_control.to_bytes())),
+        "AcAbilityMessage (8) encode": ac_ability.to_bytes,
+        "AcAbilityMessage (8) decode": _bind(AcAbilityMessage.from_bytes, _extended_subdata(ac_ability.to_bytes())),
+        "GroupNamesMessage (16) encode": group_names.to_bytes,
+        "group_names_from_subdata (16)": _bind(group_names_from_subdata, _extended_subdata(group_names.to_bytes())),
+        "crc16 (GroupStatusMessage frame)": _bind(crc16, group_status_frame[2:-2]),
+        "AT2 SystemInfo encode": system_info.to_bytes,
+        "AT2 SystemInfo decode": _bind(SystemInfo.from_bytes, system_info.to_bytes()),
+        "AT2 RequestState encode": RequestState().to_bytes,
+        "AT2 ToggleAc encode": ToggleAc(0).to_bytes,
+        "AT2 SetMode encode": SetMode(1, ACMode.COOL).to_bytes,
+        "AT2 SetFanSpeed encode": SetFanSpeed(0, speeds, ACFanSpeed.HIGH).to_bytes,
+        "AT2 ChangeSetTemperature encode": ChangeSetTemperature(0, True).to_bytes,
+        "AT2 ToggleGroup encode": ToggleGroup(3).to_bytes,
+        "AT2 ChangeDamper encode": ChangeDamper(3, False).to_bytes,
+    }
+
+
+def _peak_bytes(func: Callable[[], object], calls: int = 5) -> int:
+    """The least memory a call had allocated at its peak, over 'calls' calls"""
+    func()  # fill any caches first
+    peaks = []
+    for _ in range(calls):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    return min(peaks)
+
+
+def run(number: int, repeat: int) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+    for name, func in cases().items():
+        best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+        results[name] = {"us_per_call": best * 1e6, "calls_per_second": 1 / best}
+    tracemalloc.start()
+    try:
+        for name, func in cases().items():
+            results[name]["peak_bytes_per_call"] = _peak_bytes(func)
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]],
+            tolerance: float) -> list[str]:
+    """Print how each case compares to 'baseline', return the names of the ones that regressed"""
+    regressions: list[str] = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<36}{'(not in baseline)':>20}")
+            continue
+        time_ratio = result["us_per_call"] / base["us_per_call"]
+        memory_diff = result["peak_bytes_per_call"] - base["peak_bytes_per_call"]
+        regressed = time_ratio > 1 + tolerance or memory_diff > base["peak_bytes_per_call"] * tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<36}{time_ratio:8.2f}x time{memory_diff:+8d} B{'  REGRESSED' if regressed else ''}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="calls per repeat")
+    parser.add_argument("--repeat", type=int, default=5, help="repeats, the fastest is reported")
+    parser.add_argument("--save", metavar="PATH", help="save the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="fraction worse than the baseline allowed")
+    args = parser.parse_args()
+
+    results = run(args.number, args.repeat)
+    for name, result in results.items():
+        print(f"{name:<36}{result['us_per_call']:8.2f} us/call{result['peak_bytes_per_call']:8d} B peak")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nCompared to {args.baseline} (Python {baseline['python']}):")
+        if compare(results, baseline["results"], args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
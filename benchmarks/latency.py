@@ -0,0 +1,143 @@
+"""
+End to end command latency: the time from calling the API until the entity's field callback sees the new value,
+against simulated consoles on 127.0.0.1.
+
+Each scenario first runs --samples commands one at a time for the latency percentiles, then sends --samples more
+back to back to find the highest rate at which commands are confirmed.
+Note At2Aircon.set_set_temp sleeps 0.1 s after each step, which caps its rate.
+
+Run from the repository root with:
+    python -m benchmarks.latency [--samples N] [--console-latency S]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass
+from itertools import cycle
+from typing import Any, Awaitable, Callable
+
+from airtouch2.at2.At2Client import At2Client
+from airtouch2.at2plus.At2PlusClient import At2PlusClient
+from airtouch2.common.interfaces import Publisher
+from airtouch2.simulator import At2PlusSimulator, At2Simulator
+
+TIMEOUT = 5
+
+
+@dataclass
+class Scenario:
+    name: str
+    entity: Publisher
+    field: str
+    command: Callable[[Any], Awaitable[None]]
+    # consecutive values differ so every command changes the field
+    values: list[Any]
+
+
+def _bounce(low: int, high: int, step: int = 1) -> list[int]:
+    up = list(range(low, high + 1, step))
+    return up + up[-2:0:-1]
+
+
+async def _latency(scenario: Scenario, value: Any) -> float:
+    confirmed: asyncio.Future[float] = asyncio.get_running_loop().create_future()
+
+    def on_change(old: Any, new: Any) -> None:
+        if new == value and not confirmed.done():
+            confirmed.set_result(time.perf_counter())
+
+    remove = scenario.entity.add_field_callback(scenario.field, on_change)
+    try:
+        start = time.perf_counter()
+        await scenario.command(value)
+        return await asyncio.wait_for(confirmed, TIMEOUT) - start
+    finally:
+        remove()
+
+
+async def _sustained_rate(scenario: Scenario, values: list[Any]) -> tuple[float, int]:
+    """Send a command per value back to back, return the rate they were confirmed at and how many were"""
+    all_confirmed = asyncio.Event()
+    confirmed = 0
+    last = 0.0
+
+    def on_change(old: Any, new: Any) -> None:
+        nonlocal confirmed, last
+        confirmed += 1
+        last = time.perf_counter()
+        if confirmed == len(values):
+            all_confirmed.set()
+
+    remove = scenario.entity.add_field_callback(scenario.field, on_change)
+    try:
+        start = time.perf_counter()
+        for value in values:
+            await scenario.command(value)
+        try:
+            await asyncio.wait_for(all_confirmed.wait(), TIMEOUT)
+        except TimeoutError:
+            pass
+    finally:
+        remove()
+    return (confirmed / (last - start) if confirmed else 0.0), confirmed
+
+
+async def _run(scenario: Scenario, samples: int) -> None:
+    values = cycle(scenario.values)
+    # start from a known value
+    await _latency(scenario, next(values))
+    latencies = [await _latency(scenario, next(values)) for _ in range(samples)]
+    rate, confirmed = await _sustained_rate(scenario, [next(values) for _ in range(samples)])
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{scenario.name:<28}{percentiles[49] * 1e3:8.2f}{percentiles[94] * 1e3:8.2f}{percentiles[98] * 1e3:8.2f}"
+          f"{rate:12.1f}" + (f" ({samples - confirmed} unconfirmed)" if confirmed < samples else ""))
+
+
+async def _benchmark(samples: int, console_latency: float) -> None:
+    at2plus_simulator = At2PlusSimulator(acs=1, groups=4, latency=console_latency)
+    at2_simulator = At2Simulator(acs=1, groups=4, latency=console_latency)
+    await at2plus_simulator.start()
+    await at2_simulator.start()
+    at2plus_client = At2PlusClient("127.0.0.1", port=at2plus_simulator.port)
+    at2_client = At2Client("127.0.0.1", port=at2_simulator.port)
+    try:
+        for client in (at2plus_client, at2_client):
+            if not await client.connect():
+                raise ConnectionError("Could not connect to the simulated console")
+            client.run()
+        while not at2plus_client.aircons_by_id or not at2plus_client.groups_by_id or not at2_client.aircons_by_id:
+            await asyncio.sleep(0.01)
+
+        at2plus_aircon = at2plus_client.aircons_by_id[0]
+        at2plus_group = at2plus_client.groups_by_id[0]
+        at2_aircon = at2_client.aircons_by_id[0]
+        scenarios = [
+            Scenario("At2PlusAircon.set_setpoint", at2plus_aircon, "set_point", at2plus_aircon.set_setpoint,
+                     _bounce(18, 26)),
+            Scenario("At2PlusGroup.set_damp", at2plus_group, "damp", at2plus_group.set_damp, _bounce(10, 90, 10)),
+            Scenario("At2Aircon.set_set_temp", at2_aircon, "set_temp", at2_aircon.set_set_temp, _bounce(18, 26)),
+        ]
+
+        print(f"{'':<28}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'commands/s':>12}")
+        for scenario in scenarios:
+            await _run(scenario, samples)
+    finally:
+        await at2plus_client.stop()
+        await at2_client.stop()
+        await at2plus_simulator.stop()
+        await at2_simulator.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=200, help="commands per measurement")
+    parser.add_argument("--console-latency", type=float, default=0,
+                        help="seconds the simulated consoles take to handle each message")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.samples, args.console_latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Scaling benchmark of ConsoleManager: memory and CPU per console when supervising many AirTouch 2+ consoles.
+
+The simulated consoles run in a child process so only the clients are measured. Each has one AC and four groups
+and pushes an AC status change every --push-interval seconds.
+
+Run from the repository root with:
+    python -m benchmarks.scaling [--consoles N]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+import tracemalloc
+from dataclasses import replace
+from multiprocessing.connection import Connection
+
+from airtouch2.at2plus.At2PlusClient import At2PlusClient
+from airtouch2.manager import ConsoleManager
+from airtouch2.simulator import At2PlusSimulator
+
+
+async def _serve_fake_consoles(count: int, push_interval: float, pipe: Connection) -> None:
+    simulators = [At2PlusSimulator(acs=1, groups=4) for _ in range(count)]
+    for simulator in simulators:
+        await simulator.start()
+    pipe.send([simulator.port for simulator in simulators])
+
+    async def push() -> None:
+        setpoint = 22
+        while True:
+            await asyncio.sleep(push_interval)
+            setpoint = 23 if setpoint == 22 else 22
+            for simulator in simulators:
+                simulator.set_ac_status(replace(simulator.ac_statuses[0], set_point=setpoint))
+
+    pusher = asyncio.create_task(push())
+    # until the benchmark is done
+    await asyncio.get_running_loop().run_in_executor(None, pipe.recv)
+    pusher.cancel()
+    for simulator in simulators:
+        await simulator.stop()
+
+
+def _fake_consoles_process(count: int, push_interval: float, pipe: Connection) -> None:
+    asyncio.run(_serve_fake_consoles(count, push_interval, pipe))
+
+
+async def _benchmark(ports: list[int], duration: float, connect_spacing: float) -> None:
+    count = len(ports)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+
+    manager = ConsoleManager(connect_spacing=connect_spacing)
+    for port in ports:
+        manager.add_console(str(port), At2PlusClient("127.0.0.1", port=port))
+    connected = await manager.start()
+    while len(manager.aircons) < count or any(ac.ability is None for ac in manager.aircons.values()):
+        await asyncio.sleep(0.01)
+    discovered = time.perf_counter() - start
+    # let the group name requests and other stragglers settle
+    await asyncio.sleep(0.5)
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    cpu_start = time.process_time()
+    await asyncio.sleep(duration)
+    cpu = time.process_time() - cpu_start
+    await manager.stop()
+
+    print(f"Consoles                {count:10d} ({connected} connected at the first attempt)")
+    print(f"Discovery of all        {discovered:10.2f} s")
+    print(f"Memory per console      {memory / count / 1024:10.1f} KiB")
+    print(f"CPU per console         {cpu / duration / count * 100:10.4f} % of a core")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consoles", type=int, default=200, help="simulated consoles to supervise")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of steady state to measure CPU over")
+    parser.add_argument("--push-interval", type=float, default=1, help="seconds between status pushes per console")
+    parser.add_argument("--connect-spacing", type=float, default=0.005, help="seconds between connects")
+    args = parser.parse_args()
+
+    pipe, child_pipe = multiprocessing.Pipe()
+    consoles = multiprocessing.Process(target=_fake_consoles_process,
+                                       args=(args.consoles, args.push_interval, child_pipe), daemon=True)
+    consoles.start()
+    try:
+        ports = pipe.recv()
+        asyncio.run(_benchmark(ports, args.duration, args.connect_spacing))
+    finally:
+        pipe.send(None)
+        consoles.join(5)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@ from __future__ import annotations
 import asyncio
 import logging
 from typing import TYPE_CHECKING, Callable
-from airtouch2.common.interfaces import Publisher, Callback, add_callback
+from airtouch2.common.interfaces import (Publisher, Callback, FieldCallback, add_callback, add_field_callback,
+                                         notify_field_callbacks)
 if TYPE_CHECKING:
     from airtouch2.at2.At2Client import At2Client
 from airtouch2.protocol.at2.enums import ACFanSpeed, ACBrand, ACMode
@@ -18,17 +19,27 @@ class At2Aircon(Publisher):
     def __init__(self, client: At2Client, info: AcInfo):
         self._client: At2Client = client
         self._callbacks: list[Callable] = []
+        self._field_callbacks: dict[str, list[FieldCallback]] = {}
         self.info = info
 
-    def update(self, info: AcInfo) -> None:
+    def update(self, info: AcInfo) -> bool:
+        """Return whether the info changed"""
+        if info == self.info:
+            return False
+        old_info = self.info
         self.info = info
+        notify_field_callbacks(old_info, info, self._field_callbacks)
 
         for callback in self._callbacks:
             callback()
+        return True
 
     def add_callback(self, callback: Callback) -> Callback:
         return add_callback(callback, self._callbacks)
 
+    def add_field_callback(self, field: str, callback: FieldCallback) -> Callback:
+        return add_field_callback(field, callback, self._field_callbacks, AcInfo)
+
     async def inc_dec_set_temp(self, inc: bool):
         await self._client.send(ChangeSetTemperature(self.info.number, inc))
 
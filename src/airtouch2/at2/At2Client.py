@@ -2,15 +2,23 @@ import asyncio
 from datetime import datetime
 import logging
 
+from airtouch2.capture.WireCapture import WireCapture
 from airtouch2.common.NetClient import NetClient
-from airtouch2.protocol.at2.constants import MessageLength
-from airtouch2.protocol.at2.messages import RequestState, SystemInfo
+from airtouch2.common.ReconnectPolicy import ReconnectPolicy
+from airtouch2.protocol.at2.constants import ResponseMessageOffsets
+from airtouch2.protocol.at2.messages import (ChangeDamper, ChangeSetTemperature, RequestState, SystemInfo,
+                                             ToggleAc, ToggleGroup)
+from airtouch2.protocol.at2.response_decoder import ResponseDecoder
 from airtouch2.at2.At2Aircon import At2Aircon
 from airtouch2.at2.At2Group import At2Group
-from airtouch2.common.interfaces import add_callback, Callback, Serializable, TaskCreator
+from airtouch2.common.interfaces import (add_callback, Callback, ConnectionFactory, FrameCallback, Serializable,
+                                         TaskCreator)
 
 _LOGGER = logging.getLogger(__name__)
 
+# commands relative to the current state, applied twice if resent
+_RELATIVE_COMMANDS = (ChangeDamper, ChangeSetTemperature, ToggleAc, ToggleGroup)
+
 
 class At2Client:
     aircons_by_id: dict[int, At2Aircon]
@@ -18,16 +26,38 @@ class At2Client:
     system_name: str
     touchpad_temp: int
 
-    def __init__(self, host: str, dump_responses: bool = False, task_creator: TaskCreator = asyncio.create_task):
+    def __init__(self, host: str, dump_responses: bool = False, task_creator: TaskCreator = asyncio.create_task,
+                 heartbeat_interval: float = 30, reconnect_policy: ReconnectPolicy | None = None,
+                 port: int = 8899, capture: WireCapture | None = None,
+                 connection_factory: ConnectionFactory = asyncio.open_connection):
+        """
+        'heartbeat_interval' is how many idle seconds pass before the console is asked for a response, 0 disables it.
+        The response can't be told apart from the state the console sends on changes, so it only shows the
+        connection is alive and the round-trip time isn't measured.
+        'reconnect_policy' paces reconnection after the connection is lost, its outage statistics are kept there.
+        'capture' records all traffic with the console, 'dump_responses' captures to a new file in the working
+        directory if no capture is given.
+        'connection_factory' opens the connection to the console, e.g. Replay.open_connection to replay a capture.
+        """
         self.aircons_by_id = {}
         self.groups_by_id = {}
         self.system_name: str = "UNKNOWN"
         self.touchpad_temp: int = 0
 
-        self._client = NetClient(host, 8899, self._on_connect, self._handle_one_message, task_creator)
-        self._dump_responses: bool = dump_responses
+        # a capture made for 'dump_responses' is closed with the client
+        self._own_capture = capture is None and dump_responses
+        if self._own_capture:
+            capture = WireCapture(f"at2_{host}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.capture")
+        self._capture = capture
+        self._client = NetClient(host, port, self._on_connect, self._handle_one_message, task_creator,
+                                 heartbeat=RequestState, heartbeat_interval=heartbeat_interval,
+                                 reconnect_policy=reconnect_policy, capture=capture,
+                                 connection_factory=connection_factory)
+        self._decoder = ResponseDecoder()
+        self._last_response: bytes | None = None
         self._new_ac_callbacks: list[Callback] = []
         self._new_group_callbacks: list[Callback] = []
+        self._frame_callbacks: list[FrameCallback] = []
         self._found_ac = asyncio.Event()
 
         self.add_new_ac_callback(lambda: self._found_ac.set())
@@ -38,6 +68,14 @@ class At2Client:
     def run(self) -> None:
         self._client.run()
 
+    @property
+    def connection(self) -> NetClient:
+        return self._client
+
+    async def rediscover(self) -> None:
+        """Ask the console for its state again, to pick up any ACs or groups added since connecting"""
+        await self._client.send(RequestState())
+
     async def wait_for_ac(self, timeout: int = 5) -> None:
         try:
             await asyncio.wait_for(self._found_ac.wait(), timeout)
@@ -46,6 +84,8 @@ class At2Client:
 
     async def stop(self) -> None:
         await self._client.stop()
+        if self._own_capture and self._capture is not None:
+            await asyncio.to_thread(self._capture.close)
 
     def add_new_ac_callback(self, callback: Callback) -> Callback:
         """
@@ -61,53 +101,92 @@ class At2Client:
         """
         return add_callback(callback, self._new_group_callbacks)
 
+    def add_frame_callback(self, callback: FrameCallback) -> Callback:
+        """
+        Subscribe 'callback' to be called once per received response that changed anything,
+        with the ids of the ACs and of the groups it changed.
+        Return a callback to unsubscribe.
+        """
+        return add_callback(callback, self._frame_callbacks)
+
     async def send(self, msg: Serializable):
-        await self._client.send(msg)
+        """
+        Send 'msg', returns once it is written as the console doesn't acknowledge commands.
+        Only commands that do no harm when received twice are written again if writing them failed.
+        """
+        await self._client.send(msg, resend=not isinstance(msg, _RELATIVE_COMMANDS))
 
     async def _on_connect(self):
         await self._client.send(RequestState())
 
-    async def _read_response(self) -> SystemInfo | None:
+    async def _read_responses(self) -> list[SystemInfo] | None:
         _LOGGER.debug("Waiting for response")
-        resp = await self._client.read_bytes(MessageLength.RESPONSE)
-        _LOGGER.debug("Got response")
-        if not resp:
+        chunk = await self._client.read_chunk()
+        if not chunk:
+            # partial responses from before the reconnection are useless now
+            self._decoder.reset()
+            # and the state may have changed while disconnected
+            self._last_response = None
             return None
 
-        if self._dump_responses:
-            # blocks but is only used for dev and debugging
-            with open('response_' + datetime.now().strftime("%m-%d-%Y_%H-%M-%S") + '.dump', 'wb') as f:
-                f.write(resp)
+        responses = self._decoder.feed(chunk)
+        _LOGGER.debug(f"Got {len(responses)} responses")
+        return [SystemInfo.from_bytes(resp) for resp in self._changed_responses(responses)]
 
-        return SystemInfo.from_bytes(resp)
+    def _changed_responses(self, responses: list[bytes]) -> list[bytes]:
+        """
+        Leave out responses identical to the one before them, the console keeps sending the same state.
+        The response hash is compared first so most changed responses are told apart by a single byte.
+        """
+        changed: list[bytes] = []
+        last = self._last_response
+        for resp in responses:
+            if last is not None and resp[ResponseMessageOffsets.HASH] == last[ResponseMessageOffsets.HASH] and \
+                    resp == last:
+                continue
+            changed.append(resp)
+            last = resp
+        self._last_response = last
+        return changed
 
     async def _handle_one_message(self) -> None:
-        system_info = await self._read_response()
-        if not system_info:
+        responses = await self._read_responses()
+        if responses is None:
             # something went wrong
             _LOGGER.info("Reading response message failed")
             return
+        for system_info in responses:
+            self._handle_system_info(system_info)
 
+    def _handle_system_info(self, system_info: SystemInfo) -> None:
         _LOGGER.debug(f"SystemInfo: {system_info}")
-        
+
         # System-wide
         self.system_name = system_info.system_name
         self.touchpad_temp = system_info.touchpad_temp
-        
+
         # ACs
+        changed_acs: set[int] = set()
         for id, ac_info in system_info.aircons_by_id.items():
             if id not in self.aircons_by_id:
                 self.aircons_by_id[id] = At2Aircon(self, ac_info)
                 for callback in self._new_ac_callbacks:
                     callback()
-            else:
-                self.aircons_by_id[id].update(ac_info)
+                changed_acs.add(id)
+            elif self.aircons_by_id[id].update(ac_info):
+                changed_acs.add(id)
 
         # Groups
+        changed_groups: set[int] = set()
         for id, group_info in system_info.groups_by_id.items():
             if id not in self.groups_by_id:
                 self.groups_by_id[id] = At2Group(self, group_info)
                 for callback in self._new_group_callbacks:
                     callback()
-            else:
-                self.groups_by_id[id].update(group_info)
+                changed_groups.add(id)
+            elif self.groups_by_id[id].update(group_info):
+                changed_groups.add(id)
+
+        if changed_acs or changed_groups:
+            for callback in list(self._frame_callbacks):
+                callback(changed_acs, changed_groups)
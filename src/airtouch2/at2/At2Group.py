@@ -2,7 +2,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from airtouch2.protocol.at2.messages.SystemInfo import GroupInfo
 from airtouch2.protocol.at2.messages import ChangeDamper, ToggleGroup
-from airtouch2.common.interfaces import Publisher, Callback, add_callback
+from airtouch2.common.interfaces import (Publisher, Callback, FieldCallback, add_callback, add_field_callback,
+                                         notify_field_callbacks)
 if TYPE_CHECKING:
     from airtouch2.at2.At2Client import At2Client
 
@@ -15,16 +16,26 @@ class At2Group(Publisher):
 
         self._client = client
         self._callbacks: list[Callback] = []
+        self._field_callbacks: dict[str, list[FieldCallback]] = {}
 
-    def update(self, status: GroupInfo):
+    def update(self, status: GroupInfo) -> bool:
+        """Return whether the info changed"""
+        if status == self.info:
+            return False
+        old_info = self.info
         self.info = status
+        notify_field_callbacks(old_info, status, self._field_callbacks)
 
         for func in self._callbacks:
             func()
+        return True
 
     def add_callback(self, callback: Callback) -> Callback:
         return add_callback(callback, self._callbacks)
 
+    def add_field_callback(self, field: str, callback: FieldCallback) -> Callback:
+        return add_field_callback(field, callback, self._field_callbacks, GroupInfo)
+
     async def inc_dec_damp(self, inc: bool):
         await self._client.send(ChangeDamper(self.info.number, inc))
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
-from airtouch2.protocol.at2plus.messages.AcControl import AcControlMessage, AcSettings
-from airtouch2.common.interfaces import Callback
+from airtouch2.protocol.at2plus.messages.AcControl import AcSettings
+from airtouch2.common.interfaces import Callback, FieldCallback, add_field_callback, notify_field_callbacks
 if TYPE_CHECKING:
     from airtouch2.at2plus.At2PlusClient import At2PlusClient
 from asyncio import Event
@@ -25,10 +25,13 @@ class At2PlusAircon:
         self._ready: Event = Event()
         self._client: At2PlusClient = client
         self._callbacks: list[Callback] = []
+        self._field_callbacks: dict[str, list[FieldCallback]] = {}
+        # serial data of the last status, to recognise repeats without decoding them
+        self._raw_status: bytes | None = None
 
     async def _set_power(self, power: AcSetPower):
         settings = AcSettings(self.status.id, power, AcSetMode.UNCHANGED, AcFanSpeed.UNCHANGED, None)
-        await self._client.send(AcControlMessage([settings]))
+        await self._client.send_ac_settings(settings)
 
     async def toggle(self):
         await self._set_power(AcSetPower.TOGGLE)
@@ -44,15 +47,15 @@ class At2PlusAircon:
 
     async def set_mode(self, mode: AcSetMode):
         settings = AcSettings(self.status.id, AcSetPower.UNCHANGED, mode, AcFanSpeed.UNCHANGED, None)
-        await self._client.send(AcControlMessage([settings]))
+        await self._client.send_ac_settings(settings)
 
     async def set_fan_speed(self, speed: AcFanSpeed):
         settings = AcSettings(self.status.id, AcSetPower.UNCHANGED, AcSetMode.UNCHANGED, speed, None)
-        await self._client.send(AcControlMessage([settings]))
+        await self._client.send_ac_settings(settings)
 
     async def set_setpoint(self, setpoint: float):
         settings = AcSettings(self.status.id, AcSetPower.UNCHANGED, AcSetMode.UNCHANGED, AcFanSpeed.UNCHANGED, setpoint)
-        await self._client.send(AcControlMessage([settings]))
+        await self._client.send_ac_settings(settings)
 
     async def wait_until_ready(self) -> None:
         await self._ready.wait()
@@ -66,10 +69,27 @@ class At2PlusAircon:
 
         return remove_callback
 
-    def _update_status(self, status: AcStatus):
+    def add_field_callback(self, field: str, callback: FieldCallback) -> Callback:
+        """
+        Subscribe 'callback' to changes of the AcStatus field 'field', it is called with the old and new value.
+        Return a callback that unsubscribes.
+        """
+        return add_field_callback(field, callback, self._field_callbacks, AcStatus)
+
+    def _update_status(self, status: AcStatus, raw_status: bytes | None = None) -> bool:
+        """Return whether the status changed"""
+        if raw_status is not None:
+            if raw_status == self._raw_status:
+                return False
+            self._raw_status = raw_status
+        elif status == self.status:
+            return False
+        old_status = self.status
         self.status = status
+        notify_field_callbacks(old_status, status, self._field_callbacks)
         for callback in self._callbacks:
             callback()
+        return True
 
     def _set_ability(self, ability: AcAbility):
         self.ability = ability
@@ -1,52 +1,169 @@
 import asyncio
 from datetime import datetime
 import logging
+from typing import Callable, Mapping
 
 from airtouch2.at2plus.At2PlusAircon import At2PlusAircon
 from airtouch2.at2plus.At2PlusGroup import At2PlusGroup
+from airtouch2.at2plus.CommandBatcher import CommandBatcher
+from airtouch2.at2plus.TopologyCache import Topology, TopologyCache
+from airtouch2.capture.WireCapture import WireCapture
 from airtouch2.common.NetClient import NetClient
+from airtouch2.common.ReconnectPolicy import ReconnectPolicy
+from airtouch2.common.RequestTracker import RequestTracker
+from airtouch2.protocol.at2plus.enums import AcSetPower, GroupSetDamper, GroupSetPower
 from airtouch2.protocol.at2plus.control_status_common import ControlStatusSubHeader, ControlStatusSubType
-from airtouch2.protocol.at2plus.extended_common import ExtendedMessageSubType, ExtendedSubHeader
-from airtouch2.protocol.at2plus.message_common import HEADER_LENGTH, HEADER_MAGIC, Header, Message, MessageType
+from airtouch2.protocol.at2plus.extended_common import (EXTENDED_SUBHEADER_LENGTH, ExtendedMessageSubType,
+                                                        ExtendedSubHeader)
+from airtouch2.protocol.at2plus.frame_decoder import FrameDecoder
+from airtouch2.protocol.at2plus.message_common import MESSAGE_ID, IdentifiedMessage, Message, MessageType
 from airtouch2.protocol.at2plus.messages.AcAbilityMessage import AcAbility, AcAbilityMessage, RequestAcAbilityMessage
-from airtouch2.protocol.at2plus.messages.AcStatus import AcStatusMessage
-from airtouch2.common.Buffer import Buffer
-from airtouch2.protocol.at2plus.crc16_modbus import crc16
-from airtouch2.common.interfaces import Callback, Serializable, TaskCreator
+from airtouch2.protocol.at2plus.messages.AcControl import AcControlMessage, AcSettings
+from airtouch2.protocol.at2plus.messages.AcStatus import AC_STATUS_LENGTH, AcStatus, AcStatusMessage
+from airtouch2.common.interfaces import (Callback, ConnectionFactory, FrameCallback, Serializable, TaskCreator,
+                                         add_callback)
+from airtouch2.protocol.at2plus.messages.GroupControl import GroupControlMessage, GroupSettings
 from airtouch2.protocol.at2plus.messages.GroupNames import RequestGroupNamesMessage, group_names_from_subdata
-from airtouch2.protocol.at2plus.messages.GroupStatus import GroupStatusMessage
+from airtouch2.protocol.at2plus.messages.GroupStatus import GROUP_STATUS_LENGTH, GroupStatus, GroupStatusMessage
 
 _LOGGER = logging.getLogger(__name__)
 
+# seconds to wait for the abilities of the ACs before asking again
+ABILITY_TIMEOUT = 5
+# seconds to wait before asking again for abilities missing from a response, doubling up to the maximum
+ABILITY_RETRY_DELAY = 1
+ABILITY_MAX_RETRY_DELAY = 30
+# times to ask for the abilities before giving up on ACs the console doesn't describe, until the next connection
+ABILITY_MAX_REQUESTS = 5
+# message ID of the heartbeat, so its response is told apart from status pushes
+HEARTBEAT_MESSAGE_ID = 255
+# seconds to wait after a change of the ACs or groups before writing them to the cache
+CACHE_SAVE_DELAY = 1
+
+
+def _changed_records(subdata: bytes, length: int, id_from_bytes: Callable[[bytes], int],
+                     entities: Mapping[int, At2PlusAircon] | Mapping[int, At2PlusGroup]) -> list[bytes]:
+    """
+    Split repeat 'subdata' into its records, leaving out those identical to the last record of their entity.
+    Repeated statuses are the bulk of what the console sends, this way they are never decoded.
+    """
+    records: list[bytes] = []
+    for i in range(0, len(subdata), length):
+        record = bytes(subdata[i:i+length])
+        entity = entities.get(id_from_bytes(record))
+        if entity is None or entity._raw_status != record:
+            records.append(record)
+    return records
+
+
+def _is_ability_message(message: Message) -> bool:
+    data = message.data_buffer.to_bytes()
+    return message.header.type == MessageType.EXTENDED and \
+        data[:EXTENDED_SUBHEADER_LENGTH] == ExtendedSubHeader(ExtendedMessageSubType.ABILITY).to_bytes()
+
+
+def _is_answered(message: Serializable) -> bool:
+    """Whether the console answers 'message' with a response echoing its message ID"""
+    return isinstance(message, (AcControlMessage, GroupControlMessage, AcStatusMessage, GroupStatusMessage,
+                                RequestGroupNamesMessage, RequestAcAbilityMessage))
+
+
+def _can_resend(message: Serializable) -> bool:
+    """
+    Whether receiving 'message' twice does no harm, so it can be resent when the connection was lost before
+    it was acknowledged. Relative settings (toggle, next, damper inc/dec) would be applied twice.
+    """
+    if isinstance(message, AcControlMessage):
+        return all(settings.power != AcSetPower.TOGGLE for settings in message.settings)
+    if isinstance(message, GroupControlMessage):
+        return all(settings.power != GroupSetPower.NEXT and
+                   settings.damp_mode not in (GroupSetDamper.INC, GroupSetDamper.DEC)
+                   for settings in message.settings)
+    return isinstance(message, (AcStatusMessage, GroupStatusMessage, RequestGroupNamesMessage,
+                                RequestAcAbilityMessage))
+
 
 class At2PlusClient:
-    def __init__(self, host: str, dump_responses: bool = False, task_creator: TaskCreator = asyncio.create_task):
+    def __init__(self, host: str, dump_responses: bool = False, task_creator: TaskCreator = asyncio.create_task,
+                 batch_window: float = 0, cache_path: str | None = None, heartbeat_interval: float = 30,
+                 reconnect_policy: ReconnectPolicy | None = None, port: int = 9200, capture: WireCapture | None = None,
+                 connection_factory: ConnectionFactory = asyncio.open_connection):
+        """
+        'batch_window' is how many seconds AC and group settings are gathered for to be sent together,
+        0 sends every setting immediately on its own.
+        'cache_path' is a file to remember the ACs and groups in, so they are available immediately on the next start.
+        'heartbeat_interval' is how many idle seconds pass before the console is asked for a response, 0 disables it.
+        'reconnect_policy' paces reconnection after the connection is lost, its outage statistics are kept there.
+        'capture' records all traffic with the console, 'dump_responses' captures to a new file in the working
+        directory if no capture is given.
+        'connection_factory' opens the connection to the console, e.g. Replay.open_connection to replay a capture.
+        """
         # public
         self.aircons_by_id: dict[int, At2PlusAircon] = {}
         self.groups_by_id: dict[int, At2PlusGroup] = {}
 
         # private
-        self._client = NetClient(host, 9200, self._on_connect, self.handle_one_message, task_creator)
-        self._dump_responses = dump_responses
+        # a capture made for 'dump_responses' is closed with the client
+        self._own_capture = capture is None and dump_responses
+        if self._own_capture:
+            capture = WireCapture(f"at2plus_{host}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.capture")
+        self._capture = capture
+        self._client = NetClient(host, port, self._on_connect, self.handle_one_message, task_creator,
+                                 heartbeat=lambda: IdentifiedMessage(AcStatusMessage([]), HEARTBEAT_MESSAGE_ID),
+                                 heartbeat_interval=heartbeat_interval,
+                                 reconnect_policy=reconnect_policy, capture=capture,
+                                 connection_factory=connection_factory)
         self._task_creator = task_creator
         self._new_ac_callbacks: list[Callback] = []
-        self._ability_message_queue: asyncio.Queue[AcAbilityMessage] = asyncio.Queue()
+        self._decoder = FrameDecoder()
+        # abilities of ACs that haven't had a status yet
+        self._unclaimed_abilities: dict[int, AcAbility] = {}
+        # names of groups that haven't had a status yet
+        self._unclaimed_group_names: dict[int, str] = {}
+        # message IDs other than the default and heartbeat ones identify requests whose response is awaited
+        self._requests: RequestTracker[Message] = RequestTracker(MESSAGE_ID + 1, HEARTBEAT_MESSAGE_ID - 1)
+        self._requesting_abilities = False
         self._found_ac = asyncio.Event()
         self._new_group_callbacks: list[Callback] = []
+        self._frame_callbacks: list[FrameCallback] = []
+        self._batcher: CommandBatcher | None = CommandBatcher(
+            self.send, batch_window, task_creator) if batch_window > 0 else None
+
+        self._cache: TopologyCache | None = TopologyCache(cache_path, host) if cache_path else None
+        self._cache_save_pending = False
+        self._verify_cached_topology = False
 
         self.add_new_ac_callback(lambda: self._found_ac.set())
 
     async def connect(self) -> bool:
+        if self._cache is not None and not self.aircons_by_id and not self.groups_by_id:
+            await self._restore_topology()
         return await self._client.connect()
 
     def run(self) -> None:
         self._client.run()
 
+    @property
+    def connection(self) -> NetClient:
+        return self._client
+
+    async def rediscover(self) -> None:
+        """Ask the console for all its ACs, groups and group names again, to pick up any added since connecting"""
+        await self._client.send(GroupStatusMessage([]))
+        await self._client.send(AcStatusMessage([]))
+        await self._client.send(RequestGroupNamesMessage())
+
     async def wait_for_ac(self, timeout: int = 5) -> None:
         await asyncio.wait_for(self._found_ac.wait(), timeout)
 
     async def stop(self) -> None:
+        if self._batcher is not None:
+            # don't drop settings still waiting for their batch
+            await self._batcher.flush()
         await self._client.stop()
+        self._requests.cancel_all()
+        if self._own_capture and self._capture is not None:
+            await asyncio.to_thread(self._capture.close)
 
     def add_new_ac_callback(self, callback: Callback):
         self._new_ac_callbacks.append(callback)
@@ -66,40 +183,125 @@ class At2PlusClient:
 
         return remove_callback
 
-    async def send(self, msg: Serializable):
-        await self._client.send(msg)
+    def add_frame_callback(self, callback: FrameCallback) -> Callback:
+        """
+        Subscribe 'callback' to be called once per received message that changed anything,
+        with the ids of the ACs and of the groups it changed.
+        Return a callback to unsubscribe.
+        """
+        return add_callback(callback, self._frame_callbacks)
+
+    def _notify_frame(self, changed_acs: set[int], changed_groups: set[int]) -> None:
+        if changed_acs or changed_groups:
+            for callback in list(self._frame_callbacks):
+                callback(changed_acs, changed_groups)
+
+    async def send(self, msg: Serializable, ack: bool = False) -> None:
+        """
+        Send 'msg', returns once it is written. Raises ConnectionError if the connection was lost before then
+        and 'msg' can't be resent.
+        With 'ack' it is sent with its own message ID and only returns once the console acknowledged it (see request).
+        The console answers AC and group control with the statuses of the ACs or groups, and the status, ability
+        and group name requests with their responses, each echoing the message ID.
+        """
+        if ack:
+            await self.request(msg)
+        else:
+            await self._client.send(msg, resend=_can_resend(msg))
+
+    async def request(self, msg: Serializable, matches: Callable[[Message], bool] | None = None,
+                      timeout: float | None = None) -> Message:
+        """
+        Send 'msg' with its own message ID and return the response echoing it, only for messages the console
+        answers (see send). 'matches' can restrict which messages with that ID count as the response.
+        Raises TimeoutError if no response arrives within 'timeout' seconds, ConnectionError if the connection
+        was lost before the response and 'msg' can't be resent, ValueError if the console doesn't answer 'msg'.
+        """
+        if not _is_answered(msg):
+            # nothing would ever resolve it
+            raise ValueError(f"The console doesn't answer {msg.__class__.__name__}")
+        message_id, response = self._requests.track(matches, timeout)
+        try:
+            # the response is the acknowledgement, until then 'msg' is resent after a reconnect if that's harmless
+            await self._client.send(IdentifiedMessage(msg, message_id), acknowledgement=response,
+                                    resend=_can_resend(msg))
+        except BaseException:
+            self._requests.cancel(message_id)
+            raise
+        return response.result()
+
+    async def send_ac_settings(self, settings: AcSettings) -> None:
+        """Send 'settings', batched with other settings if batching is enabled"""
+        if self._batcher is not None:
+            await self._batcher.add_ac_settings(settings)
+        else:
+            await self.send(AcControlMessage([settings]))
+
+    async def send_group_settings(self, settings: GroupSettings) -> None:
+        """Send 'settings', batched with other settings if batching is enabled"""
+        if self._batcher is not None:
+            await self._batcher.add_group_settings(settings)
+        else:
+            await self.send(GroupControlMessage([settings]))
 
     async def handle_one_message(self) -> None:
-        message = await self._read_message()
-        if not message:
+        """Read the next chunk of data from the socket and handle every complete message it contains"""
+        messages = await self._read_messages()
+        if messages is None:
             # something went wrong
             _LOGGER.warning("Reading message failed")
             return
+        for message in messages:
+            if message.header.message_id == HEARTBEAT_MESSAGE_ID:
+                self._client.heartbeat_answered()
+            try:
+                await self._handle_message(message)
+            finally:
+                # the request was answered even if handling the response failed, it mustn't time out
+                self._requests.resolve(message.header.message_id, message)
 
+    async def _handle_message(self, message: Message) -> None:
         if message.header.type == MessageType.CONTROL_STATUS:
             subheader = ControlStatusSubHeader.from_buffer(message.data_buffer)
             if subheader.sub_type == ControlStatusSubType.AC_STATUS:
-                status_message = AcStatusMessage.from_bytes(
-                    message.data_buffer.read_bytes(subheader.subdata_length.total()))
-                self._task_creator(self._handle_status_message(status_message))
+                records = _changed_records(
+                    message.data_buffer.read_view(subheader.subdata_length.total()), AC_STATUS_LENGTH,
+                    AcStatus.id_from_bytes, self.aircons_by_id)
+                if records:
+                    self._task_creator(self._handle_status_message(records))
             elif subheader.sub_type == ControlStatusSubType.GROUP_STATUS:
-                group_status_message = GroupStatusMessage.from_bytes(
-                    message.data_buffer.read_bytes(subheader.subdata_length.total()))
-                self._task_creator(self._handle_group_status_message(group_status_message))
+                records = _changed_records(
+                    message.data_buffer.read_view(subheader.subdata_length.total()), GROUP_STATUS_LENGTH,
+                    GroupStatus.id_from_bytes, self.groups_by_id)
+                if records or not self.groups_by_id:
+                    self._task_creator(self._handle_group_status_message(records))
             else:
                 _LOGGER.warning(
                     f"Unknown status message type: subtype={subheader.sub_type}, data={message.data_buffer.to_bytes().hex(':')}")
         elif message.header.type == MessageType.EXTENDED:
             subheader = ExtendedSubHeader.from_buffer(message.data_buffer)
             if subheader.sub_type == ExtendedMessageSubType.ABILITY:
-                ability_message_bytes = message.data_buffer.read_remaining()
+                ability_message_bytes = message.data_buffer.read_remaining_view()
                 _LOGGER.debug(f"Creating ability message from {len(ability_message_bytes)} bytes")
-                ability = AcAbilityMessage.from_bytes(ability_message_bytes)
-                await self._ability_message_queue.put(ability)
+                try:
+                    ability_message = AcAbilityMessage.from_bytes(ability_message_bytes)
+                except (ValueError, IndexError) as e:
+                    _LOGGER.warning(f"Ignoring invalid ability message: {e}, data={ability_message_bytes.hex(':')}")
+                    return
+                self._handle_ability_message(ability_message)
             elif subheader.sub_type == ExtendedMessageSubType.GROUP_NAME:
-                group_names_subdata = message.data_buffer.read_remaining()
+                group_names_subdata = message.data_buffer.read_remaining_view()
+                changed_groups: set[int] = set()
                 for id, name in group_names_from_subdata(group_names_subdata).items():
-                    self.groups_by_id[id]._update_name(name)
+                    group = self.groups_by_id.get(id)
+                    if group is None:
+                        # the status creating the group is still being handled
+                        self._unclaimed_group_names[id] = name
+                    elif group._update_name(name):
+                        changed_groups.add(id)
+                if changed_groups:
+                    self._topology_changed()
+                self._notify_frame(set(), changed_groups)
             elif subheader.sub_type == ExtendedMessageSubType.ERROR:
                 # NYI
                 pass
@@ -110,116 +312,185 @@ class At2PlusClient:
             _LOGGER.warning(
                 f"Unknown message type, header={message.header.to_bytes().hex(':')}, data={message.data_buffer.to_bytes().hex(':')}")
 
-    async def _read_magic(self) -> bytes:
-        """Search for the two header magic bytes"""
-        while True:  # exit via return on successful read of header magic
-            byte = await self._client.read_bytes(1)
-            while (byte is None or byte[0] != HEADER_MAGIC):
-                byte = await self._client.read_bytes(1)
-
-            byte = await self._client.read_bytes(1)
-            if (byte is not None and byte[0] == HEADER_MAGIC):
-                return bytes([HEADER_MAGIC, HEADER_MAGIC])
-
-    async def _read_header(self) -> tuple[Header, bytes]:
-        """Try to read header until successful. Returns the raw bytes as well for validating checksum"""
-        while True:  # exit via return on successful read of header
-            header_bytes = bytearray()
-            header_bytes += await self._read_magic()
-            header_remainder = await self._client.read_bytes(HEADER_LENGTH-2)
-
-            if not header_remainder:
-                _LOGGER.debug("Failed reading header, trying again")
-                continue
-
-            header_bytes += header_remainder
-            try:
-                header = Header.from_bytes(header_bytes)
-                return (header, header_bytes)
-            except ValueError as e:
-                _LOGGER.debug(f"ValueError: {e}\nFailed reading header, trying again")
-
-    async def _read_message(self) -> Message | None:
-        "Try to read an entire message. Return None if reading was interrupted by network failure."
-        header, header_bytes = await self._read_header()
-        buffer = Buffer(header.data_length)
-
-        data_bytes = await self._client.read_bytes(header.data_length)
-        if not data_bytes:
-            # interrupted during data reading
-            return None
-        if not buffer.append_bytes(data_bytes):
-            _LOGGER.warning(
-                f"Received incorrect number of bytes, expected {header.data_length} but received {buffer._head}")
-
-        checksum = await self._client.read_bytes(2)
-        if not checksum:
-            # interrupted during checksum reading
-            return None
-        calculated_checksum = crc16(header_bytes[2:] + buffer._data)
-        if (checksum != calculated_checksum):
-            _LOGGER.warning(
-                f"Checksum mismatch, ignoring message: Got {checksum.hex(':')}, expected {calculated_checksum.hex(':')}")
+    async def _read_messages(self) -> list[Message] | None:
+        """
+        Read a chunk from the socket and return all complete messages buffered so far.
+        Return None if reading was interrupted by network failure.
+        """
+        chunk = await self._client.read_chunk()
+        if chunk is None:
+            # partial frames from before the reconnection are useless now
+            self._decoder.reset()
             return None
-
-        if self._dump_responses:
-            # blocks but is only used for dev and debugging
-            with open('message_' + datetime.now().strftime("%m-%d-%Y_%H-%M-%S") + '.dump', 'wb') as f:
-                f.write(header.to_bytes() + buffer.to_bytes() + checksum)
-
-        return Message(header, buffer)
+        return self._decoder.feed(chunk)
 
     async def _on_connect(self) -> None:
         # request groups
         await self._client.send(GroupStatusMessage([]))
         # request ACs
         await self._client.send(AcStatusMessage([]))
-
-    async def _handle_status_message(self, message: AcStatusMessage):
+        if self._verify_cached_topology:
+            self._verify_cached_topology = False
+            self._task_creator(self._verify_topology())
+        elif self._missing_abilities() and not self._requesting_abilities:
+            # a previous connection gave up on them
+            self._requesting_abilities = True
+            self._task_creator(self._request_ac_abilities())
+
+    async def _restore_topology(self) -> None:
+        """Create the ACs and groups remembered in the cache"""
+        assert self._cache is not None
+        topology = await self._cache.load()
+        if topology is None:
+            return
+        try:
+            ac_statuses = {id: AcStatus.from_bytes(raw) for id, raw in topology.ac_statuses.items()}
+            abilities = {id: AcAbility.from_bytes(raw) for id, raw in topology.ac_abilities.items()}
+            group_statuses = {id: GroupStatus.from_bytes(raw) for id, raw in topology.group_statuses.items()}
+        except ValueError as e:
+            _LOGGER.warning(f"Ignoring invalid cached topology: {e}")
+            return
+        _LOGGER.debug(f"Restoring {len(ac_statuses)} ACs and {len(group_statuses)} groups from the cache")
+
+        # built as they were, nothing changed so no callbacks are due until the console says otherwise
+        for id, group_status in sorted(group_statuses.items()):
+            group = At2PlusGroup(group_status, self)
+            group._raw_status = topology.group_statuses[id]
+            group.name = topology.group_names.get(id)
+            self.groups_by_id[id] = group
+            for callback in self._new_group_callbacks:
+                callback()
+        for id, ac_status in sorted(ac_statuses.items()):
+            ac = At2PlusAircon(ac_status, self)
+            ac._raw_status = topology.ac_statuses[id]
+            if id in abilities:
+                ac._set_ability(abilities[id])
+            self.aircons_by_id[id] = ac
+            for callback in self._new_ac_callbacks:
+                callback()
+        self._verify_cached_topology = True
+
+    async def _verify_topology(self) -> None:
+        """Fetch the abilities and group names once, replacing those restored from the cache if they changed"""
+        if self._missing_abilities():
+            if not self._requesting_abilities:
+                await self._request_ac_abilities()
+        else:
+            try:
+                await self.request(RequestAcAbilityMessage(), _is_ability_message, ABILITY_TIMEOUT)
+            except TimeoutError:
+                _LOGGER.warning("Could not verify the cached AC abilities, no response")
+            except (ConnectionError, asyncio.QueueFull, RuntimeError) as e:
+                _LOGGER.warning(f"Could not verify the cached AC abilities: {e!r}")
+        try:
+            await self._client.send(RequestGroupNamesMessage())
+        except (ConnectionError, TimeoutError, asyncio.QueueFull, RuntimeError) as e:
+            _LOGGER.warning(f"Could not verify the cached group names: {e!r}")
+
+    def _topology(self) -> Topology:
+        return Topology(
+            {id: ac._raw_status or ac.status.to_bytes() for id, ac in self.aircons_by_id.items()},
+            {id: ac.ability.to_bytes() for id, ac in self.aircons_by_id.items() if ac.ability is not None},
+            {id: group._raw_status or group.status.to_bytes() for id, group in self.groups_by_id.items()},
+            {id: group.name for id, group in self.groups_by_id.items() if group.name is not None})
+
+    def _topology_changed(self) -> None:
+        if self._cache is not None and not self._cache_save_pending:
+            self._cache_save_pending = True
+            self._task_creator(self._save_topology())
+
+    async def _save_topology(self) -> None:
+        assert self._cache is not None
+        # discovery changes the topology in several steps, let them settle so it is written once
+        await asyncio.sleep(CACHE_SAVE_DELAY)
+        self._cache_save_pending = False
+        await self._cache.save(self._topology())
+
+    async def _handle_status_message(self, records: list[bytes]):
         _LOGGER.debug("Handling AC status message")
-        for status in message.statuses:
+        changed: set[int] = set()
+        for record in records:
+            status = AcStatus.from_bytes(record)
             if status.id not in self.aircons_by_id.keys():
                 _LOGGER.debug(f"New AC ({status.id}) found")
                 self.aircons_by_id[status.id] = At2PlusAircon(status, self)
                 for callback in self._new_ac_callbacks:
                     callback()
-                ability = await self._request_ac_ability(status.id)
-                while not ability:
-                    ability = await self._request_ac_ability(status.id)
-                self.aircons_by_id[status.id]._set_ability(ability)
-                _LOGGER.debug(f"Set ability of AC{status.id}")
-            self.aircons_by_id[status.id]._update_status(status)
+                self._topology_changed()
+                ability = self._unclaimed_abilities.pop(status.id, None)
+                if ability is not None:
+                    self.aircons_by_id[status.id]._set_ability(ability)
+                elif not self._requesting_abilities:
+                    self._requesting_abilities = True
+                    self._task_creator(self._request_ac_abilities())
+            if self.aircons_by_id[status.id]._update_status(status, record):
+                changed.add(status.id)
             _LOGGER.debug(f"Updated AC {status.id} with value {status}")
+        self._notify_frame(changed, set())
         _LOGGER.debug("Finished handling AC status message")
 
-    async def _request_ac_ability(self, id: int) -> AcAbility | None:
-        _LOGGER.debug(f"Requesting ability of AC{id}")
-        await self._client.send(RequestAcAbilityMessage(id))
-        _LOGGER.debug("Waiting for ability message response...")
-        ac_ability = await self._ability_message_queue.get()
-        _LOGGER.debug("Got ability message response")
-        if len(ac_ability.abilities) != 1:
-            _LOGGER.warning(f"Expected ability of single requested AC but got {len(ac_ability.abilities)}")
-            return None
-        if ac_ability.abilities[0].ac_id != id:
-            _LOGGER.warning(f"Requested ability of AC{id} but got AC{ac_ability.abilities[0].ac_id}")
-            return None
-        _LOGGER.debug(f"Got ability of AC{id}: {ac_ability.abilities[0]}")
-        return ac_ability.abilities[0]
+    def _missing_abilities(self) -> list[int]:
+        return [id for id, ac in self.aircons_by_id.items() if ac.ability is None]
+
+    async def _request_ac_abilities(self) -> None:
+        """
+        Request the abilities of all ACs in one message, until every known AC has its ability.
+        Backs off between requests and gives up after ABILITY_MAX_REQUESTS, e.g. for a cached AC that was removed.
+        """
+        self._requesting_abilities = True
+        delay = ABILITY_RETRY_DELAY
+        try:
+            for attempt in range(ABILITY_MAX_REQUESTS):
+                if not self._missing_abilities():
+                    return
+                if attempt:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, ABILITY_MAX_RETRY_DELAY)
+                _LOGGER.debug("Requesting abilities of all ACs")
+                try:
+                    await self.request(RequestAcAbilityMessage(), _is_ability_message, ABILITY_TIMEOUT)
+                except TimeoutError:
+                    _LOGGER.warning(f"No AC ability response within {ABILITY_TIMEOUT}s")
+                except (ConnectionError, asyncio.QueueFull, RuntimeError) as e:
+                    _LOGGER.warning(f"Could not request the AC abilities: {e!r}")
+            missing = self._missing_abilities()
+            if missing:
+                _LOGGER.warning(f"Giving up on the abilities of ACs {missing} after {ABILITY_MAX_REQUESTS} requests, "
+                                "asking again on the next connection")
+        finally:
+            self._requesting_abilities = False
+
+    def _handle_ability_message(self, message: AcAbilityMessage) -> None:
+        for ability in message.abilities:
+            if ability.ac_id in self.aircons_by_id:
+                if ability != self.aircons_by_id[ability.ac_id].ability:
+                    self._topology_changed()
+                self.aircons_by_id[ability.ac_id]._set_ability(ability)
+                _LOGGER.debug(f"Set ability of AC{ability.ac_id}: {ability}")
+            else:
+                self._unclaimed_abilities[ability.ac_id] = ability
 
-    async def _handle_group_status_message(self, message: GroupStatusMessage):
+    async def _handle_group_status_message(self, records: list[bytes]):
         _LOGGER.debug("Handling group status message")
         request_names: bool = False
         if not len(self.groups_by_id):
             request_names = True
-        for status in message.statuses:
+        changed: set[int] = set()
+        for record in records:
+            status = GroupStatus.from_bytes(record)
             if status.id not in self.groups_by_id.keys():
                 _LOGGER.debug(f"New group ({status.id}) found")
                 self.groups_by_id[status.id] = At2PlusGroup(status, self)
+                name = self._unclaimed_group_names.pop(status.id, None)
+                if name is not None:
+                    self.groups_by_id[status.id]._update_name(name)
                 for callback in self._new_group_callbacks:
                     callback()
-            self.groups_by_id[status.id]._update_status(status)
+                self._topology_changed()
+            if self.groups_by_id[status.id]._update_status(status, record):
+                changed.add(status.id)
             _LOGGER.debug(f"Updated group {status.id} with value {status}")
+        self._notify_frame(set(), changed)
         _LOGGER.debug("Finished handling group status message")
         if request_names:
             _LOGGER.debug("Requesting all group names")
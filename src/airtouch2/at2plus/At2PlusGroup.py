@@ -1,9 +1,9 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
-from airtouch2.common.interfaces import Callback
+from airtouch2.common.interfaces import Callback, FieldCallback, add_field_callback, notify_field_callbacks
 from airtouch2.protocol.at2plus.enums import GroupPower, GroupSetDamper, GroupSetPower
-from airtouch2.protocol.at2plus.messages.GroupControl import GroupControlMessage, GroupSettings
+from airtouch2.protocol.at2plus.messages.GroupControl import GroupSettings
 from airtouch2.protocol.at2plus.messages.GroupStatus import GroupStatus
 
 if TYPE_CHECKING:
@@ -21,10 +21,13 @@ class At2PlusGroup:
         self.name: str | None = None
         self._client = client
         self._callbacks: list[Callback] = []
+        self._field_callbacks: dict[str, list[FieldCallback]] = {}
+        # serial data of the last status, to recognise repeats without decoding them
+        self._raw_status: bytes | None = None
 
     async def _set_power(self, power: GroupSetPower, damp: int | None = None):
         settings = GroupSettings(self.status.id, GroupSetDamper.UNCHANGED, power, damp)
-        await self._client.send(GroupControlMessage([settings]))
+        await self._client.send_group_settings(settings)
 
     async def turn_on(self, damp: int | None = None):
         await self._set_power(GroupSetPower.ON, damp)
@@ -37,11 +40,11 @@ class At2PlusGroup:
 
     async def set_damp(self, new_damp: int):
         settings = GroupSettings(self.status.id, GroupSetDamper.SET, GroupSetPower.UNCHANGED, new_damp)
-        await self._client.send(GroupControlMessage([settings]))
+        await self._client.send_group_settings(settings)
 
     async def set_turbo(self):
         settings = GroupSettings(self.status.id, GroupSetDamper.UNCHANGED, GroupSetPower.TURBO)
-        await self._client.send(GroupControlMessage([settings]))
+        await self._client.send_group_settings(settings)
 
     def add_callback(self, callback: Callback) -> Callback:
         self._callbacks.append(callback)
@@ -52,15 +55,36 @@ class At2PlusGroup:
 
         return remove_callback
 
-    def _update_status(self, status: GroupStatus):
+    def add_field_callback(self, field: str, callback: FieldCallback) -> Callback:
+        """
+        Subscribe 'callback' to changes of the GroupStatus field 'field', it is called with the old and new value.
+        Return a callback that unsubscribes.
+        """
+        return add_field_callback(field, callback, self._field_callbacks, GroupStatus)
+
+    def _update_status(self, status: GroupStatus, raw_status: bytes | None = None) -> bool:
+        """Return whether the status changed"""
+        if raw_status is not None:
+            if raw_status == self._raw_status:
+                return False
+            self._raw_status = raw_status
+        elif status == self.status:
+            return False
+        old_status = self.status
         self.status = status
+        notify_field_callbacks(old_status, status, self._field_callbacks)
         for callback in self._callbacks:
             callback()
+        return True
 
-    def _update_name(self, name: str):
+    def _update_name(self, name: str) -> bool:
+        """Return whether the name changed"""
+        if name == self.name:
+            return False
         self.name = name
         for callback in self._callbacks:
             callback()
+        return True
 
     def __repr__(self):
         return str(self.status) + f"""
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import asyncio
+import logging
+
+from airtouch2.common.interfaces import SendCoro, TaskCreator
+from airtouch2.protocol.at2plus.enums import AcFanSpeed, AcSetMode, AcSetPower, GroupSetDamper, GroupSetPower
+from airtouch2.protocol.at2plus.messages.AcControl import AcControlMessage, AcSettings
+from airtouch2.protocol.at2plus.messages.GroupControl import GroupControlMessage, GroupSettings
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _merge_value(old, new, unchanged, relative):
+    """
+    Value of a field after 'old' and then 'new' were applied, or None if they can't be merged.
+    'relative' values depend on the current state, so applying one after another value can't be expressed as one value.
+    """
+    if new == unchanged:
+        return old
+    if old != unchanged and new in relative:
+        return None
+    return new
+
+
+def merge_ac_settings(old: AcSettings, new: AcSettings) -> AcSettings | None:
+    """Combine two settings of the same AC, 'new' taking precedence. Return None if they can't be combined."""
+    power = _merge_value(old.power, new.power, AcSetPower.UNCHANGED, (AcSetPower.TOGGLE,))
+    mode = _merge_value(old.mode, new.mode, AcSetMode.UNCHANGED, ())
+    speed = _merge_value(old.speed, new.speed, AcFanSpeed.UNCHANGED, ())
+    if power is None or mode is None or speed is None:
+        return None
+    setpoint = new.setpoint if new.setpoint is not None else old.setpoint
+    return AcSettings(new.id, power, mode, speed, setpoint)
+
+
+def merge_group_settings(old: GroupSettings, new: GroupSettings) -> GroupSettings | None:
+    """Combine two settings of the same group, 'new' taking precedence. Return None if they can't be combined."""
+    damp_mode = _merge_value(old.damp_mode, new.damp_mode, GroupSetDamper.UNCHANGED,
+                             (GroupSetDamper.INC, GroupSetDamper.DEC))
+    power = _merge_value(old.power, new.power, GroupSetPower.UNCHANGED, (GroupSetPower.NEXT,))
+    if damp_mode is None or power is None:
+        return None
+    damp = new.damp if new.damp is not None else old.damp
+    return GroupSettings(new.id, damp_mode, power, damp)
+
+
+class CommandBatcher:
+    """
+    Gathers AC and group settings issued within 'window' seconds of each other and sends them
+    as a single AcControlMessage and a single GroupControlMessage.
+
+    Settings for the same AC or group are merged, later values overriding earlier ones.
+    Relative settings (toggle, next, damper inc/dec) are never merged with another value of the same field,
+    the pending batch is sent first instead.
+    """
+
+    def __init__(self, send: SendCoro, window: float, task_creator: TaskCreator = asyncio.create_task):
+        self._send = send
+        self._window = window
+        self._task_creator = task_creator
+        self._ac_settings: dict[int, AcSettings] = {}
+        self._group_settings: dict[int, GroupSettings] = {}
+        # resolved once the pending batch of AC (group) settings has been sent, failing if sending it failed
+        self._ac_flushed: asyncio.Future[None] | None = None
+        self._group_flushed: asyncio.Future[None] | None = None
+        self._timer: asyncio.Task | None = None
+        # statistics
+        self.settings_batched: int = 0
+        self.messages_sent: int = 0
+
+    async def add_ac_settings(self, settings: AcSettings) -> None:
+        """Queue 'settings' and wait until the batch containing them has been sent"""
+        pending = self._ac_settings.get(settings.id)
+        if pending is not None:
+            merged = merge_ac_settings(pending, settings)
+            if merged is None:
+                # if it fails its waiters are told, these settings go in the next batch regardless
+                await self._send_ac_batch()
+            else:
+                settings = merged
+        self._ac_settings[settings.id] = settings
+        if self._ac_flushed is None:
+            self._ac_flushed = asyncio.get_running_loop().create_future()
+        await self._wait_for_flush(self._ac_flushed)
+
+    async def add_group_settings(self, settings: GroupSettings) -> None:
+        """Queue 'settings' and wait until the batch containing them has been sent"""
+        pending = self._group_settings.get(settings.id)
+        if pending is not None:
+            merged = merge_group_settings(pending, settings)
+            if merged is None:
+                await self._send_group_batch()
+            else:
+                settings = merged
+        self._group_settings[settings.id] = settings
+        if self._group_flushed is None:
+            self._group_flushed = asyncio.get_running_loop().create_future()
+        await self._wait_for_flush(self._group_flushed)
+
+    async def flush(self) -> None:
+        """Send everything pending right away, raise the error of the first batch that failed to send"""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        # the batches fail separately, only the waiters of the failed one get its error
+        ac_error = await self._send_ac_batch()
+        group_error = await self._send_group_batch()
+        if ac_error is not None:
+            raise ac_error
+        if group_error is not None:
+            raise group_error
+
+    async def _send_ac_batch(self) -> Exception | None:
+        flushed, self._ac_flushed = self._ac_flushed, None
+        settings = list(self._ac_settings.values())
+        self._ac_settings.clear()
+        return await self._send_batch(AcControlMessage(settings) if settings else None, flushed)
+
+    async def _send_group_batch(self) -> Exception | None:
+        flushed, self._group_flushed = self._group_flushed, None
+        settings = list(self._group_settings.values())
+        self._group_settings.clear()
+        return await self._send_batch(GroupControlMessage(settings) if settings else None, flushed)
+
+    async def _send_batch(self, message: AcControlMessage | GroupControlMessage | None,
+                          flushed: asyncio.Future[None] | None) -> Exception | None:
+        """Send 'message' if there is one and resolve 'flushed' with the outcome, return the error if it failed"""
+        error: Exception | None = None
+        if message is not None:
+            try:
+                await self._send(message)
+                self.messages_sent += 1
+            except Exception as e:
+                error = e
+        if flushed is not None and not flushed.done():
+            if error is None:
+                flushed.set_result(None)
+            else:
+                flushed.set_exception(error)
+        return error
+
+    async def _wait_for_flush(self, flushed: asyncio.Future[None]) -> None:
+        self.settings_batched += 1
+        if self._timer is None:
+            self._timer = self._task_creator(self._flush_after_window())
+        # shielded so one cancelled caller doesn't cancel the batch for everyone else
+        await asyncio.shield(flushed)
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self._window)
+        try:
+            await self.flush()
+        except Exception as e:
+            # the waiting callers get the exception
+            _LOGGER.debug(f"Sending batched settings failed: {e}")
@@ -0,0 +1,143 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+# the file is shared by the caches of every host, only one read-modify-write of it at a time in this process
+_path_locks: dict[str, threading.Lock] = {}
+_path_locks_lock = threading.Lock()
+
+
+def _path_lock(path: str) -> threading.Lock:
+    with _path_locks_lock:
+        return _path_locks.setdefault(os.path.realpath(path), threading.Lock())
+
+
+@dataclass
+class Topology:
+    """The ACs and groups of a console as their raw serial data, enough to recreate them without asking the console"""
+    ac_statuses: dict[int, bytes] = field(default_factory=dict)
+    ac_abilities: dict[int, bytes] = field(default_factory=dict)
+    group_statuses: dict[int, bytes] = field(default_factory=dict)
+    group_names: dict[int, str] = field(default_factory=dict)
+
+    def to_json(self) -> dict:
+        return {
+            "acs": {str(id): {"status": status.hex(), "ability": _hex_or_none(self.ac_abilities.get(id))}
+                    for id, status in self.ac_statuses.items()},
+            "groups": {str(id): {"status": status.hex(), "name": self.group_names.get(id)}
+                       for id, status in self.group_statuses.items()},
+        }
+
+    @staticmethod
+    def from_json(data: dict) -> Topology:
+        topology = Topology()
+        for id, ac in data["acs"].items():
+            topology.ac_statuses[int(id)] = bytes.fromhex(ac["status"])
+            if ac["ability"] is not None:
+                topology.ac_abilities[int(id)] = bytes.fromhex(ac["ability"])
+        for id, group in data["groups"].items():
+            topology.group_statuses[int(id)] = bytes.fromhex(group["status"])
+            if group["name"] is not None:
+                topology.group_names[int(id)] = group["name"]
+        return topology
+
+
+def _hex_or_none(data: bytes | None) -> str | None:
+    return data.hex() if data is not None else None
+
+
+class TopologyCache:
+    """
+    JSON file holding the Topology of each console, keyed by host, which several caches can share.
+    File access happens in a worker thread so the event loop is never blocked by the disk.
+    """
+
+    def __init__(self, path: str, host: str):
+        self._path = path
+        self._host = host
+        self._lock = _path_lock(path)
+
+    async def load(self) -> Topology | None:
+        """The cached topology of the host, None if there is none or the cache can't be read"""
+        hosts = await asyncio.to_thread(self._locked_read)
+        data = hosts.get(self._host)
+        if data is None:
+            return None
+        try:
+            return Topology.from_json(data)
+        except (KeyError, TypeError, ValueError) as e:
+            _LOGGER.warning(f"Ignoring invalid cached topology of {self._host}: {e}")
+            return None
+
+    async def save(self, topology: Topology) -> None:
+        await asyncio.to_thread(self._write, topology.to_json())
+
+    def _locked_read(self) -> dict:
+        with self._lock:
+            return self._read()
+
+    def _read(self) -> dict:
+        try:
+            return self._read_hosts()
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            _LOGGER.warning(f"Could not read topology cache {self._path}: {e}")
+            return {}
+
+    def _read_hosts(self) -> dict:
+        """The hosts in the cache file, raises OSError if it can't be read and ValueError if it is corrupt"""
+        with open(self._path, "r") as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+            _LOGGER.info(f"Ignoring topology cache {self._path} of a different version")
+            return {}
+        hosts = cache.get("hosts", {})
+        if not isinstance(hosts, dict):
+            raise ValueError(f"hosts must be an object, got {type(hosts).__name__}")
+        return hosts
+
+    def _write(self, data: dict) -> None:
+        # held in the worker thread, from reading the other hosts until the new file is in place
+        with self._lock:
+            try:
+                hosts = self._read_hosts()
+            except FileNotFoundError:
+                hosts = {}
+            except ValueError as e:
+                # the other hosts in it are lost either way, but keep it around for whoever wants to look
+                backup_path = self._path + ".bak"
+                _LOGGER.warning(f"Topology cache {self._path} is corrupt ({e}), moving it to {backup_path}")
+                try:
+                    os.replace(self._path, backup_path)
+                except OSError as e:
+                    _LOGGER.warning(f"Not writing topology cache {self._path}, could not move it away: {e}")
+                    return
+                hosts = {}
+            except OSError as e:
+                # it may well be fine, only unreadable right now
+                _LOGGER.warning(f"Not writing topology cache {self._path}, could not read it: {e}")
+                return
+            hosts[self._host] = data
+            # write to a temporary file first so a crash never leaves a half written cache
+            directory, name = os.path.split(os.path.abspath(self._path))
+            temp_path: str | None = None
+            try:
+                with tempfile.NamedTemporaryFile("w", dir=directory, prefix=name + ".", suffix=".tmp",
+                                                 delete=False) as f:
+                    temp_path = f.name
+                    json.dump({"version": CACHE_VERSION, "hosts": hosts}, f, indent=1)
+                os.replace(temp_path, self._path)
+            except OSError as e:
+                _LOGGER.warning(f"Could not write topology cache {self._path}: {e}")
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.remove(temp_path)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+import bisect
+import logging
+import mmap
+import os
+import struct
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterator
+
+from airtouch2.capture.capture_format import DATA_DIRECTIONS, MAGIC, RECORD_HEADER, Direction
+from airtouch2.capture.frame_splitter import (ConsoleProtocol, DecodedFrame, FrameSplitter, decode_frame,
+                                              detect_protocol, frame_type)
+
+_LOGGER = logging.getLogger(__name__)
+
+# the last byte is the index format version
+INDEX_MAGIC = b"AT2WIDX\x01"
+# size of the capture file when indexed and its protocol
+_INDEX_HEADER = struct.Struct("<QB")
+# see IndexEntry
+_INDEX_ENTRY = struct.Struct("<dBBB?QQI")
+
+
+@dataclass
+class IndexEntry:
+    """Where a frame is in the capture file"""
+    timestamp: float
+    direction: Direction
+    # see frame_splitter.frame_type
+    message_type: int
+    sub_type: int
+    # whether the frame arrived in one record, so is in one piece in the file
+    contiguous: bool
+    # file offset of the record the frame starts in
+    record_offset: int
+    # file offset of the frame's first byte
+    offset: int
+    length: int
+
+
+class CaptureReader:
+    """
+    Random access to the frames of an uncompressed capture file of any size, which is memory mapped.
+
+    Where every frame is, is kept in a sidecar index file ('index_path', the capture path with '.idx' appended by
+    default) which is built on first use and rebuilt when the capture has grown. The protocol is detected from the
+    received data unless given. Frames that arrived in one piece are decoded straight from the mapped file.
+    """
+
+    def __init__(self, path: str, index_path: str | None = None, protocol: ConsoleProtocol | None = None):
+        self.path = path
+        self._index_path = index_path if index_path is not None else path + ".idx"
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an uncompressed wire capture, decompress it first")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index_map: mmap.mmap | None = None
+        try:
+            self.protocol = self._load_index(protocol)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> CaptureReader:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for mapped in (self._index_map, self._map):
+            if mapped is None:
+                continue
+            try:
+                mapped.close()
+            except BufferError:
+                # decoded messages still refer to the file, it is unmapped once they are gone
+                pass
+
+    def __len__(self) -> int:
+        assert self._index_map is not None
+        return (len(self._index_map) - len(INDEX_MAGIC) - _INDEX_HEADER.size) // _INDEX_ENTRY.size
+
+    def __getitem__(self, i: int) -> IndexEntry:
+        if not 0 <= i < len(self):
+            raise IndexError("Frame index out of range")
+        assert self._index_map is not None
+        position = len(INDEX_MAGIC) + _INDEX_HEADER.size + i * _INDEX_ENTRY.size
+        (timestamp, direction, message_type, sub_type, contiguous, record_offset, offset,
+         length) = _INDEX_ENTRY.unpack_from(self._index_map, position)
+        return IndexEntry(timestamp, Direction(direction), message_type, sub_type, contiguous, record_offset, offset,
+                          length)
+
+    def frames(self, start: float | None = None, end: float | None = None, direction: Direction | None = None,
+               message_type: int | None = None, sub_type: int | None = None) -> Iterator[IndexEntry]:
+        """
+        The frames received from 'start' until before 'end' (timestamps, either end open if None) in order,
+        of only 'direction', 'message_type' and 'sub_type' if given.
+        """
+        first = 0 if start is None else bisect.bisect_left(range(len(self)), start, key=lambda i: self[i].timestamp)
+        for i in range(first, len(self)):
+            entry = self[i]
+            if end is not None and entry.timestamp >= end:
+                return
+            if direction is not None and entry.direction != direction:
+                continue
+            if message_type is not None and entry.message_type != message_type:
+                continue
+            if sub_type is not None and entry.sub_type != sub_type:
+                continue
+            yield entry
+
+    def frame_bytes(self, entry: IndexEntry) -> memoryview | bytes:
+        """The frame of 'entry', a view of the mapped file unless it arrived in pieces"""
+        if entry.contiguous:
+            return memoryview(self._map)[entry.offset:entry.offset + entry.length]
+        # put the pieces together from the records of the same direction that follow
+        pieces: list[bytes] = []
+        remaining = entry.length
+        position = entry.record_offset
+        while remaining:
+            _, direction, length = RECORD_HEADER.unpack_from(self._map, position)
+            data_start = position + RECORD_HEADER.size
+            if direction == entry.direction:
+                piece_start = max(data_start, entry.offset)
+                piece = self._map[piece_start:min(data_start + length, piece_start + remaining)]
+                pieces.append(piece)
+                remaining -= len(piece)
+            position = data_start + length
+        return b"".join(pieces)
+
+    def decode(self, entry: IndexEntry) -> DecodedFrame:
+        return decode_frame(self.protocol, self.frame_bytes(entry))
+
+    def _records(self) -> Iterator[tuple[int, float, Direction, memoryview]]:
+        """Offset, timestamp, direction and data of every complete record"""
+        view = memoryview(self._map)
+        size = len(self._map)
+        position = len(MAGIC)
+        while position + RECORD_HEADER.size <= size:
+            timestamp, direction, length = RECORD_HEADER.unpack_from(self._map, position)
+            data_start = position + RECORD_HEADER.size
+            if data_start + length > size:
+                # cut short, still being written
+                return
+            yield position, timestamp, Direction(direction), view[data_start:data_start + length]
+            position = data_start + length
+
+    def _load_index(self, protocol: ConsoleProtocol | None) -> ConsoleProtocol:
+        if os.path.exists(self._index_path) and \
+                os.path.getsize(self._index_path) >= len(INDEX_MAGIC) + _INDEX_HEADER.size:
+            with open(self._index_path, "rb") as f:
+                index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            indexed_size, indexed_protocol = _INDEX_HEADER.unpack_from(index_map, len(INDEX_MAGIC))
+            if index_map[:len(INDEX_MAGIC)] == INDEX_MAGIC and indexed_size == len(self._map) and \
+                    (protocol is None or protocol == indexed_protocol):
+                self._index_map = index_map
+                return ConsoleProtocol(indexed_protocol)
+            index_map.close()
+        _LOGGER.info(f"Indexing {self.path}")
+        protocol = self._build_index(protocol)
+        with open(self._index_path, "rb") as f:
+            self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return protocol
+
+    def _detect_protocol(self) -> ConsoleProtocol:
+        for _, _, direction, data in self._records():
+            if direction == Direction.RECEIVED:
+                protocol = detect_protocol(bytes(data))
+                if protocol is not None:
+                    return protocol
+        raise ValueError(f"Can't tell the protocol of {self.path}, nothing recognisable was received")
+
+    def _build_index(self, protocol: ConsoleProtocol | None) -> ConsoleProtocol:
+        if protocol is None:
+            protocol = self._detect_protocol()
+        splitters = {direction: FrameSplitter(protocol, direction) for direction in DATA_DIRECTIONS}
+        # per direction, the offset, stream position and length of the records holding undecoded data
+        records: dict[Direction, deque[tuple[int, int, int, int]]] = {
+            direction: deque() for direction in DATA_DIRECTIONS}
+        positions = {direction: 0 for direction in DATA_DIRECTIONS}
+        temporary_path = self._index_path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(INDEX_MAGIC + _INDEX_HEADER.pack(len(self._map), protocol))
+            for record_offset, timestamp, direction, data in self._records():
+                if direction not in DATA_DIRECTIONS:
+                    # a new connection, a partial frame from before is never completed
+                    for splitter in splitters.values():
+                        splitter.reset()
+                    for held in records.values():
+                        held.clear()
+                    continue
+                held = records[direction]
+                held.append((record_offset, positions[direction], len(data), record_offset + RECORD_HEADER.size))
+                positions[direction] += len(data)
+                for stream_position, frame in splitters[direction].feed(data):
+                    # the record the frame starts in
+                    while held[0][1] + held[0][2] <= stream_position:
+                        held.popleft()
+                    offset, record_position, record_length, data_offset = held[0]
+                    frame_offset = data_offset + stream_position - record_position
+                    contiguous = stream_position + len(frame) <= record_position + record_length
+                    message_type, sub_type = frame_type(protocol, frame)
+                    f.write(_INDEX_ENTRY.pack(timestamp, direction, message_type, sub_type, contiguous, offset,
+                                              frame_offset, len(frame)))
+                # records entirely before any data still held back by the decoder aren't needed anymore
+                while held and held[0][1] + held[0][2] <= positions[direction] - splitters[direction].buffered():
+                    held.popleft()
+        os.replace(temporary_path, self._index_path)
+        return protocol
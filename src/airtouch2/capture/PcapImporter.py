@@ -0,0 +1,391 @@
+from __future__ import annotations
+import ipaddress
+import logging
+import struct
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import BinaryIO, Iterator
+
+from airtouch2.capture.capture_format import Direction, open_capture
+from airtouch2.capture.frame_splitter import PORTS, ConsoleProtocol, FrameSplitter, decode_frame
+from airtouch2.protocol.at2plus.message_common import Header
+
+_LOGGER = logging.getLogger(__name__)
+
+_PCAP_MAGIC_MICROSECONDS = 0xA1B2C3D4
+_PCAP_MAGIC_NANOSECONDS = 0xA1B23C4D
+# magic, version major and minor, time zone, timestamp accuracy, snapshot length, link type
+_PCAP_HEADER = "IHHiIII"
+# seconds, fraction of a second, captured length, original length
+_PCAP_RECORD_HEADER = "IIII"
+
+_PCAPNG_SECTION_HEADER = 0x0A0D0D0A
+_PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+_PCAPNG_INTERFACE_DESCRIPTION = 1
+_PCAPNG_ENHANCED_PACKET = 6
+_PCAPNG_OPTION_END = 0
+_PCAPNG_OPTION_TIMESTAMP_RESOLUTION = 9
+# block type and total length, the total length is repeated after the body
+_PCAPNG_BLOCK_HEADER_LENGTH = 8
+_PCAPNG_BLOCK_TRAILER_LENGTH = 4
+
+_ETHER_TYPE_IPV4 = 0x0800
+_ETHER_TYPE_IPV6 = 0x86DD
+_ETHER_TYPES_VLAN = (0x8100, 0x88A8)
+_IP_PROTOCOL_TCP = 6
+
+_TCP_FIN = 0x01
+_TCP_SYN = 0x02
+_TCP_RST = 0x04
+_SEQUENCE_MODULUS = 1 << 32
+
+
+class LinkType(IntEnum):
+    NULL = 0
+    ETHERNET = 1
+    RAW = 101
+    LINUX_SLL = 113
+    IPV4 = 228
+    IPV6 = 229
+    LINUX_SLL2 = 276
+
+
+# offset of the ether type and of the IP packet in each link layer's frames
+_LINK_LAYERS = {
+    LinkType.ETHERNET: (12, 14),
+    LinkType.LINUX_SLL: (14, 16),
+    LinkType.LINUX_SLL2: (0, 20),
+}
+
+
+@dataclass
+class ImportedFrame:
+    timestamp: float
+    # client address and port, console address and port
+    connection: tuple[str, int, str, int]
+    direction: Direction
+    protocol: ConsoleProtocol
+    frame: bytes
+    # None for AT2, which has no headers
+    header: Header | None
+    # the message class instance or AT2 SystemInfo, None if it isn't one that can be decoded
+    message: object | None
+
+
+class _TcpStream:
+    """One direction of a TCP connection being put back together"""
+
+    def __init__(self, splitter: FrameSplitter):
+        self.splitter = splitter
+        # sequence number of the next byte expected, None until the first segment
+        self.next_sequence: int | None = None
+        # segments that arrived ahead of a missing one, by sequence number
+        self.held: dict[int, bytes] = {}
+        self.held_bytes = 0
+        self.last_seen = 0.0
+
+
+def _sequence_distance(sequence: int, base: int) -> int:
+    """How far 'sequence' is after 'base' (negative if before), allowing for wrap around"""
+    return (sequence - base + (_SEQUENCE_MODULUS >> 1)) % _SEQUENCE_MODULUS - (_SEQUENCE_MODULUS >> 1)
+
+
+class PcapImporter:
+    """
+    Extracts the AirTouch frames from a tcpdump/Wireshark capture (pcap or pcapng, optionally gzip compressed).
+
+    The TCP stream of every connection to a console port in 'ports' (by default 9200 for AirTouch 2+ and 8899 for
+    AirTouch 2) is put back together per direction and split into frames, which are decoded with the protocol's
+    message classes. The capture is read as a stream and only a bounded amount is held per connection:
+    at most 'max_held_bytes' of segments arriving out of order, after which the missing data is taken as lost.
+    Connections not seen for 'idle_timeout' seconds of capture time are forgotten.
+    """
+
+    def __init__(self, file: BinaryIO, ports: dict[int, ConsoleProtocol] | None = None,
+                 max_held_bytes: int = 256 * 1024, idle_timeout: float = 3600):
+        self._file = file
+        self._ports = ports if ports is not None else {port: protocol for protocol, port in PORTS.items()}
+        self._max_held_bytes = max_held_bytes
+        self._idle_timeout = idle_timeout
+        # by connection and direction, least recently seen first
+        self._streams: dict[tuple[tuple[str, int, str, int], Direction], _TcpStream] = {}
+        # statistics
+        self.packets_read: int = 0
+        self.segments_imported: int = 0
+        self.frames_imported: int = 0
+        # times data was missing from a stream, e.g. packets the capture dropped
+        self.gaps: int = 0
+
+    @staticmethod
+    def from_file(path: str, ports: dict[int, ConsoleProtocol] | None = None) -> PcapImporter:
+        """An importer reading the capture at 'path', close it when done"""
+        return PcapImporter(open_capture(path), ports)
+
+    def __enter__(self) -> PcapImporter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def frames(self) -> Iterator[ImportedFrame]:
+        """Every frame in the capture in the order it was completed, with the time of the packet completing it"""
+        for timestamp, link_type, packet in self._packets():
+            self.packets_read += 1
+            segment = self._tcp_segment(link_type, memoryview(packet))
+            if segment is None:
+                continue
+            connection, direction, protocol, sequence, flags, payload = segment
+            self.segments_imported += 1
+            for data in self._reassemble(timestamp, connection, direction, protocol, sequence, flags, payload):
+                for _, frame in self._streams[connection, direction].splitter.feed(data):
+                    decoded = decode_frame(protocol, frame)
+                    self.frames_imported += 1
+                    yield ImportedFrame(timestamp, connection, direction, protocol, frame, decoded.header,
+                                        decoded.message)
+            if flags & (_TCP_FIN | _TCP_RST):
+                # nothing more will come in this direction
+                self._streams.pop((connection, direction), None)
+
+    def _reassemble(self, timestamp: float, connection: tuple[str, int, str, int], direction: Direction,
+                    protocol: ConsoleProtocol, sequence: int, flags: int, payload: bytes) -> list[bytes]:
+        """The data the segment adds to its stream in order, none if it is early, a repeat or lost data is awaited"""
+        key = (connection, direction)
+        stream = self._streams.pop(key, None)
+        if stream is None:
+            stream = _TcpStream(FrameSplitter(protocol, direction))
+        stream.last_seen = timestamp
+        self._streams[key] = stream
+        self._forget_idle(timestamp)
+
+        if flags & _TCP_SYN:
+            # the SYN takes up a sequence number
+            sequence = (sequence + 1) % _SEQUENCE_MODULUS
+            stream.next_sequence = sequence
+            stream.held.clear()
+            stream.held_bytes = 0
+            stream.splitter.reset()
+        if not payload:
+            return []
+        if stream.next_sequence is None:
+            # the capture started part way through the connection
+            stream.next_sequence = sequence
+
+        distance = _sequence_distance(sequence, stream.next_sequence)
+        if distance > 0:
+            if sequence not in stream.held or len(stream.held[sequence]) < len(payload):
+                stream.held_bytes += len(payload) - len(stream.held.get(sequence, b""))
+                stream.held[sequence] = payload
+            if stream.held_bytes <= self._max_held_bytes:
+                return []
+            # what's missing isn't coming, carry on from the earliest segment held
+            _LOGGER.debug(f"Data missing from {connection} {direction.name}, skipping it")
+            self.gaps += 1
+            stream.splitter.reset()
+            next_sequence = stream.next_sequence
+            stream.next_sequence = min(stream.held, key=lambda held: _sequence_distance(held, next_sequence))
+            return self._take_held(stream)
+        stream.held[sequence] = payload
+        stream.held_bytes += len(payload)
+        return self._take_held(stream)
+
+    def _take_held(self, stream: _TcpStream) -> list[bytes]:
+        """The held segments that follow on from the stream's next sequence number, in order"""
+        assert stream.next_sequence is not None
+        data: list[bytes] = []
+        progress = True
+        while progress:
+            progress = False
+            for sequence in list(stream.held):
+                distance = _sequence_distance(sequence, stream.next_sequence)
+                if distance > 0:
+                    continue
+                payload = stream.held.pop(sequence)
+                stream.held_bytes -= len(payload)
+                # drop what was already had, retransmissions can overlap
+                if -distance < len(payload):
+                    data.append(payload[-distance:])
+                    stream.next_sequence = (stream.next_sequence + len(payload) + distance) % _SEQUENCE_MODULUS
+                    progress = True
+        return data
+
+    def _forget_idle(self, now: float) -> None:
+        while self._streams:
+            key, stream = next(iter(self._streams.items()))
+            if now - stream.last_seen <= self._idle_timeout:
+                return
+            del self._streams[key]
+
+    def _tcp_segment(self, link_type: int, packet: memoryview) -> \
+            tuple[tuple[str, int, str, int], Direction, ConsoleProtocol, int, int, bytes] | None:
+        """
+        The connection, direction, protocol, sequence number, flags and payload of a TCP segment to or from a console,
+        None for any other packet
+        """
+        ip = _ip_packet(link_type, packet)
+        if ip is None or len(ip) < 1:
+            return None
+        version = ip[0] >> 4
+        if version == 4 and len(ip) >= 20:
+            header_length = (ip[0] & 0x0F) * 4
+            fragment = int.from_bytes(ip[6:8], "big")
+            # fragments are rare on a LAN and not put back together
+            if ip[9] != _IP_PROTOCOL_TCP or fragment & 0x3FFF:
+                return None
+            source, destination = ip[12:16], ip[16:20]
+            total_length = int.from_bytes(ip[2:4], "big")
+            # leave out any link layer padding, but segmentation offload captures packets before the NIC fills
+            # in their length (0) or splits them (larger than captured), then the captured length is all there is
+            if total_length == 0 or total_length > len(ip):
+                total_length = len(ip)
+            segment = ip[header_length:total_length]
+        elif version == 6 and len(ip) >= 40:
+            if ip[6] != _IP_PROTOCOL_TCP:
+                return None
+            source, destination = ip[8:24], ip[24:40]
+            payload_length = int.from_bytes(ip[4:6], "big")
+            # the same goes for offloaded IPv6 packets
+            segment = ip[40:40 + payload_length] if payload_length else ip[40:]
+        else:
+            return None
+        if len(segment) < 20:
+            return None
+
+        source_port = int.from_bytes(segment[0:2], "big")
+        destination_port = int.from_bytes(segment[2:4], "big")
+        if source_port in self._ports:
+            direction = Direction.RECEIVED
+            protocol = self._ports[source_port]
+            console, console_port, client, client_port = source, source_port, destination, destination_port
+        elif destination_port in self._ports:
+            direction = Direction.SENT
+            protocol = self._ports[destination_port]
+            client, client_port, console, console_port = source, source_port, destination, destination_port
+        else:
+            return None
+        connection = (str(ipaddress.ip_address(bytes(client))), client_port,
+                      str(ipaddress.ip_address(bytes(console))), console_port)
+        sequence = int.from_bytes(segment[4:8], "big")
+        flags = segment[13]
+        payload = bytes(segment[(segment[12] >> 4) * 4:])
+        return connection, direction, protocol, sequence, flags, payload
+
+    def _packets(self) -> Iterator[tuple[float, int, bytes]]:
+        """Timestamp, link type and bytes of every packet in the capture"""
+        start = self._file.read(4)
+        if len(start) < 4:
+            return
+        if struct.unpack("<I", start)[0] == _PCAPNG_SECTION_HEADER:
+            yield from self._pcapng_packets(start)
+        else:
+            yield from self._pcap_packets(start)
+
+    def _pcap_packets(self, start: bytes) -> Iterator[tuple[float, int, bytes]]:
+        for order in "<>":
+            magic = struct.unpack(order + "I", start)[0]
+            if magic in (_PCAP_MAGIC_MICROSECONDS, _PCAP_MAGIC_NANOSECONDS):
+                break
+        else:
+            raise ValueError("Not a pcap or pcapng file")
+        fraction = 1e-9 if magic == _PCAP_MAGIC_NANOSECONDS else 1e-6
+        header = struct.Struct(order + _PCAP_HEADER)
+        rest = self._file.read(header.size - 4)
+        if len(rest) < header.size - 4:
+            return
+        # the top bits of the link type can hold frame check sequence details
+        link_type = header.unpack(start + rest)[-1] & 0x0FFFFFFF
+        record_header = struct.Struct(order + _PCAP_RECORD_HEADER)
+        while True:
+            record = self._file.read(record_header.size)
+            if len(record) < record_header.size:
+                return
+            seconds, fractions, length, _ = record_header.unpack(record)
+            packet = self._file.read(length)
+            if len(packet) < length:
+                # cut short, tcpdump was killed mid-write
+                return
+            yield seconds + fractions * fraction, link_type, packet
+
+    def _pcapng_packets(self, start: bytes) -> Iterator[tuple[float, int, bytes]]:
+        # link type and timestamp units of the current section's interfaces
+        interfaces: list[tuple[int, float]] = []
+        order = "<"
+        block_type = _PCAPNG_SECTION_HEADER
+        while True:
+            if block_type == _PCAPNG_SECTION_HEADER:
+                rest = self._file.read(8)
+                if len(rest) < 8:
+                    return
+                for order in "<>":
+                    if struct.unpack(order + "I", rest[4:])[0] == _PCAPNG_BYTE_ORDER_MAGIC:
+                        break
+                else:
+                    raise ValueError("Invalid pcapng section header")
+                interfaces = []
+                block_length = struct.unpack(order + "I", rest[:4])[0]
+                # the byte order magic has been read already
+                body_start = 4
+            else:
+                rest = self._file.read(4)
+                if len(rest) < 4:
+                    return
+                block_length = struct.unpack(order + "I", rest)[0]
+                body_start = 0
+            body_length = block_length - _PCAPNG_BLOCK_HEADER_LENGTH - _PCAPNG_BLOCK_TRAILER_LENGTH - body_start
+            if body_length < 0:
+                raise ValueError(f"Invalid pcapng block length {block_length}")
+            body = self._file.read(body_length + _PCAPNG_BLOCK_TRAILER_LENGTH)
+            if len(body) < body_length + _PCAPNG_BLOCK_TRAILER_LENGTH:
+                return
+
+            if block_type == _PCAPNG_INTERFACE_DESCRIPTION:
+                link_type = struct.unpack_from(order + "H", body)[0]
+                interfaces.append((link_type, _timestamp_unit(body[8:body_length], order)))
+            elif block_type == _PCAPNG_ENHANCED_PACKET:
+                interface, high, low, length = struct.unpack_from(order + "IIII", body)
+                link_type, unit = interfaces[interface]
+                yield ((high << 32) | low) * unit, link_type, body[20:20 + length]
+            # other blocks, e.g. statistics or simple packets (which have no timestamps) are skipped
+
+            start = self._file.read(4)
+            if len(start) < 4:
+                return
+            block_type = struct.unpack(order + "I", start)[0]
+
+
+def _timestamp_unit(options: bytes, order: str) -> float:
+    """Seconds per timestamp tick of a pcapng interface, from its options"""
+    position = 0
+    while position + 4 <= len(options):
+        code, length = struct.unpack_from(order + "HH", options, position)
+        if code == _PCAPNG_OPTION_END:
+            break
+        if code == _PCAPNG_OPTION_TIMESTAMP_RESOLUTION and length >= 1:
+            resolution = options[position + 4]
+            # a power of 2 if the top bit is set, otherwise a power of 10
+            return 2.0 ** -(resolution & 0x7F) if resolution & 0x80 else 10.0 ** -resolution
+        # values are padded to 4 bytes
+        position += 4 + (length + 3) // 4 * 4
+    return 1e-6
+
+
+def _ip_packet(link_type: int, packet: memoryview) -> memoryview | None:
+    """The IP packet inside a link layer frame, None if it isn't one"""
+    if link_type in _LINK_LAYERS:
+        ether_type_offset, offset = _LINK_LAYERS[LinkType(link_type)]
+        ether_type = int.from_bytes(packet[ether_type_offset:ether_type_offset + 2], "big")
+        if link_type == LinkType.ETHERNET:
+            while ether_type in _ETHER_TYPES_VLAN:
+                ether_type = int.from_bytes(packet[offset + 2:offset + 4], "big")
+                offset += 4
+        if ether_type not in (_ETHER_TYPE_IPV4, _ETHER_TYPE_IPV6):
+            return None
+        return packet[offset:]
+    if link_type == LinkType.NULL:
+        # the address family is in the capturing machine's byte order, the IP version tells as well
+        return packet[4:]
+    if link_type in (LinkType.RAW, LinkType.IPV4, LinkType.IPV6):
+        return packet
+    return None
@@ -0,0 +1,141 @@
+from __future__ import annotations
+import asyncio
+import errno
+from typing import Any, Iterable
+
+from airtouch2.capture.capture_format import Direction, Record, open_capture, read_records
+
+
+class _ReplayTransport(asyncio.Transport):
+    """Swallows whatever the client writes, pausing reading holds back the replay"""
+
+    def __init__(self, replay: Replay, protocol: asyncio.Protocol):
+        super().__init__()
+        self._replay = replay
+        self._protocol = protocol
+        self._closing = False
+        self.reading = asyncio.Event()
+        self.reading.set()
+
+    def write(self, data: bytes | bytearray | memoryview) -> None:
+        if not self._closing:
+            self._replay.bytes_sent += len(data)
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        # let a paused replay notice
+        self.reading.set()
+        self._protocol.connection_lost(None)
+
+    def abort(self) -> None:
+        self.close()
+
+    def pause_reading(self) -> None:
+        self.reading.clear()
+
+    def resume_reading(self) -> None:
+        self.reading.set()
+
+    def is_reading(self) -> bool:
+        return self.reading.is_set()
+
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+    def can_write_eof(self) -> bool:
+        return False
+
+    def get_extra_info(self, name: str, default: Any = None) -> Any:
+        return default
+
+
+class Replay:
+    """
+    Plays back what was received in a capture to a client, as if it came from the console.
+
+    Pass 'open_connection' as the client's connection factory. The received records are fed to the client with
+    their recorded timing divided by 'speed' (1 is real time), or as fast as the client reads them if 'speed' is
+    None. What the client sends is discarded. Where the recorded connection ended, the replayed one is closed
+    and the client's reconnection carries on with what was received on the next, so the client starts decoding
+    afresh. A capture can be replayed once: the connection stays open when it is done and reconnecting is refused.
+    Clients should have heartbeats disabled, the replay doesn't answer them.
+    """
+
+    def __init__(self, records: Iterable[Record], speed: float | None = 1):
+        self._records = [record for record in records if record.direction != Direction.SENT]
+        # index of the next record to feed
+        self._next = 0
+        self._speed = speed
+        self._feeder: asyncio.Task[None] | None = None
+        self._start: float | None = None
+        self.finished = asyncio.Event()
+        # statistics
+        self.records_replayed: int = 0
+        self.bytes_replayed: int = 0
+        self.bytes_sent: int = 0
+        # seconds from the first record being fed to the last
+        self.duration: float | None = None
+
+    @staticmethod
+    def from_file(path: str, speed: float | None = 1) -> Replay:
+        with open_capture(path) as f:
+            return Replay(read_records(f), speed)
+
+    async def open_connection(self, host: str, port: int) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """A connection factory for NetClient and the clients, 'host' and 'port' are ignored"""
+        if self._feeder is not None and (not self._feeder.done() or self.finished.is_set()):
+            raise ConnectionRefusedError(errno.ECONNREFUSED, "The capture has already been replayed")
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        protocol = asyncio.StreamReaderProtocol(reader)
+        transport = _ReplayTransport(self, protocol)
+        protocol.connection_made(transport)
+        writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+        self._feeder = asyncio.create_task(self._feed(reader, transport))
+        return reader, writer
+
+    async def stop(self) -> None:
+        if self._feeder is not None:
+            self._feeder.cancel()
+            await asyncio.gather(self._feeder, return_exceptions=True)
+
+    async def _feed(self, reader: asyncio.StreamReader, transport: _ReplayTransport) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        if self._start is None:
+            self._start = start
+        # the timing is relative to the first record of each connection
+        first: float | None = None
+        while self._next < len(self._records):
+            record = self._records[self._next]
+            if record.direction != Direction.RECEIVED:
+                self._next += 1
+                if first is not None and self._received_later():
+                    # the recorded connection ended, the client reconnects for the rest
+                    reader.feed_eof()
+                    return
+                continue
+            if first is None:
+                first = record.timestamp
+            if self._speed:
+                await asyncio.sleep(start + (record.timestamp - first) / self._speed - loop.time())
+            else:
+                # let the client handle what it was given
+                await asyncio.sleep(0)
+            await transport.reading.wait()
+            if transport.is_closing():
+                break
+            reader.feed_data(record.data)
+            self._next += 1
+            self.records_replayed += 1
+            self.bytes_replayed += len(record.data)
+        self.duration = loop.time() - self._start
+        self.finished.set()
+
+    def _received_later(self) -> bool:
+        return any(record.direction == Direction.RECEIVED for record in self._records[self._next:])
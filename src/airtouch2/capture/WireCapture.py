@@ -0,0 +1,104 @@
+from __future__ import annotations
+import gzip
+import logging
+import os
+import queue
+import threading
+import time
+from typing import BinaryIO
+
+from airtouch2.capture.capture_format import MAGIC, Direction, encode_record
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WireCapture:
+    """
+    Records everything sent to and received from a console in the capture file 'path', optionally gzip compressed.
+
+    Records are timestamped, tagged with their direction and length prefixed (see capture_format).
+    They are written by a background thread so recording never blocks the event loop: at most 'max_queued' records
+    wait to be written and any more are dropped (counted in 'records_dropped').
+    Once the file holds more than 'max_bytes' (uncompressed) it is renamed to 'path'.1 and a new one started,
+    keeping 'backups' old files. An existing file at 'path' is rotated out the same way when the capture starts.
+    """
+
+    def __init__(self, path: str, compress: bool = False, max_bytes: int | None = None, backups: int = 1,
+                 max_queued: int = 1024):
+        self.path = path
+        self._compress = compress
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._queue: queue.Queue[bytes | None] = queue.Queue(max_queued)
+        self._closed = False
+        # statistics
+        self.records_written: int = 0
+        self.records_dropped: int = 0
+        self.files_rotated: int = 0
+
+        self._thread = threading.Thread(target=self._write_records, name=f"WireCapture {path}", daemon=True)
+        self._thread.start()
+
+    def record(self, direction: Direction, data: bytes) -> None:
+        """Queue 'data' to be recorded, never blocks"""
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait(encode_record(time.time(), direction, data))
+        except queue.Full:
+            self.records_dropped += 1
+
+    def close(self) -> None:
+        """Write the records still queued and close the file, blocks until done"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _open(self) -> BinaryIO:
+        file: BinaryIO = gzip.open(self.path, "wb") if self._compress else open(self.path, "wb")
+        file.write(MAGIC)
+        return file
+
+    def _rotate(self) -> None:
+        if self._backups > 0:
+            for i in range(self._backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self.files_rotated += 1
+
+    def _write_records(self) -> None:
+        file: BinaryIO | None = None
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                self._rotate()
+            file = self._open()
+            size = len(MAGIC)
+            while True:
+                # write whatever has piled up, then flush once
+                records = [self._queue.get()]
+                while not self._queue.empty():
+                    records.append(self._queue.get_nowait())
+                for record in records:
+                    if record is None:
+                        return
+                    if self._max_bytes is not None and size > len(MAGIC) and size + len(record) > self._max_bytes:
+                        file.close()
+                        self._rotate()
+                        file = self._open()
+                        size = len(MAGIC)
+                    file.write(record)
+                    size += len(record)
+                    self.records_written += 1
+                file.flush()
+        except OSError as e:
+            _LOGGER.error(f"Wire capture to {self.path} failed, no more records are written: {e!r}")
+            self._closed = True
+            while not self._queue.empty():
+                if self._queue.get_nowait() is not None:
+                    self.records_dropped += 1
+        finally:
+            if file is not None:
+                file.close()
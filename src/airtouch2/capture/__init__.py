@@ -0,0 +1,6 @@
+from airtouch2.capture.capture_format import Direction, Record, open_capture, read_records
+from airtouch2.capture.WireCapture import WireCapture
+from airtouch2.capture.Replay import Replay
+from airtouch2.capture.frame_splitter import ConsoleProtocol, DecodedFrame
+from airtouch2.capture.CaptureReader import CaptureReader, IndexEntry
+from airtouch2.capture.PcapImporter import ImportedFrame, PcapImporter
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import gzip
+import struct
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import BinaryIO, Iterator
+
+# every capture file starts with this, the last byte is the format version
+MAGIC = b"AT2WCAP\x01"
+# timestamp (seconds since the epoch), direction and length of the data that follows
+# connection boundaries are records of their own without data
+RECORD_HEADER = struct.Struct("<dBI")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class Direction(IntEnum):
+    RECEIVED = 0
+    SENT = 1
+    # a connection was opened or closed, no partial frame carries over from before
+    CONNECTED = 2
+    DISCONNECTED = 3
+
+
+# what was actually sent or received, not a connection boundary
+DATA_DIRECTIONS = (Direction.RECEIVED, Direction.SENT)
+
+
+@dataclass
+class Record:
+    timestamp: float
+    direction: Direction
+    data: bytes
+
+
+def encode_record(timestamp: float, direction: Direction, data: bytes) -> bytes:
+    return RECORD_HEADER.pack(timestamp, direction, len(data)) + data
+
+
+def open_capture(path: str) -> BinaryIO:
+    """Open a capture file for reading, gzip compressed or not"""
+    file = open(path, "rb")
+    if file.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC:
+        file.close()
+        return gzip.open(path, "rb")
+    file.seek(0)
+    return file
+
+
+def read_records(file: BinaryIO) -> Iterator[Record]:
+    """
+    The records of a capture file, in order.
+    A record cut short at the end (the writer was killed mid-write) is left out.
+    """
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a wire capture file (or an unsupported version)")
+    while True:
+        header = file.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return
+        timestamp, direction, length = RECORD_HEADER.unpack(header)
+        data = file.read(length)
+        if len(data) < length:
+            return
+        yield Record(timestamp, Direction(direction), data)
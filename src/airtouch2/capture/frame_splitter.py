@@ -0,0 +1,159 @@
+from __future__ import annotations
+import struct
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable
+
+from airtouch2.capture.capture_format import Direction
+from airtouch2.protocol.at2.command_decoder import CommandDecoder
+from airtouch2.protocol.at2.constants import ResponseMessageConstants
+from airtouch2.protocol.at2.messages.SystemInfo import SystemInfo
+from airtouch2.protocol.at2.response_decoder import ResponseDecoder
+from airtouch2.protocol.at2plus.control_status_common import CONTROL_STATUS_SUBHEADER_LENGTH, ControlStatusSubType
+from airtouch2.protocol.at2plus.extended_common import EXTENDED_SUBHEADER_LENGTH, ExtendedMessageSubType
+from airtouch2.protocol.at2plus.frame_decoder import FrameDecoder
+from airtouch2.protocol.at2plus.message_common import (HEADER_LENGTH, HEADER_MAGIC, NON_DATA_LENGTH,
+                                                       CommonMessageOffsets, Header, MessageType)
+from airtouch2.protocol.at2plus.messages.AcAbilityMessage import AcAbilityMessage
+from airtouch2.protocol.at2plus.messages.AcControl import AcControlMessage
+from airtouch2.protocol.at2plus.messages.AcStatus import AcStatusMessage
+from airtouch2.protocol.at2plus.messages.GroupControl import GroupControlMessage
+from airtouch2.protocol.at2plus.messages.GroupNames import GroupNamesMessage
+from airtouch2.protocol.at2plus.messages.GroupStatus import GroupStatusMessage
+
+_AT2PLUS_MAGIC = bytes([HEADER_MAGIC, HEADER_MAGIC])
+_AT2_RESPONSE_HEADER = bytes([ResponseMessageConstants.HEADER_BYTE_0, ResponseMessageConstants.HEADER_BYTE_1])
+
+
+class ConsoleProtocol(IntEnum):
+    AT2 = 2
+    AT2PLUS = 3
+
+
+# the usual port of each console
+PORTS = {
+    ConsoleProtocol.AT2: 8899,
+    ConsoleProtocol.AT2PLUS: 9200,
+}
+
+
+def detect_protocol(received: bytes) -> ConsoleProtocol | None:
+    """The protocol of a console, from some of the data received from it, None if it can't be told"""
+    if _AT2PLUS_MAGIC in received:
+        return ConsoleProtocol.AT2PLUS
+    if _AT2_RESPONSE_HEADER in received:
+        return ConsoleProtocol.AT2
+    return None
+
+
+def frame_type(protocol: ConsoleProtocol, frame: bytes | memoryview) -> tuple[int, int]:
+    """
+    The message type and sub type of a frame:
+    for AT2+ the header's MessageType and the ControlStatusSubType or ExtendedMessageSubType,
+    for AT2 the CommandMessageType and command of a command, (0, 0) for a response.
+    """
+    if protocol == ConsoleProtocol.AT2PLUS:
+        message_type = frame[CommonMessageOffsets.MESSAGE_TYPE]
+        data_length = len(frame) - NON_DATA_LENGTH
+        if message_type == MessageType.CONTROL_STATUS and data_length >= CONTROL_STATUS_SUBHEADER_LENGTH:
+            return message_type, frame[HEADER_LENGTH]
+        if message_type == MessageType.EXTENDED and data_length >= EXTENDED_SUBHEADER_LENGTH:
+            # after the subheader magic
+            return message_type, frame[HEADER_LENGTH + 1]
+        return message_type, 0
+    if frame[:2] == _AT2_RESPONSE_HEADER:
+        return 0, 0
+    return frame[1], frame[4]
+
+
+class FrameSplitter:
+    """
+    Splits one direction of a console connection into frames with the protocol's decoder,
+    keeping track of where in the stream each frame starts.
+    """
+
+    def __init__(self, protocol: ConsoleProtocol, direction: Direction):
+        self._decoder: FrameDecoder | ResponseDecoder | CommandDecoder
+        self._decode: Callable[[bytes], list[bytes]]
+        if protocol == ConsoleProtocol.AT2PLUS:
+            self._decoder = FrameDecoder()
+            self._decode = self._decoder.feed_frames
+        elif direction == Direction.RECEIVED:
+            self._decoder = ResponseDecoder()
+            self._decode = self._decoder.feed
+        else:
+            self._decoder = CommandDecoder()
+            self._decode = self._decoder.feed
+        # a copy of what the decoder holds back, to find the frames in
+        self._pending = bytearray()
+        # stream position of the first pending byte
+        self._pending_start = 0
+
+    def feed(self, data: bytes | memoryview) -> list[tuple[int, bytes]]:
+        """Consume 'data' and return every frame it completes, with the stream position of its first byte"""
+        pending = self._pending
+        pending += data
+        frames: list[tuple[int, bytes]] = []
+        cursor = 0
+        for frame in self._decode(bytes(data)):
+            found = pending.find(frame, cursor)
+            frames.append((self._pending_start + found, frame))
+            cursor = found + len(frame)
+        consumed = len(pending) - self._decoder.buffered()
+        del pending[:consumed]
+        self._pending_start += consumed
+        return frames
+
+    def buffered(self) -> int:
+        """Number of bytes held back waiting for the rest of a frame"""
+        return len(self._pending)
+
+    def reset(self) -> None:
+        """Drop a partial frame, e.g. when the stream has a gap"""
+        self._pending_start += len(self._pending)
+        self._pending.clear()
+        self._decoder.reset()
+
+
+_CONTROL_STATUS_MESSAGES: dict[int, Callable[[bytes], object]] = {
+    ControlStatusSubType.AC_STATUS: AcStatusMessage.from_bytes,
+    ControlStatusSubType.GROUP_STATUS: GroupStatusMessage.from_bytes,
+    ControlStatusSubType.AC_CONTROL: AcControlMessage.from_bytes,
+    ControlStatusSubType.GROUP_CONTROL: GroupControlMessage.from_bytes,
+}
+_EXTENDED_MESSAGES: dict[int, Callable[[bytes], object]] = {
+    ExtendedMessageSubType.ABILITY: AcAbilityMessage.from_bytes,
+    ExtendedMessageSubType.GROUP_NAME: GroupNamesMessage.from_bytes,
+}
+
+
+@dataclass
+class DecodedFrame:
+    # None for AT2, which has no headers
+    header: Header | None
+    # the message class instance or AT2 SystemInfo, None if it isn't one that can be decoded
+    message: object | None
+
+
+def decode_frame(protocol: ConsoleProtocol, frame: bytes | memoryview) -> DecodedFrame:
+    """Decode a complete frame with the protocol's message classes, 'frame' isn't copied"""
+    if protocol == ConsoleProtocol.AT2:
+        if frame[:2] == _AT2_RESPONSE_HEADER:
+            return DecodedFrame(None, SystemInfo.from_bytes(frame))
+        return DecodedFrame(None, None)
+    header = Header.from_bytes(frame[:HEADER_LENGTH])
+    message_type, sub_type = frame_type(protocol, frame)
+    decode: Callable[[bytes], object] | None = None
+    if message_type == MessageType.CONTROL_STATUS:
+        decode = _CONTROL_STATUS_MESSAGES.get(sub_type)
+        subdata = frame[HEADER_LENGTH + CONTROL_STATUS_SUBHEADER_LENGTH:-2]
+    elif message_type == MessageType.EXTENDED:
+        decode = _EXTENDED_MESSAGES.get(sub_type)
+        subdata = frame[HEADER_LENGTH + EXTENDED_SUBHEADER_LENGTH:-2]
+    if decode is None:
+        return DecodedFrame(header, None)
+    try:
+        return DecodedFrame(header, decode(subdata))
+    except (ValueError, IndexError, struct.error):
+        # requests, e.g. for the ability of a single AC, have subdata that isn't a message
+        return DecodedFrame(header, None)
@@ -7,8 +7,11 @@ class Buffer(Serializable):
     Layer of asbtraction on top of bytearray.
     Has a fixed size and enforces it's filled before it's serialized.
     Prohibits reading more than its size and before it's filled.
+    Reads return bytes, the read_view methods return read-only memoryview slices of the filled data instead
+    of copies for hot paths that only parse what they read before the buffer goes away.
     """
-    _data: bytearray
+    _data: bytearray | bytes
+    _view: memoryview | None = None
     _head: int = 0
     _tail: int = 0
     _mutable: bool = True
@@ -26,13 +29,13 @@ class Buffer(Serializable):
         """
         if not self._mutable:
             raise BufferError("Buffer has been filled and is immutable")
-        if (len(data) > len(self._data) - self._head):
+        end = self._head + len(data)
+        if end > len(self._data):
             raise BufferError(
                 "Buffer does not have enough room to append this data")
-        for byte in data:
-            self._data[self._head] = byte
-            self._head += 1
-        if self._head == len(self._data):
+        self._data[self._head:end] = data
+        self._head = end
+        if end == len(self._data):
             self._mutable = False
             return True
         return False
@@ -51,21 +54,33 @@ class Buffer(Serializable):
         return self._data
 
     def read_bytes(self, size: int) -> bytes:
+        return bytes(self.read_view(size))
+
+    def read_remaining(self) -> bytes:
+        return self.read_bytes(self._head - self._tail)
+
+    def read_view(self, size: int) -> memoryview:
+        """Like read_bytes but without copying, the view can't be hashed or compared with str"""
         if (self._tail >= len(self._data)):
             raise BufferError("All data from this buffer has been read")
         if (self._tail >= self._head):
             raise BufferError("There is no remaining data to read")
         if (self._mutable):
             raise BufferError("Cannot read from incomplete buffer")
+        if self._view is None:
+            self._view = memoryview(self._data).toreadonly()
         start = self._tail
         self._tail += size
-        return self._data[start:self._tail]
+        return self._view[start:self._tail]
 
-    def read_remaining(self) -> bytes:
-        return self.read_bytes(self._head - self._tail)
+    def read_remaining_view(self) -> memoryview:
+        return self.read_view(self._head - self._tail)
 
     @staticmethod
     def from_bytes(data: bytes) -> Buffer:
-        buffer = Buffer(len(data))
-        buffer.append_bytes(data)
+        """Create a filled buffer of 'data', taking it as is when it is already immutable"""
+        buffer = Buffer.__new__(Buffer)
+        buffer._data = bytes(data)
+        buffer._head = len(buffer._data)
+        buffer._mutable = False
         return buffer
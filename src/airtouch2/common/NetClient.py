@@ -1,26 +1,74 @@
 import asyncio
 import errno
 import logging
+import time
+from collections import deque
+from dataclasses import dataclass
 from socket import gaierror
-from typing import Callable
-from airtouch2.common.interfaces import CoroCallback, Serializable, TaskCreator
+from typing import Any, Callable
+from airtouch2.capture.capture_format import Direction
+from airtouch2.capture.WireCapture import WireCapture
+from airtouch2.common.ReconnectPolicy import ReconnectPolicy
+from airtouch2.common.interfaces import Callback, ConnectionFactory, CoroCallback, Serializable, TaskCreator, \
+    add_callback
 
 _LOGGER = logging.getLogger(__name__)
 
 NetworkOrHostDownErrors = (errno.EHOSTUNREACH, errno.ECONNREFUSED,  errno.ETIMEDOUT,
                            errno.ENETDOWN, errno.ENETUNREACH, errno.ENETRESET, errno.ECONNABORTED)
 
+# heartbeats whose responses are still awaited for the round-trip time, older ones are forgotten
+MAX_TIMED_HEARTBEATS = 16
+
+
+@dataclass
+class _Outbound:
+    data: bytes
+    future: asyncio.Future[None]
+    # completes once the server acknowledged the message, None if it can't tell, then writing it is enough
+    acknowledgement: asyncio.Future[Any] | None = None
+    # whether the message may be written again after a reconnect, i.e. receiving it twice does no harm
+    resend: bool = False
+    heartbeat: bool = False
+    # event loop time after which the message is not worth sending anymore
+    deadline: float | None = None
+    deadline_handle: asyncio.TimerHandle | None = None
+
 
 class NetClient:
     """A generic network client"""
 
     def __init__(self, host: str, port: int, on_connect: CoroCallback, handle_message: CoroCallback,
-                 task_creator: TaskCreator = asyncio.create_task):
+                 task_creator: TaskCreator = asyncio.create_task, connect_timeout: float = 10,
+                 heartbeat: Callable[[], Serializable] | None = None, heartbeat_interval: float = 30,
+                 max_missed_heartbeats: int = 3, reconnect_policy: ReconnectPolicy | None = None,
+                 max_queued: int = 32, send_timeout: float | None = 10, resend_unacknowledged: bool = True,
+                 capture: WireCapture | None = None, connection_factory: ConnectionFactory = asyncio.open_connection):
+        """
+        'heartbeat' creates a cheap request the server always responds to. It is sent when nothing was received
+        for 'heartbeat_interval' seconds and the connection is considered dead after 'max_missed_heartbeats'
+        of them in a row went unanswered. Anything received shows the connection is alive, the server only sends
+        unprompted on changes. The round-trip time 'rtt' is only measured if the protocol client recognises the
+        heartbeat responses and calls heartbeat_answered() for each, otherwise it stays None.
+        'reconnect_policy' paces reconnection attempts after the connection is lost and records the outages.
+        If it gives up, the client stops: pending messages fail with ConnectionError, 'gave_up' is set and
+        the give-up callbacks are called.
+
+        Messages are written by a single writer task from a queue of at most 'max_queued' messages, each failing
+        with TimeoutError if not written within 'send_timeout' seconds (None waits indefinitely).
+        A message submitted with an acknowledgement is done once that completes, otherwise once it is written.
+        Messages still unacknowledged when the connection is lost are written again after the reconnect if they
+        were submitted with 'resend' and 'resend_unacknowledged' is set, otherwise they fail with ConnectionError.
+
+        Everything written and read is recorded to 'capture' if given, along with where connections begin and end.
+        'connection_factory' opens the connection, e.g. to replay a capture instead of connecting to a server.
+        """
         # network
         self._host_ip: str = host
         self._host_port: int = port
         self._reader: asyncio.StreamReader | None = None
         self._writer: asyncio.StreamWriter | None = None
+        self._connection_factory = connection_factory
 
         # async
         self._task_creator: Callable = task_creator
@@ -30,13 +78,59 @@ class NetClient:
         self._on_connect = on_connect
         self._handle_message = handle_message
 
+        # liveness
+        self._connect_timeout = connect_timeout
+        self._heartbeat = heartbeat
+        self._heartbeat_interval = heartbeat_interval
+        self._max_missed_heartbeats = max_missed_heartbeats
+        self._heartbeat_task: asyncio.Task[None] | None = None
+        self._last_received: float = time.monotonic()
+        # whether a heartbeat was sent and nothing was received since
+        self._awaiting_heartbeat: bool = False
+        # when the heartbeats awaiting their responses were written, the server answers them in order
+        self._heartbeats_written: deque[float] = deque(maxlen=MAX_TIMED_HEARTBEATS)
+        self.missed_heartbeats: int = 0
+        # round-trip time of the last heartbeat response recognised by heartbeat_answered() in seconds
+        self.rtt: float | None = None
+
+        # reconnection
+        self.reconnect_policy: ReconnectPolicy = reconnect_policy if reconnect_policy is not None else ReconnectPolicy()
+        self._connect_error: BaseException | None = None
+        self._give_up_callbacks: list[Callback] = []
+        # whether the reconnect policy gave up, until the next successful connect()
+        self.gave_up: bool = False
+
+        # sending
+        self._max_queued = max_queued
+        self._send_timeout = send_timeout
+        self._resend_unacknowledged = resend_unacknowledged
+        self._queue: deque[_Outbound] = deque()
+        self._unacknowledged: list[_Outbound] = []
+        self._queued = asyncio.Event()
+        self._connected = asyncio.Event()
+        self._writer_task: asyncio.Task[None] | None = None
+        # statistics
+        self.messages_resent: int = 0
+        self.messages_dropped: int = 0
+        self.messages_expired: int = 0
+
+        self._capture = capture
+        # the connection boundary last recorded, a lost connection can be noticed more than once
+        self._last_boundary: Direction | None = None
+
     async def connect(self) -> bool:
         """Opens connection to the server, returns True/False if successful/unsuccessful"""
         _LOGGER.debug(f"Connecting to {self._host_ip} on port {self._host_port}")
         try:
-            self._reader, self._writer = await asyncio.open_connection(self._host_ip, self._host_port)
+            self._reader, self._writer = await asyncio.wait_for(
+                self._connection_factory(self._host_ip, self._host_port), self._connect_timeout)
+        except asyncio.TimeoutError as e:
+            _LOGGER.warning(f"Connecting to host {self._host_ip} timed out after {self._connect_timeout}s")
+            self._connect_error = e
+            return False
         except OSError as e:
             _LOGGER.warning(f"Could not connect to host {self._host_ip}")
+            self._connect_error = e
             if isinstance(e, gaierror):
                 # provided ip or port is rubbish/invalid
                 pass
@@ -44,42 +138,136 @@ class NetClient:
                 raise e
             return False
         else:
+            self._last_received = time.monotonic()
+            self._awaiting_heartbeat = False
+            self._heartbeats_written.clear()
+            self.missed_heartbeats = 0
+            self._stop = False
+            self.gave_up = False
+            self._record_boundary(Direction.CONNECTED)
+            self._requeue_unacknowledged()
+            self._connected.set()
             await self._on_connect()
             return True
 
+    async def reconnect(self, error: BaseException | None = None) -> bool:
+        """
+        Connect with the pacing of the reconnect policy until it succeeds, return False if the policy gives up.
+        'error' is what ended the previous connection, if known.
+        """
+        policy = self.reconnect_policy
+        policy.connection_lost(error)
+        while True:
+            policy.attempt_starting()
+            self._connect_error = None
+            if await self.connect():
+                break
+            delay = policy.attempt_failed(self._connect_error)
+            if delay is None:
+                return False
+            if policy.attempts == 4 or not policy.attempts % 60:
+                _LOGGER.info(f"Server is not responding, will continue trying to reconnect "
+                             f"(next attempt in {delay:.1f}s)")
+            await asyncio.sleep(delay)
+        policy.connected()
+        _LOGGER.info(f"Reconnected after {policy.last_outage_duration:.1f}s and {policy.attempts} failed attempts")
+        return True
+
     def run(self) -> None:
         """Starts the processing of incoming information from the server"""
         _LOGGER.debug("Starting listener task")
         self._main_loop_task = self._task_creator(self._main())
+        if self._heartbeat is not None and self._heartbeat_interval > 0:
+            self._heartbeat_task = self._task_creator(self._keep_alive())
 
     async def stop(self) -> None:
-        """Stops the processing of incoming information from the server"""
-        if not self._main_loop_task:
+        """Stops the processing of incoming information from the server and closes the connection"""
+        if not self._main_loop_task and self._writer is None:
             raise RuntimeError("Client task is not running")
         self._stop = True
-        self._main_loop_task.cancel()
-        try:
-            await self._main_loop_task
-        except asyncio.CancelledError as e:
-            # Eat the expected exception
-            pass
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+        if self._writer_task:
+            self._writer_task.cancel()
+        self._fail_pending(asyncio.CancelledError())
+        if self._main_loop_task:
+            self._main_loop_task.cancel()
+            try:
+                await self._main_loop_task
+            except asyncio.CancelledError as e:
+                # Eat the expected exception
+                pass
+        # connected but never run, e.g. when stopped while connecting
+        self._connected.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._record_boundary(Direction.DISCONNECTED)
+
+    async def send(self, message: Serializable, timeout: float | None = None,
+                   acknowledgement: asyncio.Future[Any] | None = None, resend: bool = False) -> None:
+        """Send the serializable 'message', returns once it is acknowledged (see submit)"""
+        await self.submit(message, timeout, acknowledgement, resend)
 
-    async def send(self, message: Serializable) -> None:
-        """Send the serializable 'message'"""
+    def submit(self, message: Serializable, timeout: float | None = None,
+               acknowledgement: asyncio.Future[Any] | None = None, resend: bool = False) -> asyncio.Future[None]:
+        """
+        Queue the serializable 'message' for sending, return a future resolving once it is acknowledged.
+        That is when 'acknowledgement' completes, failing with its exception if it fails, or once the message is
+        written if there is no way to tell it was received.
+        The future fails with TimeoutError if the message isn't written within 'timeout' (the send timeout if None)
+        or with ConnectionError if the connection is lost before the acknowledgement and the message can't be
+        resent. Only pass 'resend' for messages that do no harm when received twice.
+        Raises asyncio.QueueFull if 'max_queued' messages are already waiting.
+        """
         if self._writer is None:
             raise RuntimeError("Client is not connected - call connect() first")
-        else:
-            bytes_to_write = message.to_bytes()
-            _LOGGER.debug(f"Sending {message.__class__.__name__} with data: {bytes_to_write.hex(':')}")
-            _LOGGER.debug(f"{repr(message)}")
-            self._writer.write(bytes_to_write)
-            drained: bool = False
-            while not drained:
-                try:
-                    await self._writer.drain()
-                    drained = True
-                except (ConnectionResetError, asyncio.IncompleteReadError, TimeoutError) as e:
-                    await self._try_reconnect()
+        if self.gave_up:
+            raise ConnectionError(f"Gave up reconnecting to {self._host_ip}")
+        if len(self._queue) >= self._max_queued:
+            raise asyncio.QueueFull(f"{len(self._queue)} messages are already waiting to be sent to {self._host_ip}")
+        data = message.to_bytes()
+        _LOGGER.debug(f"Sending {message.__class__.__name__} with data: {data.hex(':')}")
+        _LOGGER.debug(f"{repr(message)}")
+        outbound = self._enqueue(data, timeout, acknowledgement, resend)
+        return outbound.future
+
+    def _enqueue(self, data: bytes, timeout: float | None = None, acknowledgement: asyncio.Future[Any] | None = None,
+                 resend: bool = False, heartbeat: bool = False) -> _Outbound:
+        loop = asyncio.get_running_loop()
+        outbound = _Outbound(data, loop.create_future(), acknowledgement, resend, heartbeat)
+        if acknowledgement is not None:
+            acknowledgement.add_done_callback(lambda _: self._acknowledged(outbound))
+        timeout = self._send_timeout if timeout is None else timeout
+        if timeout is not None:
+            outbound.deadline = loop.time() + timeout
+            outbound.deadline_handle = loop.call_later(timeout, self._expire, outbound)
+        self._queue.append(outbound)
+        self._queued.set()
+        # started lazily as messages are already sent while connecting, before run()
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = self._task_creator(self._write_queued())
+        return outbound
+
+    def heartbeat_answered(self) -> None:
+        """Called by the protocol client for each heartbeat response, which the server sends in order"""
+        if self._heartbeats_written:
+            self.rtt = time.monotonic() - self._heartbeats_written.popleft()
+
+    def add_give_up_callback(self, callback: Callback) -> Callback:
+        """Subscribe to the reconnect policy giving up, return a callback to unsubscribe"""
+        return add_callback(callback, self._give_up_callbacks)
+
+    def queued(self) -> int:
+        return len(self._queue)
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    @property
+    def last_received(self) -> float:
+        """time.monotonic() of when anything was last received"""
+        return self._last_received
 
     async def read_bytes(self, size: int) -> bytes | None:
         """
@@ -88,33 +276,240 @@ class NetClient:
         """
         if self._reader is None:
             raise RuntimeError("Client is not connected - call connect() first")
+        error: BaseException | None = None
         try:
             data = await self._reader.readexactly(size)
         except asyncio.IncompleteReadError as e:
             _LOGGER.debug(f"IncompleteReadError - partial bytes: {e.partial.hex(':')}")
             data = None
+            error = e
         except (ConnectionResetError, TimeoutError) as e:
             _LOGGER.debug(f"ConnectionResetError")
             data = None
+            error = e
 
         if data is None:
             _LOGGER.warning("Connection lost, reconnecting")
-            await self._try_reconnect()
+            self._connected.clear()
+            self._record_boundary(Direction.DISCONNECTED)
+            await self._try_reconnect(error)
             return None
+        self._received(data)
         _LOGGER.debug(f"Read payload of size {size}: {data.hex(':')}")
         return data
 
+    async def read_chunk(self, max_size: int = 4096) -> bytes | None:
+        """
+        Read whatever is available (at most 'max_size' bytes), return None on disconnection and reconnection.
+        This coroutine handles reconnection.
+        """
+        if self._reader is None:
+            raise RuntimeError("Client is not connected - call connect() first")
+        error: BaseException | None = None
+        try:
+            data = await self._reader.read(max_size)
+        except (ConnectionResetError, TimeoutError) as e:
+            _LOGGER.debug(f"ConnectionResetError")
+            data = b''
+            error = e
+
+        if not data:
+            _LOGGER.warning("Connection lost, reconnecting")
+            self._connected.clear()
+            self._record_boundary(Direction.DISCONNECTED)
+            await self._try_reconnect(error)
+            return None
+        self._received(data)
+        return data
+
     async def _main(self) -> None:
         while not self._stop:
             if not (self._reader and self._writer):
                 raise RuntimeError("Client is not connected - call connect() first")
             await self._handle_message()
 
-    async def _try_reconnect(self) -> None:
-        retries = 0
-        while not await self.connect():
-            await asyncio.sleep(0.001 * (10**retries) if retries < 4 else 10)
-            retries += 1
-            if not retries % 60 or retries == 4:
-                _LOGGER.info("Server is not responding, will continue trying to reconnect every 10s")
-        _LOGGER.info("Reconnected")
\ No newline at end of file
+    def _received(self, data: bytes) -> None:
+        if self._capture is not None:
+            self._capture.record(Direction.RECEIVED, data)
+        self._last_received = time.monotonic()
+        # anything received shows the connection is alive, but only the response tells the round-trip time
+        self._awaiting_heartbeat = False
+        self.missed_heartbeats = 0
+
+    async def _keep_alive(self) -> None:
+        """Send heartbeats on an idle connection and abort the connection if they go unanswered"""
+        assert self._heartbeat is not None
+        while not self._stop:
+            if not self._awaiting_heartbeat:
+                idle = time.monotonic() - self._last_received
+                if idle < self._heartbeat_interval:
+                    await asyncio.sleep(self._heartbeat_interval - idle)
+                    continue
+            else:
+                # the last heartbeat went unanswered for a whole interval
+                self.missed_heartbeats += 1
+                _LOGGER.debug(f"Missed heartbeat {self.missed_heartbeats}/{self._max_missed_heartbeats}")
+                if self.missed_heartbeats >= self._max_missed_heartbeats:
+                    _LOGGER.warning(
+                        f"No response to {self.missed_heartbeats} heartbeats, connection to {self._host_ip} is dead")
+                    # the reader notices the aborted connection and reconnects
+                    self._abort_connection()
+                    self._awaiting_heartbeat = False
+                    self.missed_heartbeats = 0
+                    self._last_received = time.monotonic()
+                    continue
+            if self.connected:
+                self._awaiting_heartbeat = True
+                self._queue_heartbeat()
+            await asyncio.sleep(self._heartbeat_interval)
+
+    def _queue_heartbeat(self) -> None:
+        """Queue a heartbeat for the writer task, unless one is still waiting to be written"""
+        assert self._heartbeat is not None
+        if any(outbound.heartbeat for outbound in self._queue):
+            return
+        # not bounded by 'max_queued', a full queue is when a dead connection most needs noticing
+        outbound = self._enqueue(self._heartbeat().to_bytes(), self._heartbeat_interval, heartbeat=True)
+        # missing heartbeats are noticed by their missing answers
+        outbound.future.add_done_callback(lambda future: future.cancelled() or future.exception())
+
+    def _write(self, data: bytes) -> None:
+        assert self._writer is not None
+        self._writer.write(data)
+        if self._capture is not None:
+            self._capture.record(Direction.SENT, data)
+
+    def _record_boundary(self, direction: Direction) -> None:
+        """Mark where a connection began or ended in the capture, so readers don't join frames across it"""
+        if self._capture is not None and direction != self._last_boundary:
+            self._last_boundary = direction
+            self._capture.record(direction, b"")
+
+    def _abort_connection(self) -> None:
+        if self._writer is not None:
+            self._writer.transport.abort()
+            self._record_boundary(Direction.DISCONNECTED)
+
+    async def _write_queued(self) -> None:
+        """The single writer of queued messages, waits out disconnections"""
+        while not self._stop:
+            if not self._queue:
+                self._queued.clear()
+                await self._queued.wait()
+                continue
+            await self._connected.wait()
+            if not self._queue:
+                continue
+            outbound = self._queue.popleft()
+            if outbound.future.done() or self._expired(outbound):
+                continue
+            assert self._writer is not None
+            self._unacknowledged.append(outbound)
+            try:
+                self._write(outbound.data)
+                await self._writer.drain()
+            except (ConnectionError, asyncio.IncompleteReadError, TimeoutError) as e:
+                _LOGGER.warning(f"Writing to {self._host_ip} failed, waiting for reconnection: {e!r}")
+                # the reader notices the aborted connection and reconnects, the message is dealt with then
+                self._connected.clear()
+                self._abort_connection()
+                continue
+            # written in time, now it's up to the acknowledgement
+            if outbound.deadline_handle is not None:
+                outbound.deadline_handle.cancel()
+            if outbound.heartbeat:
+                # time the round trip from when it was actually written
+                self._heartbeats_written.append(time.monotonic())
+            if outbound.acknowledgement is None:
+                if outbound in self._unacknowledged:
+                    self._unacknowledged.remove(outbound)
+                self._finish(outbound)
+
+    def _acknowledged(self, outbound: _Outbound) -> None:
+        """Finish 'outbound' the way its acknowledgement completed"""
+        assert outbound.acknowledgement is not None
+        if outbound in self._unacknowledged:
+            self._unacknowledged.remove(outbound)
+        if outbound.acknowledgement.cancelled():
+            self._finish(outbound, asyncio.CancelledError())
+        else:
+            self._finish(outbound, outbound.acknowledgement.exception())
+
+    def _requeue_unacknowledged(self) -> None:
+        """
+        Put messages written to the previous connection but never acknowledged back in front of the queue
+        if they can be resent, fail the others.
+        """
+        unacknowledged = [outbound for outbound in self._unacknowledged
+                          if not outbound.future.done() and not self._expired(outbound)]
+        self._unacknowledged.clear()
+        for outbound in unacknowledged:
+            if outbound.heartbeat:
+                # the next heartbeat is due on the new connection anyway
+                self._finish(outbound, ConnectionError("Connection was lost before the heartbeat was written"))
+        unacknowledged = [outbound for outbound in unacknowledged if not outbound.heartbeat]
+        resent = [outbound for outbound in unacknowledged if outbound.resend and self._resend_unacknowledged]
+        dropped = [outbound for outbound in unacknowledged if outbound not in resent]
+        if resent:
+            _LOGGER.info(f"Resending {len(resent)} unacknowledged messages to {self._host_ip}")
+            self.messages_resent += len(resent)
+            loop = asyncio.get_running_loop()
+            for outbound in resent:
+                if outbound.deadline is not None:
+                    outbound.deadline_handle = loop.call_at(outbound.deadline, self._expire, outbound)
+            self._queue.extendleft(reversed(resent))
+            self._queued.set()
+        if dropped:
+            _LOGGER.warning(f"Dropping {len(dropped)} unacknowledged messages to {self._host_ip}")
+            self.messages_dropped += len(dropped)
+            for outbound in dropped:
+                self._finish(outbound, ConnectionError("Connection was lost before the message was acknowledged"))
+
+    def _expired(self, outbound: _Outbound) -> bool:
+        if outbound.deadline is None or asyncio.get_running_loop().time() < outbound.deadline:
+            return False
+        self._expire(outbound)
+        return True
+
+    def _expire(self, outbound: _Outbound) -> None:
+        if outbound.future.done():
+            return
+        self.messages_expired += 1
+        _LOGGER.warning(f"Message to {self._host_ip} could not be sent in time")
+        self._finish(outbound, TimeoutError("Message could not be sent in time"))
+
+    def _finish(self, outbound: _Outbound, error: BaseException | None = None) -> None:
+        if outbound.deadline_handle is not None:
+            outbound.deadline_handle.cancel()
+        if outbound.future.done():
+            return
+        if error is None:
+            outbound.future.set_result(None)
+        elif isinstance(error, asyncio.CancelledError):
+            outbound.future.cancel()
+        else:
+            outbound.future.set_exception(error)
+
+    def _fail_pending(self, error: BaseException) -> None:
+        """Finish every message queued or waiting for its acknowledgement with 'error'"""
+        for outbound in [*self._queue, *self._unacknowledged]:
+            self._finish(outbound, error)
+        self._queue.clear()
+        self._unacknowledged.clear()
+
+    async def _try_reconnect(self, error: BaseException | None = None) -> None:
+        """Reconnect, stop the client if the reconnect policy gives up"""
+        if await self.reconnect(error):
+            return
+        _LOGGER.error(f"Giving up reconnecting to {self._host_ip} after {self.reconnect_policy.attempts} attempts: "
+                      f"{self.reconnect_policy.last_error!r}")
+        # ends the main loop once this returns
+        self._stop = True
+        self.gave_up = True
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+        if self._writer_task:
+            self._writer_task.cancel()
+        self._fail_pending(ConnectionError(f"Gave up reconnecting to {self._host_ip}"))
+        for callback in list(self._give_up_callbacks):
+            callback()
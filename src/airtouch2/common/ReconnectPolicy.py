@@ -0,0 +1,106 @@
+from __future__ import annotations
+import random
+import time
+from enum import Enum
+from typing import Callable
+
+
+class CircuitState(Enum):
+    # reconnecting with backoff
+    CLOSED = "closed"
+    # too many failures in a row, waiting out the cooldown
+    OPEN = "open"
+    # cooldown over, a single attempt decides whether to close or open again
+    HALF_OPEN = "half_open"
+
+
+class ReconnectPolicy:
+    """
+    Decides how long to wait between reconnection attempts and keeps statistics about outages.
+
+    Delays grow exponentially from 'initial_delay' by 'multiplier' up to 'max_delay'. Each delay is reduced
+    by a random fraction of up to 'jitter' so that many clients losing their connection at once don't retry in lockstep.
+    If 'breaker_threshold' is set, that many failed attempts in a row open the circuit breaker: attempts are then only
+    made every 'breaker_cooldown' seconds until one succeeds.
+    If 'max_attempts' is set, reconnecting is given up after that many failed attempts.
+    """
+
+    def __init__(self, initial_delay: float = 0.001, multiplier: float = 10, max_delay: float = 10,
+                 jitter: float = 0.5, max_attempts: int | None = None, breaker_threshold: int | None = None,
+                 breaker_cooldown: float = 300, random_fraction: Callable[[], float] = random.random):
+        if not 0 <= jitter <= 1:
+            raise ValueError("Jitter must be a fraction from 0 to 1")
+        self.initial_delay = initial_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._random_fraction = random_fraction
+
+        self.state: CircuitState = CircuitState.CLOSED
+        # current outage
+        self.outage_start: float | None = None  # wall clock time
+        self._outage_start_monotonic: float = 0
+        self.attempts: int = 0
+        self.last_error: BaseException | None = None
+        # all outages
+        self.outages: int = 0
+        self.last_outage_duration: float | None = None
+        self.longest_outage_duration: float = 0
+        self.total_outage_duration: float = 0
+
+    @property
+    def in_outage(self) -> bool:
+        return self.outage_start is not None
+
+    def outage_duration(self) -> float | None:
+        """Seconds since the current outage started, None if connected"""
+        if self.outage_start is None:
+            return None
+        return time.monotonic() - self._outage_start_monotonic
+
+    def connection_lost(self, error: BaseException | None = None) -> None:
+        """Start an outage, unless one is already ongoing"""
+        if error is not None:
+            self.last_error = error
+        if self.outage_start is not None:
+            return
+        self.outage_start = time.time()
+        self._outage_start_monotonic = time.monotonic()
+        self.attempts = 0
+        self.outages += 1
+
+    def attempt_failed(self, error: BaseException | None = None) -> float | None:
+        """Record a failed attempt, return how long to wait before the next one or None to give up"""
+        if self.outage_start is None:
+            self.connection_lost()
+        self.attempts += 1
+        if error is not None:
+            self.last_error = error
+        if self.max_attempts is not None and self.attempts >= self.max_attempts:
+            return None
+
+        if self.state == CircuitState.HALF_OPEN or (
+                self.breaker_threshold is not None and self.attempts >= self.breaker_threshold):
+            self.state = CircuitState.OPEN
+            return self.breaker_cooldown
+        delay = min(self.initial_delay * self.multiplier ** (self.attempts - 1), self.max_delay)
+        return delay * (1 - self.jitter * self._random_fraction())
+
+    def attempt_starting(self) -> None:
+        """Call before each attempt, an open circuit breaker allows one attempt once its cooldown is over"""
+        if self.state == CircuitState.OPEN:
+            self.state = CircuitState.HALF_OPEN
+
+    def connected(self) -> None:
+        """End the current outage"""
+        self.state = CircuitState.CLOSED
+        if self.outage_start is None:
+            return
+        duration = time.monotonic() - self._outage_start_monotonic
+        self.last_outage_duration = duration
+        self.longest_outage_duration = max(self.longest_outage_duration, duration)
+        self.total_outage_duration += duration
+        self.outage_start = None
@@ -0,0 +1,102 @@
+from __future__ import annotations
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, Generic, TypeVar
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Request(Generic[T]):
+    future: asyncio.Future[T]
+    matches: Callable[[T], bool] | None
+    timeout_handle: asyncio.TimerHandle
+
+
+class RequestTracker(Generic[T]):
+    """
+    Correlates responses with the requests they answer by the message ID echoed back in them.
+
+    Each request is given the next free ID of a rotating range, several requests can be in flight at once.
+    The future returned for a request resolves with its response, or fails with TimeoutError
+    if none arrives within the timeout.
+    """
+
+    def __init__(self, first_id: int, last_id: int, timeout: float = 5):
+        if not 0 <= first_id <= last_id <= 255:
+            raise ValueError("Message IDs must be within 0 to 255")
+        self._first_id = first_id
+        self._last_id = last_id
+        self._next_id = first_id
+        self._timeout = timeout
+        self._requests: dict[int, _Request[T]] = {}
+        # statistics
+        self.timeouts: int = 0
+        self.unmatched: int = 0
+
+    def in_flight(self) -> int:
+        return len(self._requests)
+
+    def track(self, matches: Callable[[T], bool] | None = None,
+              timeout: float | None = None) -> tuple[int, asyncio.Future[T]]:
+        """
+        Reserve a message ID for a new request, return it with the future of the response.
+        Only responses for which 'matches' returns True resolve the future (any response with the ID if None).
+        Raises RuntimeError if every ID is in use.
+        """
+        message_id = self._take_id()
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[T] = loop.create_future()
+        handle = loop.call_later(self._timeout if timeout is None else timeout, self._expire, message_id, future)
+        self._requests[message_id] = _Request(future, matches, handle)
+        return message_id, future
+
+    def resolve(self, message_id: int, response: T) -> bool:
+        """Complete the request waiting for 'response', return whether there was one"""
+        request = self._requests.get(message_id)
+        if request is None:
+            return False
+        if request.matches is not None and not request.matches(response):
+            self.unmatched += 1
+            return False
+        del self._requests[message_id]
+        request.timeout_handle.cancel()
+        if not request.future.done():
+            request.future.set_result(response)
+        return True
+
+    def cancel(self, message_id: int) -> None:
+        """Stop waiting for the response to the request with 'message_id', e.g. because sending it failed"""
+        request = self._requests.pop(message_id, None)
+        if request is not None:
+            request.timeout_handle.cancel()
+            request.future.cancel()
+
+    def cancel_all(self) -> None:
+        """Cancel every request in flight, e.g. when their responses can't arrive anymore"""
+        for request in self._requests.values():
+            request.timeout_handle.cancel()
+            request.future.cancel()
+        self._requests.clear()
+
+    def _take_id(self) -> int:
+        count = self._last_id - self._first_id + 1
+        for _ in range(count):
+            message_id = self._next_id
+            self._next_id = self._first_id if message_id == self._last_id else message_id + 1
+            if message_id not in self._requests:
+                return message_id
+        raise RuntimeError(f"All {count} message IDs are in use by requests in flight")
+
+    def _expire(self, message_id: int, future: asyncio.Future[T]) -> None:
+        request = self._requests.get(message_id)
+        if request is None or request.future is not future:
+            return
+        del self._requests[message_id]
+        self.timeouts += 1
+        _LOGGER.debug(f"Request with message ID {message_id} timed out")
+        if not future.done():
+            future.set_exception(TimeoutError(f"No response to request with message ID {message_id}"))
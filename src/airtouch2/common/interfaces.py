@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from asyncio import Task
-from typing import Awaitable, Callable, Coroutine, Protocol, TypeVar
+from asyncio import StreamReader, StreamWriter, Task
+from dataclasses import fields
+from typing import Any, Awaitable, Callable, Coroutine, Protocol, TypeVar
 
 
 class Serializable(ABC):
@@ -12,8 +13,14 @@ class Serializable(ABC):
 SendCoro = Callable[[Serializable], Awaitable[None]]
 RecvCoro = Callable[[int], Awaitable[bytes | None]]
 Callback = Callable[[], None]
+# called with the old and new value of the field
+FieldCallback = Callable[[Any, Any], None]
+# called with the ids of the ACs and of the groups that changed
+FrameCallback = Callable[[set[int], set[int]], None]
 CoroCallback = Callable[[], Awaitable[None]]
 TaskCreator = Callable[[Coroutine], Task]
+# opens a connection to a host and port, like asyncio.open_connection
+ConnectionFactory = Callable[[str, int], Awaitable[tuple[StreamReader, StreamWriter]]]
 
 
 class Publisher(ABC):
@@ -22,13 +29,22 @@ class Publisher(ABC):
         """Subscribe 'callback' to info updates. Return a callback that unsubscribes."""
         pass
 
+    @abstractmethod
+    def add_field_callback(self, field: str, callback: FieldCallback) -> Callback:
+        """Subscribe 'callback' to changes of a single info field. Return a callback that unsubscribes."""
+        pass
+
 
 # dumb thing required to pass containers of implementations as parameters
 # to functions that expect containers of interfaces.
 PublisherType = TypeVar("PublisherType", bound=Publisher)
 
 
-def add_callback(callback: Callback, callbacks: list[Callback]) -> Callback:
+# any kind of callback, so add_callback keeps the type of the list it adds to
+CallbackType = TypeVar("CallbackType", bound=Callable[..., None])
+
+
+def add_callback(callback: CallbackType, callbacks: list[CallbackType]) -> Callback:
     callbacks.append(callback)
 
     def remove_callback() -> None:
@@ -36,3 +52,33 @@ def add_callback(callback: Callback, callbacks: list[Callback]) -> Callback:
             callbacks.remove(callback)
 
     return remove_callback
+
+
+def add_field_callback(field: str, callback: FieldCallback, callbacks: dict[str, list[FieldCallback]],
+                       info_type: type) -> Callback:
+    """
+    Subscribe 'callback' to changes of 'field' of the dataclass 'info_type'.
+    Raise ValueError if it has no such field.
+    """
+    if field not in {f.name for f in fields(info_type)}:
+        raise ValueError(f"{info_type.__name__} has no field '{field}'")
+    field_callbacks = callbacks.setdefault(field, [])
+    field_callbacks.append(callback)
+
+    def remove_callback() -> None:
+        if callback in field_callbacks:
+            field_callbacks.remove(callback)
+        if not field_callbacks and callbacks.get(field) is field_callbacks:
+            del callbacks[field]
+
+    return remove_callback
+
+
+def notify_field_callbacks(old: object, new: object, callbacks: dict[str, list[FieldCallback]]) -> None:
+    """Call the callbacks of every subscribed field whose value differs between 'old' and 'new'"""
+    for field, field_callbacks in list(callbacks.items()):
+        old_value = getattr(old, field)
+        new_value = getattr(new, field)
+        if old_value != new_value:
+            for callback in list(field_callbacks):
+                callback(old_value, new_value)
@@ -0,0 +1,228 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from airtouch2.at2.At2Aircon import At2Aircon
+from airtouch2.at2.At2Client import At2Client
+from airtouch2.at2.At2Group import At2Group
+from airtouch2.at2plus.At2PlusAircon import At2PlusAircon
+from airtouch2.at2plus.At2PlusClient import At2PlusClient
+from airtouch2.at2plus.At2PlusGroup import At2PlusGroup
+from airtouch2.common.interfaces import TaskCreator
+
+_LOGGER = logging.getLogger(__name__)
+
+Client = At2PlusClient | At2Client
+Aircon = At2PlusAircon | At2Aircon
+Group = At2PlusGroup | At2Group
+
+
+@dataclass
+class ConsoleHealth:
+    name: str
+    connected: bool
+    acs: int
+    groups: int
+    # seconds since anything was received from the console
+    idle: float
+    rtt: float | None
+    missed_heartbeats: int
+    queued: int
+    # seconds the current outage has lasted, None if connected
+    outage_duration: float | None
+    outages: int
+    reconnect_attempts: int
+    last_error: str | None
+
+
+class ConsoleManager:
+    """
+    Runs the clients of many consoles in one event loop.
+
+    Connecting and rediscovery are spread out over time so the consoles (and the network) aren't all hit at once:
+    consoles are connected 'connect_spacing' seconds apart and each is asked to rediscover its ACs and groups once
+    per 'rediscovery_interval' seconds (never if None), evenly spaced across the consoles.
+    The ACs and groups of all consoles are available keyed by (console name, AC/group ID).
+    When the reconnect policy of a console gives up, connecting to it starts over after 'restart_delay' seconds
+    (never if None).
+    """
+
+    def __init__(self, connect_spacing: float = 0.05, rediscovery_interval: float | None = 3600,
+                 restart_delay: float | None = 300, task_creator: TaskCreator = asyncio.create_task):
+        self.aircons: dict[tuple[str, int], Aircon] = {}
+        self.groups: dict[tuple[str, int], Group] = {}
+
+        self._connect_spacing = connect_spacing
+        self._rediscovery_interval = rediscovery_interval
+        self._restart_delay = restart_delay
+        self._task_creator = task_creator
+        self._consoles: dict[str, Client] = {}
+        self._running: set[str] = set()
+        # the task connecting each console that couldn't be connected to right away
+        self._connecting: dict[str, asyncio.Task] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._started = False
+
+    @property
+    def consoles(self) -> dict[str, Client]:
+        return dict(self._consoles)
+
+    def add_console(self, name: str, client: Client) -> None:
+        """Manage 'client' as the console 'name', it is connected right away if the manager is already started"""
+        if name in self._consoles:
+            raise ValueError(f"There already is a console named {name}")
+        self._consoles[name] = client
+        client.add_new_ac_callback(lambda: self._sync_aircons(name))
+        client.add_new_group_callback(lambda: self._sync_groups(name))
+        client.connection.add_give_up_callback(lambda: self._connection_gave_up(name, client))
+        # the client may already know some from its cache or an earlier connection
+        self._sync_aircons(name)
+        self._sync_groups(name)
+        if self._started:
+            self._spawn(self._start_console(name, 0))
+
+    async def remove_console(self, name: str) -> None:
+        client = self._consoles.pop(name)
+        connecting = self._connecting.pop(name, None)
+        if connecting is not None:
+            # stops the client if it got connected
+            connecting.cancel()
+            await asyncio.gather(connecting, return_exceptions=True)
+        if name in self._running:
+            self._running.discard(name)
+            await client.stop()
+        for key in [key for key in self.aircons if key[0] == name]:
+            del self.aircons[key]
+        for key in [key for key in self.groups if key[0] == name]:
+            del self.groups[key]
+
+    async def start(self) -> int:
+        """
+        Connect to every console, return how many could be connected to at the first attempt.
+        The others keep being retried in the background as their reconnect policy allows.
+        """
+        self._started = True
+        results = await asyncio.gather(
+            *(self._start_console(name, i * self._connect_spacing) for i, name in enumerate(self._consoles)))
+        if self._rediscovery_interval is not None:
+            self._spawn(self._rediscover_periodically(self._rediscovery_interval))
+        return sum(results)
+
+    async def stop(self) -> None:
+        self._started = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        running = [self._consoles[name] for name in self._running if name in self._consoles]
+        self._running.clear()
+        await asyncio.gather(*(client.stop() for client in running))
+
+    def health(self) -> dict[str, ConsoleHealth]:
+        now = time.monotonic()
+        return {name: self._console_health(name, client, now) for name, client in self._consoles.items()}
+
+    def _console_health(self, name: str, client: Client, now: float) -> ConsoleHealth:
+        connection = client.connection
+        policy = connection.reconnect_policy
+        return ConsoleHealth(
+            name, connection.connected, len(client.aircons_by_id), len(client.groups_by_id),
+            now - connection.last_received, connection.rtt, connection.missed_heartbeats, connection.queued(),
+            policy.outage_duration(), policy.outages, policy.attempts,
+            repr(policy.last_error) if policy.last_error is not None else None)
+
+    def _spawn(self, coro) -> None:
+        task = self._task_creator(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _start_console(self, name: str, delay: float) -> bool:
+        await asyncio.sleep(delay)
+        client = self._consoles.get(name)
+        if client is None:
+            return False
+        if await client.connect():
+            self._run(name, client)
+            return True
+        _LOGGER.warning(f"Could not connect to console {name}, retrying in the background")
+        self._start_connecting(name, client)
+        return False
+
+    def _start_connecting(self, name: str, client: Client, restart: bool = False) -> None:
+        task = self._task_creator(self._keep_connecting(name, client, restart))
+        self._connecting[name] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _keep_connecting(self, name: str, client: Client, restart: bool = False) -> None:
+        """Connect 'client' as its reconnect policy allows, after stopping its last run if 'restart'"""
+        try:
+            if restart:
+                await client.stop()
+                if not await self._wait_to_restart(name):
+                    return
+            while not await client.connection.reconnect():
+                if not await self._wait_to_restart(name):
+                    return
+        except asyncio.CancelledError:
+            # removed or stopped while connecting, don't leave the connection open
+            if client.connection.connected:
+                await client.stop()
+            raise
+        finally:
+            if self._connecting.get(name) is asyncio.current_task():
+                del self._connecting[name]
+        if self._consoles.get(name) is client:
+            self._run(name, client)
+
+    async def _wait_to_restart(self, name: str) -> bool:
+        """Wait out the restart delay of console 'name' whose reconnect policy gave up, False if there is none"""
+        if self._restart_delay is None:
+            _LOGGER.error(f"Gave up connecting to console {name}")
+            return False
+        _LOGGER.error(f"Gave up connecting to console {name}, starting over in {self._restart_delay}s")
+        await asyncio.sleep(self._restart_delay)
+        return True
+
+    def _connection_gave_up(self, name: str, client: Client) -> None:
+        """The running 'client' stopped as its reconnect policy gave up"""
+        if self._consoles.get(name) is not client or name not in self._running:
+            return
+        self._running.discard(name)
+        if self._started:
+            self._start_connecting(name, client, restart=True)
+
+    def _run(self, name: str, client: Client) -> None:
+        client.run()
+        self._running.add(name)
+
+    async def _rediscover_periodically(self, interval: float) -> None:
+        while True:
+            names = list(self._running)
+            if not names:
+                await asyncio.sleep(interval)
+                continue
+            spacing = interval / len(names)
+            for name in names:
+                await asyncio.sleep(spacing)
+                client = self._consoles.get(name)
+                if client is None or not client.connection.connected:
+                    continue
+                try:
+                    await client.rediscover()
+                except (asyncio.QueueFull, TimeoutError, ConnectionError) as e:
+                    _LOGGER.warning(f"Could not ask console {name} to rediscover: {e!r}")
+
+    def _sync_aircons(self, name: str) -> None:
+        client = self._consoles.get(name)
+        if client is not None:
+            for id, aircon in client.aircons_by_id.items():
+                self.aircons[(name, id)] = aircon
+
+    def _sync_groups(self, name: str) -> None:
+        client = self._consoles.get(name)
+        if client is not None:
+            for id, group in client.groups_by_id.items():
+                self.groups[(name, id)] = group
@@ -0,0 +1 @@
+from airtouch2.manager.ConsoleManager import ConsoleHealth, ConsoleManager
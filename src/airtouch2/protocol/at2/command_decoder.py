@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from airtouch2.protocol.at2.constants import CommandMessageConstants, MessageLength
+from airtouch2.protocol.at2.message_common import checksum
+
+
+class CommandDecoder:
+    """
+    Incremental (sans-IO) decoder that splits the raw byte stream sent to an AirTouch 2 console into commands.
+
+    A command is only accepted if it starts with the fixed first byte and its checksum matches,
+    otherwise the decoder slides forward a byte at a time.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        # statistics
+        self.commands_decoded: int = 0
+        self.bytes_skipped: int = 0
+
+    def feed(self, data: bytes) -> list[bytes]:
+        """Consume 'data' and return the raw bytes of all valid commands completed by it"""
+        buffer = self._buffer
+        buffer += data
+        commands: list[bytes] = []
+        pos = 0
+        while len(buffer) - pos >= MessageLength.COMMAND:
+            command = bytes(buffer[pos:pos + MessageLength.COMMAND])
+            if command[0] != CommandMessageConstants.BYTE_0 or checksum(command[:-1]) != command[-1]:
+                self.bytes_skipped += 1
+                pos += 1
+                continue
+            commands.append(command)
+            pos += MessageLength.COMMAND
+        del buffer[:pos]
+        self.commands_decoded += len(commands)
+        return commands
+
+    def reset(self) -> None:
+        self.bytes_skipped += len(self._buffer)
+        self._buffer.clear()
+
+    def buffered(self) -> int:
+        """Number of bytes held back waiting for the rest of a command"""
+        return len(self._buffer)
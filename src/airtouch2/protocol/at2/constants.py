@@ -38,10 +38,13 @@ class GroupCommands(IntEnum):
 class ResponseMessageConstants(IntEnum):
     LONG_STRING_LENGTH = 16
     SHORT_STRING_LENGTH = 8
+    # Responses always start with these 2 bytes
+    HEADER_BYTE_0 = 0x91
+    HEADER_BYTE_1 = 0xFA
 
 
 class ResponseMessageOffsets(IntEnum):
-    # Header is 2 bytes
+    # Header is 2 bytes (ResponseMessageConstants.HEADER_BYTE_0, ResponseMessageConstants.HEADER_BYTE_1)
     HEADER = 0
     # There are 16 zones
     # zone names are 8 bytes (ResponseMessageConstants.SHORT_STRING_LENGTH)
@@ -71,6 +74,7 @@ class ResponseMessageOffsets(IntEnum):
     AC_ERROR_CODE_START = 366
     AC_GATEWAY_ID_START = 368
     AC_NAME_START = 370  # AC names are 8 bytes (ResponseMessageConstants.SHORT_STRING_LENGTH)
+    # Sum of all preceding bytes mod 256
     HASH = 394
 
 
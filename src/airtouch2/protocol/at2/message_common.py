@@ -2,12 +2,8 @@
 from airtouch2.common.Buffer import Buffer
 
 
-def checksum(data: bytearray) -> int:
-    sum: int = 0
-    for b in data:
-        sum += b
-    sum = (sum % 256)
-    return sum
+def checksum(data: bytes) -> int:
+    return sum(data) % 256
 
 
 def add_checksum_message_buffer(buffer: Buffer) -> None:
@@ -1,27 +1,42 @@
 from __future__ import annotations
 
 import logging
+import struct
 from dataclasses import dataclass
+from functools import lru_cache
 from itertools import compress
 from pprint import pformat
 
 from airtouch2.protocol.at2.constants import OPEN_ISSUE_TEXT, MessageLength, ResponseMessageConstants, ResponseMessageOffsets
-from airtouch2.protocol.at2.conversions import brand_from_gateway_id, fan_speed_from_val
+from airtouch2.protocol.at2.conversions import brand_from_gateway_id, fan_speed_from_val, val_from_fan_speed
 from airtouch2.protocol.at2.enums import ACBrand, ACFanSpeed, ACMode
+from airtouch2.protocol.at2.message_common import checksum
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=64)
 def _resolve_brand(gateway_id: int, reported_brand: int) -> ACBrand:
     # Brand based on gateway ID takes priority according to app smali
     gateway_based_brand = brand_from_gateway_id(gateway_id)
     return gateway_based_brand if gateway_based_brand is not None else ACBrand(reported_brand)
 
 
+@lru_cache(maxsize=256)
 def _parse_name(name: bytes) -> str:
     # There's probably a better way of doing this.
     return name.decode().split()[0].split("\0")[0]
 
+
+def _encode_name(name: str, length: int) -> bytes:
+    return name.encode()[:length].ljust(length, b"\0")
+
+
+@lru_cache(maxsize=16)
+def _parse_system_name(name: bytes) -> str:
+    return name.decode().split("\0")[0]
+
+
 # TODO: read through app smali code more and do this more properly
 # Currently I'm assuming:
 #   4 speed is always LOW, MED, HIGH, POWERFUL (EXCEPT for fujitsus with 4 speeds)
@@ -34,12 +49,18 @@ def _parse_name(name: bytes) -> str:
 
 
 def _supported_fan_speeds(brand: ACBrand, num_supported_speeds: int, gateway_id: int) -> list[ACFanSpeed]:
+    # a copy, so the cached speeds can't be modified through an AcInfo
+    return list(_cached_supported_fan_speeds(brand, num_supported_speeds, gateway_id))
+
+
+@lru_cache(maxsize=64)
+def _cached_supported_fan_speeds(brand: ACBrand, num_supported_speeds: int, gateway_id: int) -> tuple[ACFanSpeed, ...]:
     all_speeds: list[ACFanSpeed] = list(ACFanSpeed.__members__.values())
     supported_speeds: list[ACFanSpeed] = []
 
     if brand == ACBrand.FUJITSU and num_supported_speeds == 4:
         supported_speeds = all_speeds[:5]
-        return supported_speeds
+        return tuple(supported_speeds)
 
     # Check cases that don't support Auto mode
     if (brand == ACBrand.DAIKIN or (gateway_id == 0xFF and num_supported_speeds == 3) or gateway_id == 0x14):
@@ -55,7 +76,52 @@ def _supported_fan_speeds(brand: ACBrand, num_supported_speeds: int, gateway_id:
         _LOGGER.warning(
             f"AC reports less than 2 supported fan speeds, this is unusual - " + OPEN_ISSUE_TEXT)
 
-    return supported_speeds
+    return tuple(supported_speeds)
+
+
+@lru_cache(maxsize=16)
+def _parse_group_names(names: bytes) -> tuple[str, ...]:
+    length = ResponseMessageConstants.SHORT_STRING_LENGTH
+    return tuple(_parse_name(names[i:i + length]) for i in range(0, len(names), length))
+
+
+def _response_struct() -> struct.Struct:
+    """Everything SystemInfo needs from a response, in one fixed layout"""
+    fields = [
+        (ResponseMessageOffsets.GROUP_NAMES_START, f"{16 * ResponseMessageConstants.SHORT_STRING_LENGTH}s"),
+        (ResponseMessageOffsets.ZONE_STATUSES_START, "16s"),
+        (ResponseMessageOffsets.GROUP_ZONES_START, "16s"),
+        (ResponseMessageOffsets.ZONE_DAMPS_START, "16s"),
+        (ResponseMessageOffsets.NUM_GROUPS, "B"),
+        (ResponseMessageOffsets.TURBO_GROUP, "B"),
+        # a byte for each AC from ACs_STATUS on, each holding its bits in its own positions
+        (ResponseMessageOffsets.ACs_STATUS, "2B"),
+        (ResponseMessageOffsets.TOUCHPAD_TEMP, "B"),
+        (ResponseMessageOffsets.SYSTEM_NAME, f"{ResponseMessageConstants.LONG_STRING_LENGTH}s"),
+        (ResponseMessageOffsets.AC_STATUS_START, "2B"),
+        (ResponseMessageOffsets.AC_BRAND_START, "2B"),
+        (ResponseMessageOffsets.AC_MODE_START, "2B"),
+        (ResponseMessageOffsets.AC_FAN_SPEED_START, "2B"),
+        (ResponseMessageOffsets.AC_SET_TEMP_START, "2B"),
+        (ResponseMessageOffsets.AC_MEASURED_TEMP_START, "2B"),
+        (ResponseMessageOffsets.AC_ERROR_CODE_START, "2B"),
+        (ResponseMessageOffsets.AC_GATEWAY_ID_START, "2B"),
+        (ResponseMessageOffsets.AC_NAME_START, f"{ResponseMessageConstants.SHORT_STRING_LENGTH}s"),
+        (ResponseMessageOffsets.AC_NAME_START + ResponseMessageConstants.SHORT_STRING_LENGTH,
+         f"{ResponseMessageConstants.SHORT_STRING_LENGTH}s"),
+    ]
+    fmt = "<"
+    position = 0
+    for offset, field in fields:
+        assert offset >= position, "response fields must be in order and not overlap"
+        if offset > position:
+            fmt += f"{offset - position}x"
+        fmt += field
+        position = offset + struct.calcsize("<" + field)
+    return struct.Struct(fmt)
+
+
+_RESPONSE_STRUCT = _response_struct()
 
 
 @dataclass
@@ -141,6 +207,20 @@ class AcInfo:
             ac_number, name, active, mode, supported_fan_speeds, fan_speed, ac_set_temp, ac_measured_temp, brand,
             program, error, ac_error_code, thermistor, turbo, safety, spill)
 
+    def status_byte(self) -> int:
+        return (0x80 if self.active else 0) | (0x40 if self.error else 0) | (0 if self.thermistor else 0x04) \
+            | (self.program & 0x07)
+
+    def acs_status_bits(self) -> int:
+        """This AC's turbo, safety and spill bits of its byte from ResponseMessageOffsets.ACs_STATUS on"""
+        return ((1 << (5 - self.number)) if self.turbo else 0) | ((1 << (3 - self.number)) if self.safety else 0) \
+            | ((1 << (1 - self.number)) if self.spill else 0)
+
+    def fan_speed_byte(self) -> int:
+        # Auto isn't counted in the number of speeds
+        num_fan_speeds = len(self.supported_fan_speeds) - (ACFanSpeed.AUTO in self.supported_fan_speeds)
+        return (num_fan_speeds << 4) | val_from_fan_speed(self.supported_fan_speeds, self.fan_speed)
+
 
 @dataclass
 class ZoneInfo:
@@ -188,58 +268,49 @@ class SystemInfo:
     touchpad_temp: int
     system_name: str
 
-    # TODO: 'Bufferise' this code?
     @staticmethod
     def from_bytes(raw_response: bytes) -> SystemInfo:
         assert len(raw_response) == MessageLength.RESPONSE, f"Response message must be {MessageLength.RESPONSE} bytes"
 
+        (group_names, zone_statuses, group_zones, zone_damps, num_groups, turbo_group, acs_status0, acs_status1,
+         touchpad_temp, raw_system_name,
+         status0, status1, brand0, brand1, mode0, mode1, fan_speed0, fan_speed1, set_temp0, set_temp1,
+         measured_temp0, measured_temp1, error_code0, error_code1, gateway_id0, gateway_id1,
+         name0, name1) = _RESPONSE_STRUCT.unpack_from(raw_response)
+
         # ACs
 
         aircons_by_id: dict[int, AcInfo] = {}
-        for ac_id in range(2):
-            name_start = ResponseMessageOffsets.AC_NAME_START + ac_id * ResponseMessageConstants.SHORT_STRING_LENGTH
-            name_end = name_start + ResponseMessageConstants.SHORT_STRING_LENGTH
-
-            ac_info = AcInfo.parse(ac_id,
-                                   raw_response[ResponseMessageOffsets.AC_STATUS_START + ac_id],
-                                   raw_response[ResponseMessageOffsets.AC_ERROR_CODE_START + ac_id],
-                                   raw_response[ResponseMessageOffsets.ACs_STATUS + ac_id],
-                                   raw_response[ResponseMessageOffsets.AC_MODE_START + ac_id],
-                                   raw_response[ResponseMessageOffsets.AC_FAN_SPEED_START + ac_id],
-                                   raw_response[ResponseMessageOffsets.AC_SET_TEMP_START + ac_id],
-                                   raw_response[ResponseMessageOffsets.AC_MEASURED_TEMP_START + ac_id],
-                                   raw_response[ResponseMessageOffsets.AC_BRAND_START + ac_id],
-                                   raw_response[ResponseMessageOffsets.AC_GATEWAY_ID_START + ac_id],
-                                   raw_response[name_start:name_end])
-            if ac_info is not None:
-                aircons_by_id[ac_id] = ac_info
+        ac_info = AcInfo.parse(0, status0, error_code0, acs_status0, mode0, fan_speed0,
+                               set_temp0, measured_temp0, brand0, gateway_id0, name0)
+        if ac_info is not None:
+            aircons_by_id[0] = ac_info
+        ac_info = AcInfo.parse(1, status1, error_code1, acs_status1, mode1, fan_speed1,
+                               set_temp1, measured_temp1, brand1, gateway_id1, name1)
+        if ac_info is not None:
+            aircons_by_id[1] = ac_info
 
         # Groups
         # TODO: Factor out into an analogous 'GroupInfo.parse()'
 
-        num_groups = raw_response[ResponseMessageOffsets.NUM_GROUPS]
-        turbo_group = raw_response[ResponseMessageOffsets.TURBO_GROUP]
+        names = _parse_group_names(group_names)
         groups_by_id: dict[int, GroupInfo] = {}
 
         for group_id in range(num_groups):
-            name_start = ResponseMessageOffsets.GROUP_NAMES_START + group_id * ResponseMessageConstants.SHORT_STRING_LENGTH
-            name_end = name_start + ResponseMessageConstants.SHORT_STRING_LENGTH
-            name = _parse_name(raw_response[name_start:name_end])
-
-            group_zones = raw_response[ResponseMessageOffsets.GROUP_ZONES_START + group_id]
-            start_zone = (group_zones & 0xF0) >> 4
-            num_zones = group_zones & 0x0F
-            
-            zone_info = ZoneInfo.parse(raw_response[ResponseMessageOffsets.ZONE_DAMPS_START + start_zone],
-                                       raw_response[ResponseMessageOffsets.ZONE_STATUSES_START + start_zone])
+            name = names[group_id]
+
+            zones = group_zones[group_id]
+            start_zone = (zones & 0xF0) >> 4
+            num_zones = zones & 0x0F
+
+            zone_info = ZoneInfo.parse(zone_damps[start_zone], zone_statuses[start_zone])
             active = zone_info.active
             spill = zone_info.spill
             damp = zone_info.damp
 
             mismatches: set[str] = set()
             for zone_number in range(start_zone+1, start_zone + num_zones):
-                zone_info = ZoneInfo.parse(raw_response[ResponseMessageOffsets.ZONE_DAMPS_START + zone_number],
-                                           raw_response[ResponseMessageOffsets.ZONE_STATUSES_START + zone_number])
+                zone_info = ZoneInfo.parse(zone_damps[zone_number], zone_statuses[zone_number])
                 # this group is spilling if any of its zones are
                 if not spill:
                     spill = zone_info.spill
@@ -257,12 +328,52 @@ class SystemInfo:
 
         # System-wide
 
-        touchpad_temp = raw_response[ResponseMessageOffsets.TOUCHPAD_TEMP]
-        system_name = raw_response[ResponseMessageOffsets.SYSTEM_NAME: ResponseMessageOffsets.SYSTEM_NAME +
-                                   ResponseMessageConstants.LONG_STRING_LENGTH].decode().split("\0")[0]
+        system_name = _parse_system_name(raw_system_name)
 
         return SystemInfo(aircons_by_id, groups_by_id, touchpad_temp, system_name)
 
+    def to_bytes(self) -> bytes:
+        """
+        A response describing this state, as the console would send it.
+        Each group is made of the one zone with its number and the brand is sent as reported (gateway ID 0).
+        """
+        short = ResponseMessageConstants.SHORT_STRING_LENGTH
+        groups = [self.groups_by_id[id] for id in sorted(self.groups_by_id)]
+        group_names = b"".join(_encode_name(group.name, short) for group in groups)
+        zone_statuses = bytes((0x80 if group.active else 0) | (0x40 if group.spill else 0) for group in groups)
+        group_zones = bytes((zone << 4) | 1 for zone in range(len(groups)))
+        zone_damps = bytes(group.damp for group in groups)
+        # no group has this number when none is in turbo
+        turbo_group = next((group.number for group in groups if group.turbo), 0xFF)
+
+        acs = [self.aircons_by_id.get(number) for number in range(2)]
+        acs_statuses = [0, 0]
+        ac_fields: list[tuple[int, ...]] = []
+        ac_names: list[bytes] = []
+        for ac in acs:
+            if ac is None:
+                # a fan speed and gateway ID of 0 mark an AC that isn't connected
+                ac_fields.append((0,) * 8)
+                ac_names.append(bytes(short))
+                continue
+            acs_statuses[ac.number] = ac.acs_status_bits()
+            ac_fields.append((ac.status_byte(), ac.brand, ac.mode, ac.fan_speed_byte(), ac.set_temp, ac.measured_temp,
+                              ac.error_code, 0))
+            ac_names.append(_encode_name(ac.name, short))
+
+        data = bytearray(MessageLength.RESPONSE)
+        # the fields of both ACs are interleaved: status0, status1, brand0, brand1...
+        interleaved = [value for pair in zip(*ac_fields) for value in pair]
+        _RESPONSE_STRUCT.pack_into(
+            data, 0, group_names, zone_statuses, group_zones, zone_damps, len(groups), turbo_group, *acs_statuses,
+            self.touchpad_temp, _encode_name(self.system_name, ResponseMessageConstants.LONG_STRING_LENGTH),
+            *interleaved, *ac_names)
+        # after packing, as the struct's padding zeroes the header
+        data[ResponseMessageOffsets.HEADER] = ResponseMessageConstants.HEADER_BYTE_0
+        data[ResponseMessageOffsets.HEADER + 1] = ResponseMessageConstants.HEADER_BYTE_1
+        data[ResponseMessageOffsets.HASH] = checksum(data[:ResponseMessageOffsets.HASH])
+        return bytes(data)
+
     def __str__(self):
         return f"""
         System Name:\t{self.system_name}
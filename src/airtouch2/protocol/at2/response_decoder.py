@@ -0,0 +1,72 @@
+from __future__ import annotations
+import logging
+
+from airtouch2.protocol.at2.constants import MessageLength, ResponseMessageConstants, ResponseMessageOffsets
+from airtouch2.protocol.at2.message_common import checksum
+
+_HEADER = bytes([ResponseMessageConstants.HEADER_BYTE_0, ResponseMessageConstants.HEADER_BYTE_1])
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ResponseDecoder:
+    """
+    Incremental (sans-IO) decoder that splits the raw AirTouch 2 byte stream into validated responses.
+
+    A response is only accepted if it starts with the response header and its hash byte matches.
+    Otherwise the decoder slides forward to the next header, so a lost or corrupted byte only costs
+    the response it occurred in instead of misaligning every response after it.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        # statistics
+        self.responses_decoded: int = 0
+        self.bytes_skipped: int = 0
+        self.hash_errors: int = 0
+
+    def feed(self, data: bytes) -> list[bytes]:
+        """Consume 'data' and return the raw bytes of all valid responses completed by it"""
+        buffer = self._buffer
+        buffer += data
+
+        responses: list[bytes] = []
+        pos = 0
+        skipped = 0
+        while True:
+            start = buffer.find(_HEADER, pos)
+            if start < 0:
+                # keep a trailing header byte, it may be the first half of the next header
+                end = max(pos, len(buffer) - 1) if buffer[-1:] == _HEADER[:1] else len(buffer)
+                skipped += end - pos
+                pos = end
+                break
+            skipped += start - pos
+            pos = start
+            end = pos + MessageLength.RESPONSE
+            if len(buffer) < end:
+                break
+            response = bytes(buffer[pos:end])
+            if checksum(response[:ResponseMessageOffsets.HASH]) != response[ResponseMessageOffsets.HASH]:
+                self.hash_errors += 1
+                skipped += 1
+                pos += 1
+                continue
+            responses.append(response)
+            pos = end
+
+        del buffer[:pos]
+        if skipped:
+            _LOGGER.warning(f"Skipped {skipped} bytes of invalid data to resynchronise with responses")
+            self.bytes_skipped += skipped
+        self.responses_decoded += len(responses)
+        return responses
+
+    def reset(self) -> None:
+        """Drop any buffered partial response, e.g. after a reconnection"""
+        self.bytes_skipped += len(self._buffer)
+        self._buffer.clear()
+
+    def buffered(self) -> int:
+        """Number of bytes held back waiting for the rest of a response"""
+        return len(self._buffer)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+import logging
+
+from airtouch2.common.Buffer import Buffer
+from airtouch2.protocol.at2plus.crc16_modbus import crc16
+from airtouch2.protocol.at2plus.message_common import HEADER_LENGTH, HEADER_MAGIC, NON_DATA_LENGTH, Header, Message
+
+# No message of the protocol comes anywhere near this, a larger length means the header is garbage
+MAX_DATA_LENGTH = 1024
+
+_MAGIC = bytes([HEADER_MAGIC, HEADER_MAGIC])
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FrameDecoder:
+    """
+    Incremental (sans-IO) decoder that turns the raw AirTouch 2+ byte stream into messages.
+
+    Bytes are fed in whatever chunks they arrive in and every complete, valid frame is returned.
+    Incomplete trailing data is kept until the next feed. Invalid headers and checksum mismatches
+    are skipped one byte at a time so that valid frames directly following corrupted data are not lost.
+    """
+
+    def __init__(self, max_data_length: int = MAX_DATA_LENGTH):
+        self._buffer = bytearray()
+        self._max_data_length = max_data_length
+        # statistics
+        self.frames_decoded: int = 0
+        self.bytes_discarded: int = 0
+        self.header_errors: int = 0
+        self.checksum_errors: int = 0
+
+    def feed(self, data: bytes) -> list[Message]:
+        """Consume 'data' and return all messages completed by it"""
+        return [Message(header, Buffer.from_bytes(frame[HEADER_LENGTH:-2])) for header, frame in self._feed(data)]
+
+    def feed_frames(self, data: bytes) -> list[bytes]:
+        """Consume 'data' and return the raw bytes of all valid frames completed by it"""
+        return [frame for _, frame in self._feed(data)]
+
+    def _feed(self, data: bytes) -> list[tuple[Header, bytes]]:
+        buffer = self._buffer
+        buffer += data
+
+        frames: list[tuple[Header, bytes]] = []
+        pos = 0
+        while True:
+            start = buffer.find(_MAGIC, pos)
+            if start < 0:
+                # keep a trailing magic byte, it may be the first half of the next header magic
+                end = max(pos, len(buffer) - 1) if buffer[-1:] == _MAGIC[:1] else len(buffer)
+                self.bytes_discarded += end - pos
+                pos = end
+                break
+            self.bytes_discarded += start - pos
+            pos = start
+            if len(buffer) - pos < HEADER_LENGTH:
+                break
+            header_bytes = bytes(buffer[pos:pos + HEADER_LENGTH])
+            try:
+                header = Header.from_bytes(header_bytes)
+                if header.data_length > self._max_data_length:
+                    raise ValueError(f"Data length of {header.data_length} is implausible")
+            except ValueError as e:
+                _LOGGER.debug(f"Invalid header ({e}), resynchronising")
+                self.header_errors += 1
+                self.bytes_discarded += 1
+                pos += 1
+                continue
+            frame_end = pos + header.data_length + NON_DATA_LENGTH
+            if len(buffer) < frame_end:
+                break
+            frame = bytes(buffer[pos:frame_end])
+            calculated_checksum = crc16(frame[2:-2])
+            if frame[-2:] != calculated_checksum:
+                _LOGGER.warning(f"Checksum mismatch, ignoring message: Got {frame[-2:].hex(':')}, "
+                                f"expected {calculated_checksum.hex(':')}")
+                self.checksum_errors += 1
+                self.bytes_discarded += 1
+                pos += 1
+                continue
+            frames.append((header, frame))
+            self.frames_decoded += 1
+            pos = frame_end
+
+        del buffer[:pos]
+        return frames
+
+    def reset(self) -> None:
+        """Drop any buffered partial frame, e.g. after a reconnection"""
+        self.bytes_discarded += len(self._buffer)
+        self._buffer.clear()
+
+    def buffered(self) -> int:
+        """Number of bytes held back waiting for the rest of a frame"""
+        return len(self._buffer)
+
+    @staticmethod
+    def parse(frame: bytes) -> Message:
+        """Construct a Message from a complete, already validated frame"""
+        header = Header.from_bytes(frame[:HEADER_LENGTH])
+        return Message(header, Buffer.from_bytes(frame[HEADER_LENGTH:-2]))
@@ -7,7 +7,8 @@ from airtouch2.common.Buffer import Buffer
 from airtouch2.protocol.at2plus.crc16_modbus import crc16
 from airtouch2.common.interfaces import Serializable
 
-# Message ID can be whatever
+# Message ID can be whatever, the console echoes it in its response.
+# This one is used for all messages that don't need their response identified
 MESSAGE_ID = 1
 HEADER_MAGIC = 0x55
 HEADER_LENGTH = 8
@@ -54,12 +55,15 @@ class Header(Serializable):
     address_msg_type: AddressMsgType
     type: MessageType
     data_length: int
+    message_id: int
     _received: bool
 
-    def __init__(self, address_msg_type: AddressMsgType, type: MessageType, data_length: int, _received=False):
+    def __init__(self, address_msg_type: AddressMsgType, type: MessageType, data_length: int, _received=False,
+                 message_id: int = MESSAGE_ID):
         self.address_msg_type = address_msg_type
         self.type = type
         self.data_length = data_length
+        self.message_id = message_id
         self._received = _received
 
     @staticmethod
@@ -75,8 +79,14 @@ class Header(Serializable):
             _LOGGER.warning(
                 f"Unknown message type in header ({hex(header_bytes[CommonMessageOffsets.MESSAGE_TYPE])})", exc_info=e)
             type = MessageType.UNSET
-        address_src = AddressSource(header_bytes[CommonMessageOffsets.ADDRESS])
-        address_msg_type = AddressMsgType(header_bytes[CommonMessageOffsets.ADDRESS+1])
+        if header_bytes[CommonMessageOffsets.ADDRESS+1] == AddressSource.SELF:
+            # sent to the console
+            received = False
+            address_msg_type = AddressMsgType(header_bytes[CommonMessageOffsets.ADDRESS])
+        else:
+            received = True
+            AddressSource(header_bytes[CommonMessageOffsets.ADDRESS])
+            address_msg_type = AddressMsgType(header_bytes[CommonMessageOffsets.ADDRESS+1])
         if type == MessageType.CONTROL_STATUS:
             if (address_msg_type != AddressMsgType.NORMAL):
                 raise ValueError(f"Message address value is invalid: {header_bytes.hex(':')}")
@@ -86,14 +96,14 @@ class Header(Serializable):
         id = header_bytes[CommonMessageOffsets.MESAGE_ID]
         data_length = int.from_bytes(
             header_bytes[CommonMessageOffsets.DATA_LENGTH:CommonMessageOffsets.DATA], 'big')
-        return Header(address_msg_type, type, data_length, True)
+        return Header(address_msg_type, type, data_length, received, id)
 
     def to_bytes(self) -> bytes:
         return bytes(
             [HEADER_MAGIC, HEADER_MAGIC]) + (
             bytes([AddressSource.SELF, self.address_msg_type])
             if self._received else bytes([self.address_msg_type, AddressSource.SELF])) + bytes(
-            [MESSAGE_ID, self.type]) + self.data_length.to_bytes(
+            [self.message_id, self.type]) + self.data_length.to_bytes(
             2, 'big')
 
 
@@ -113,6 +123,36 @@ def add_checksum_message_bytes(data: bytearray) -> None:
     data[-1] = checksum[1]
 
 
+def set_message_id(data: bytearray, message_id: int) -> None:
+    """Change the message ID of the serialized message 'data', updating its checksum"""
+    data[CommonMessageOffsets.MESAGE_ID] = message_id
+    add_checksum_message_bytes(data)
+
+
+def make_response(data: bytearray, message_id: int = MESSAGE_ID) -> None:
+    """Turn the serialized message 'data' into the console sending it in response to 'message_id'"""
+    address = CommonMessageOffsets.ADDRESS
+    if data[address+1] == AddressSource.SELF:
+        data[address], data[address+1] = AddressSource.SELF, data[address]
+    set_message_id(data, message_id)
+
+
+class IdentifiedMessage(Serializable):
+    """'message' serialized with the message ID 'message_id' instead of the default one"""
+
+    def __init__(self, message: Serializable, message_id: int):
+        self.message = message
+        self.message_id = message_id
+
+    def to_bytes(self) -> bytes:
+        data = bytearray(self.message.to_bytes())
+        set_message_id(data, self.message_id)
+        return bytes(data)
+
+    def __repr__(self) -> str:
+        return f"{self.message!r} (message ID {self.message_id})"
+
+
 @dataclass
 class Message:
     header: Header
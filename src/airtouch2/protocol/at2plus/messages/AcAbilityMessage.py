@@ -5,6 +5,7 @@ from enum import IntEnum
 from airtouch2.protocol.at2plus.enums import AcFanSpeed, AcSetMode
 from airtouch2.protocol.at2plus.extended_common import EXTENDED_SUBHEADER_LENGTH, ExtendedMessageSubType, ExtendedSubHeader
 from airtouch2.protocol.at2plus.message_common import AddressMsgType, Header, MessageType, add_checksum_message_buffer, prime_message_buffer
+from airtouch2.protocol.at2plus.record_layout import Field, RecordLayout
 from airtouch2.common.interfaces import Serializable
 
 
@@ -37,6 +38,46 @@ class DualSetpointLimits:
         """
 
 
+def _name_from_bytes(data: bytes) -> str:
+    return str(data, 'ascii').split("\x00")[0]
+
+
+def _bytes_from_name(name: str) -> bytes:
+    return name.encode("ascii") + bytes(16-len(name))
+
+
+# the support bits are in the same order as the enum values, so every possible mask is simply tabulated
+_MODES_BY_MASK = tuple(tuple(AcSetMode.from_int(i) for i in range(5) if mask & (1 << i)) for mask in range(256))
+_FAN_SPEEDS_BY_MASK = tuple(tuple(AcFanSpeed.from_int(i) for i in range(7) if mask & (1 << i)) for mask in range(256))
+
+
+def _modes_from_mask(mask: int) -> list[AcSetMode]:
+    return list(_MODES_BY_MASK[mask])
+
+
+def _fan_speeds_from_mask(mask: int) -> list[AcFanSpeed]:
+    return list(_FAN_SPEEDS_BY_MASK[mask])
+
+
+def _mask_from_list(values: list[AcSetMode] | list[AcFanSpeed]) -> int:
+    mask: int = 0
+    for value in values:
+        mask |= 1 << value
+    return mask
+
+
+def _limits_from_bytes(data: bytes) -> SetpointLimits | DualSetpointLimits:
+    if len(data) == 4:
+        return DualSetpointLimits(SetpointLimits(data[0], data[1]), SetpointLimits(data[2], data[3]))
+    return SetpointLimits(data[0], data[1])
+
+
+def _bytes_from_limits(limits: SetpointLimits | DualSetpointLimits) -> bytes:
+    if isinstance(limits, DualSetpointLimits):
+        return bytes([limits.cool.min, limits.cool.max, limits.heat.min, limits.heat.max])
+    return bytes([limits.min, limits.max])
+
+
 @dataclass
 class AcAbility(Serializable):
     ac_id: int
@@ -58,44 +99,13 @@ class AcAbility(Serializable):
             raise ValueError(
                 f"Data length specified in message does not match received data length: specified {following_data_length}, got {len(data) - 2}")
 
-        name = data[2:18].decode('ascii').split("\x00")[0]
-        start_group = data[18]
-        group_count = data[19]
-        supported_modes = []
-        for i in range(5):
-            # this loop exploits the fact that the support bits are in the same order as the enum values
-            if (data[20] & (1 << i)) > 0:
-                supported_modes.append(AcSetMode.from_int(i))
-        supported_fan_speeds = []
-        for i in range(7):
-            # ditto
-            if (data[21] & (1 << i)) > 0:
-                supported_fan_speeds.append(AcFanSpeed.from_int(i))
-
-        set_point_limits = SetpointLimits(data[22], data[23])
-        if len(data) == AcAbilitySubDataLength.V1_1:
-            set_point_limits = DualSetpointLimits(set_point_limits, SetpointLimits(data[24], data[25]))
-
-        return AcAbility(
-            ac_id, name, start_group, group_count, supported_modes, supported_fan_speeds, set_point_limits)
+        layout = _decode_ac_ability_v1 if len(data) == AcAbilitySubDataLength.V1 else _decode_ac_ability_v1_1
+        return layout(data)
 
     def to_bytes(self) -> bytes:
-        data = bytes([self.ac_id, (AcAbilitySubDataLength.V1_1 - 2) if isinstance(self.setpoint_limits, DualSetpointLimits) else (
-            AcAbilitySubDataLength.V1 - 2)]) + self.name.encode("ascii") + bytes(16-len(self.name)) + bytes([self.start_group, self.group_count])
-        supported_modes_val: int = 0
-        for mode in self.supported_modes:
-            supported_modes_val |= 1 << mode
-        supported_speeds_val: int = 0
-        for speed in self.supported_fan_speeds:
-            supported_speeds_val |= 1 << speed
-        data += bytes([supported_modes_val, supported_speeds_val])
         if isinstance(self.setpoint_limits, DualSetpointLimits):
-            data += bytes([self.setpoint_limits.cool.min, self.setpoint_limits.cool.max,
-                          self.setpoint_limits.heat.min, self.setpoint_limits.heat.max])
-        elif isinstance(self.setpoint_limits, SetpointLimits):
-            data += bytes([self.setpoint_limits.min, self.setpoint_limits.max])
-
-        return data
+            return _encode_ac_ability_v1_1(self)
+        return _encode_ac_ability_v1(self)
 
     def __repr__(self) -> str:
         return f"""
@@ -109,6 +119,26 @@ class AcAbility(Serializable):
         """
 
 
+def _ac_ability_layout(length: AcAbilitySubDataLength) -> RecordLayout[AcAbility]:
+    return RecordLayout(length, [
+        Field("ac_id", 0),
+        Field("name", 2, size=16, raw=True, decode=_name_from_bytes, encode=_bytes_from_name),
+        Field("start_group", 18),
+        Field("group_count", 19),
+        Field("supported_modes", 20, decode=_modes_from_mask, encode=_mask_from_list),
+        Field("supported_fan_speeds", 21, decode=_fan_speeds_from_mask, encode=_mask_from_list),
+        Field("setpoint_limits", 22, size=length - 22, raw=True,
+              decode=_limits_from_bytes, encode=_bytes_from_limits),
+        # following data length
+    ], constants={1: length - 2})
+
+
+_encode_ac_ability_v1 = _ac_ability_layout(AcAbilitySubDataLength.V1).encoder()
+_decode_ac_ability_v1 = _ac_ability_layout(AcAbilitySubDataLength.V1).decoder(AcAbility)
+_encode_ac_ability_v1_1 = _ac_ability_layout(AcAbilitySubDataLength.V1_1).encoder()
+_decode_ac_ability_v1_1 = _ac_ability_layout(AcAbilitySubDataLength.V1_1).decoder(AcAbility)
+
+
 class AcAbilityMessage(Serializable):
     abilities: list[AcAbility]
 
@@ -118,16 +148,21 @@ class AcAbilityMessage(Serializable):
     @staticmethod
     def from_bytes(subdata: bytes) -> AcAbilityMessage:
         ac_ability_list = []
-        # peek the protocol version, assume they all match
-        length = AcAbilitySubDataLength(subdata[1] + 2)
-        # Iterate over subdata in steps of AC_ABILITY_LENGTH
-        for i in range(0, len(subdata), length):
-            subdata_slice = subdata[i:i+length]
-            ac_ability = AcAbility.from_bytes(subdata_slice)
-            ac_ability_list.append(ac_ability)
-            break  # ! Ignores the other ACs in the list for now
-        ac_ability_message = AcAbilityMessage(ac_ability_list)
-        return ac_ability_message
+        i = 0
+        while i < len(subdata):
+            if i + 2 > len(subdata):
+                raise ValueError(f"Truncated AcAbility at offset {i}, only {len(subdata) - i} bytes left")
+            # each ability states its own length (following its first 2 bytes)
+            length = subdata[i+1] + 2
+            if length not in (AcAbilitySubDataLength.V1, AcAbilitySubDataLength.V1_1):
+                raise ValueError(f"Invalid AcAbility length at offset {i}, should be {AcAbilitySubDataLength.V1} "
+                                 f"or {AcAbilitySubDataLength.V1_1}, got: {length}")
+            if i + length > len(subdata):
+                raise ValueError(f"Truncated AcAbility at offset {i}, specified {length} bytes, "
+                                 f"only {len(subdata) - i} left")
+            ac_ability_list.append(AcAbility.from_bytes(subdata[i:i+length]))
+            i += length
+        return AcAbilityMessage(ac_ability_list)
 
     def to_bytes(self) -> bytes:
         length = AcAbilitySubDataLength.V1 if isinstance(
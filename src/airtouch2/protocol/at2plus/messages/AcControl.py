@@ -6,6 +6,7 @@ from airtouch2.protocol.at2plus.conversions import setpoint_from_value, value_fr
 from airtouch2.protocol.at2plus.control_status_common import CONTROL_STATUS_SUBHEADER_LENGTH, ControlStatusSubType, SubDataLength, ControlStatusSubHeader
 from airtouch2.protocol.at2plus.enums import AcFanSpeed, AcSetMode, AcSetPower
 from airtouch2.protocol.at2plus.message_common import AddressMsgType, Header, MessageType, add_checksum_message_buffer, prime_message_buffer
+from airtouch2.protocol.at2plus.record_layout import Field, RecordLayout, enum_lookup
 from airtouch2.common.interfaces import Serializable
 
 AC_SETTINGS_LENGTH = 4
@@ -16,6 +17,25 @@ class SetpointControl(IntEnum):
     CHANGE = 0x40
 
 
+def _setpoint_from_control(control: int) -> float | None:
+    # first byte is whether the setpoint changes, second byte is the setpoint
+    return setpoint_from_value(control & 0xFF) if (control >> 8) == SetpointControl.CHANGE else None
+
+
+def _control_from_setpoint(setpoint: float | None) -> int:
+    control = SetpointControl.CHANGE if setpoint is not None else SetpointControl.KEEP
+    return (control << 8) | value_from_setpoint(setpoint)
+
+
+AC_SETTINGS_LAYOUT: RecordLayout[AcSettings] = RecordLayout(AC_SETTINGS_LENGTH, [
+    Field("id", 0, bits=4),
+    Field("power", 0, bits=4, shift=4, decode=enum_lookup(AcSetPower, AcSetPower.UNCHANGED)),
+    Field("mode", 1, bits=4, shift=4, decode=enum_lookup(AcSetMode, AcSetMode.UNCHANGED)),
+    Field("speed", 1, bits=4, decode=enum_lookup(AcFanSpeed, AcFanSpeed.UNCHANGED)),
+    Field("setpoint", 2, size=2, decode=_setpoint_from_control, encode=_control_from_setpoint),
+])
+
+
 class AcSettings(Serializable):
     id: int
     power: AcSetPower
@@ -37,24 +57,15 @@ class AcSettings(Serializable):
         self.setpoint = setpoint
 
     def to_bytes(self) -> bytes:
-        data = bytearray(AC_SETTINGS_LENGTH)
-        data[0] = (self.power << 4) | self.id
-        data[1] = (self.mode << 4) | self.speed
-        data[2] = SetpointControl.CHANGE if self.setpoint is not None else SetpointControl.KEEP
-        data[3] = value_from_setpoint(self.setpoint)
-        return data
+        return _encode_ac_settings(self)
 
     @staticmethod
     def from_bytes(data: bytes) -> AcSettings:
-        if (len(data) != AC_SETTINGS_LENGTH):
-            raise ValueError(f"Data must be {AC_SETTINGS_LENGTH} bytes")
-        id = data[0] & 0x0F
-        power = AcSetPower.from_int((data[0] & 0xF0) >> 4)
-        mode = AcSetMode.from_int((data[1] & 0xF0) >> 4)
-        speed = AcFanSpeed.from_int(data[1] & 0x0F)
-        change_setpoint = data[2] == SetpointControl.CHANGE
-        setpoint = setpoint_from_value(data[3]) if change_setpoint else None
-        return AcSettings(id, power, mode, speed, setpoint)
+        return _decode_ac_settings(data)
+
+
+_encode_ac_settings = AC_SETTINGS_LAYOUT.encoder()
+_decode_ac_settings = AC_SETTINGS_LAYOUT.decoder(AcSettings)
 
 
 class AcControlMessage(Serializable):
@@ -64,6 +75,13 @@ class AcControlMessage(Serializable):
     def __init__(self, settings: list[AcSettings]):
         self.settings = settings
 
+    @staticmethod
+    def from_bytes(subdata: bytes) -> AcControlMessage:
+        return AcControlMessage(
+            [AcSettings.from_bytes(subdata[i:i+AC_SETTINGS_LENGTH])
+             for i in range(0, len(subdata), AC_SETTINGS_LENGTH)]
+        )
+
     def to_bytes(self) -> bytes:
         subheader = ControlStatusSubHeader(ControlStatusSubType.AC_CONTROL, SubDataLength(
             0, len(self.settings), AC_SETTINGS_LENGTH))
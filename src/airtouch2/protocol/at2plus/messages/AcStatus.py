@@ -5,11 +5,25 @@ from airtouch2.protocol.at2plus.conversions import setpoint_from_value, temperat
 from airtouch2.protocol.at2plus.control_status_common import CONTROL_STATUS_SUBHEADER_LENGTH, ControlStatusSubType, SubDataLength, ControlStatusSubHeader
 from airtouch2.protocol.at2plus.enums import AcFanSpeed, AcMode, AcPower
 from airtouch2.protocol.at2plus.message_common import AddressMsgType, Header, MessageType, add_checksum_message_buffer, prime_message_buffer
-from airtouch2.common.Buffer import Buffer
+from airtouch2.protocol.at2plus.record_layout import Field, RecordLayout, enum_lookup
 from airtouch2.common.interfaces import Serializable
 
 AC_STATUS_LENGTH = 10
 
+AC_STATUS_LAYOUT: RecordLayout[AcStatus] = RecordLayout(AC_STATUS_LENGTH, [
+    Field("id", 0, bits=4),
+    Field("power", 0, bits=4, shift=4, decode=enum_lookup(AcPower, AcPower.NOT_AVAILABLE)),
+    Field("mode", 1, bits=4, shift=4, decode=enum_lookup(AcMode, AcMode.NOT_AVAILABLE)),
+    Field("fan_speed", 1, bits=4, decode=enum_lookup(AcFanSpeed, AcFanSpeed.UNCHANGED)),
+    Field("set_point", 2, decode=setpoint_from_value, encode=value_from_setpoint),
+    Field("temperature", 4, size=2, decode=temperature_from_value, encode=value_from_temperature),
+    Field("turbo", 3, bits=1, shift=3, decode=bool),
+    Field("bypass", 3, bits=1, shift=2, decode=bool),
+    Field("spill", 3, bits=1, shift=1, decode=bool),
+    Field("timer", 3, bits=1, decode=bool),
+    Field("error", 6, size=2),
+])
+
 
 @dataclass
 class AcStatus(Serializable):
@@ -26,39 +40,17 @@ class AcStatus(Serializable):
     error: int
 
     def to_bytes(self) -> bytes:
-        buffer = Buffer(AC_STATUS_LENGTH)
-        buffer.append_bytes(
-            bytes([
-                ((self.power << 4) | self.id),
-                ((self.mode << 4) | self.fan_speed),
-                value_from_setpoint(self.set_point),
-                self.turbo << 3 | self.bypass << 2 | self.spill << 1 | self.timer,
-            ])
-        )
-        buffer.append_bytes(value_from_temperature(
-            self.temperature).to_bytes(2, 'big'))
-        buffer.append_bytes(self.error.to_bytes(2, 'big'))
-        buffer.append_bytes(bytes([0, 0]))
-        return buffer.to_bytes()
+        return _encode_ac_status(self)
 
     @staticmethod
     def from_bytes(repeat_data: bytes) -> AcStatus:
         """Construct an AcStatus message from its 10-byte serial data"""
-        if (len(repeat_data) != AC_STATUS_LENGTH):
-            raise ValueError(f"repeat_data must be {AC_STATUS_LENGTH} bytes")
-        number: int = repeat_data[0] & 0x0F
-        power = AcPower.from_int((repeat_data[0] & 0xF0) >> 4)
-        mode = AcMode.from_int((repeat_data[1] & 0xF0) >> 4)
-        fan_speed = AcFanSpeed.from_int(repeat_data[1] & 0x0F)
-        set_point: float | None = setpoint_from_value(repeat_data[2])
-        turbo: bool = repeat_data[3] & 8 > 0
-        bypass: bool = repeat_data[3] & 4 > 0
-        spill: bool = repeat_data[3] & 2 > 0
-        timer: bool = repeat_data[3] & 1 > 0
-        temperature: float | None = temperature_from_value(
-            int.from_bytes(repeat_data[4:6], 'big'))
-        error: int = int.from_bytes(repeat_data[6:8], 'big')
-        return AcStatus(number, power, mode, fan_speed, set_point, temperature, turbo, bypass, spill, timer, error)
+        return _decode_ac_status(repeat_data)
+
+    @staticmethod
+    def id_from_bytes(repeat_data: bytes) -> int:
+        """Get the AC id of 10-byte serial data without decoding the rest of it"""
+        return repeat_data[0] & 0x0F
 
     def __repr__(self) -> str:
         return f"""
@@ -76,6 +68,10 @@ class AcStatus(Serializable):
         """
 
 
+_encode_ac_status = AC_STATUS_LAYOUT.encoder()
+_decode_ac_status = AC_STATUS_LAYOUT.decoder(AcStatus)
+
+
 class AcStatusMessage(Serializable):
     """AcStatus Message (can be response with repeat subdata or request with empty subdata)"""
     statuses: list[AcStatus]
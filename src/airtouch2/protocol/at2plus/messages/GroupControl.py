@@ -1,16 +1,25 @@
 from __future__ import annotations
 # from dataclasses import dataclass
-from airtouch2.common.Buffer import Buffer
 
 from airtouch2.common.interfaces import Serializable
 from airtouch2.protocol.at2plus.constants import Limits
 from airtouch2.protocol.at2plus.control_status_common import CONTROL_STATUS_SUBHEADER_LENGTH, ControlStatusSubHeader, ControlStatusSubType, SubDataLength
 from airtouch2.protocol.at2plus.enums import GroupSetDamper, GroupSetPower
 from airtouch2.protocol.at2plus.message_common import AddressMsgType, Header, MessageType, add_checksum_message_buffer, prime_message_buffer
+from airtouch2.protocol.at2plus.record_layout import Field, RecordLayout, enum_lookup
 
 
 GROUP_SETTINGS_LENGTH = 4
 
+GROUP_SETTINGS_LAYOUT: RecordLayout[GroupSettings] = RecordLayout(GROUP_SETTINGS_LENGTH, [
+    Field("id", 0, bits=4),
+    Field("damp_mode", 1, bits=3, shift=5, decode=enum_lookup(GroupSetDamper, GroupSetDamper.UNCHANGED, 3)),
+    Field("power", 1, bits=3, decode=enum_lookup(GroupSetPower, GroupSetPower.UNCHANGED, 3)),
+    Field("damp", 2,
+          decode=lambda value: value if 0 <= value <= 100 else None,
+          encode=lambda damp: damp if damp is not None else 255),
+])
+
 
 class GroupSettings(Serializable):
     id: int
@@ -30,27 +39,15 @@ class GroupSettings(Serializable):
         self.damp = damp
 
     def to_bytes(self) -> bytes:
-        buffer = Buffer(GROUP_SETTINGS_LENGTH)
-        buffer.append_bytes(
-            bytes([
-                self.id,
-                (self.damp_mode << 5) | (self.power),
-                self.damp if self.damp is not None else 255,
-                0
-            ])
-        )
-        return buffer.to_bytes()
+        return _encode_group_settings(self)
 
     @staticmethod
     def from_bytes(repeat_data: bytes) -> GroupSettings:
-        if (len(repeat_data) != GROUP_SETTINGS_LENGTH):
-            raise ValueError(f"repeat_data must be {GROUP_SETTINGS_LENGTH} bytes")
-        id = repeat_data[0] & 0x0F
-        damp_mode = GroupSetDamper.from_int((repeat_data[1] >> 5) & 0x07)
-        power = GroupSetPower.from_int((repeat_data[1]) & 0x07)
-        damp = repeat_data[2] if 0 <= repeat_data[2] <= 100 else None
+        return _decode_group_settings(repeat_data)
+
 
-        return GroupSettings(id, damp_mode, power, damp)
+_encode_group_settings = GROUP_SETTINGS_LAYOUT.encoder()
+_decode_group_settings = GROUP_SETTINGS_LAYOUT.decoder(GroupSettings)
 
 
 class GroupControlMessage(Serializable):
@@ -59,6 +56,13 @@ class GroupControlMessage(Serializable):
     def __init__(self, settings: list[GroupSettings]):
         self.settings = settings
 
+    @staticmethod
+    def from_bytes(subdata: bytes) -> GroupControlMessage:
+        return GroupControlMessage(
+            [GroupSettings.from_bytes(subdata[i:i+GROUP_SETTINGS_LENGTH])
+             for i in range(0, len(subdata), GROUP_SETTINGS_LENGTH)]
+        )
+
     def to_bytes(self) -> bytes:
         subheader = ControlStatusSubHeader(ControlStatusSubType.GROUP_CONTROL, SubDataLength(
             0, len(self.settings), GROUP_SETTINGS_LENGTH))
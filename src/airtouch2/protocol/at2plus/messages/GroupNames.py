@@ -1,10 +1,37 @@
+from __future__ import annotations
 from airtouch2.common.interfaces import Serializable
 from airtouch2.protocol.at2plus.extended_common import EXTENDED_SUBHEADER_LENGTH, ExtendedMessageSubType, ExtendedSubHeader
 from airtouch2.protocol.at2plus.message_common import AddressMsgType, Header, MessageType, add_checksum_message_buffer, prime_message_buffer
 
 
+GROUP_NAME_LENGTH = 8
+
+
 def group_names_from_subdata(subdata: bytes) -> dict[int, str]:
-    return {subdata[i]: subdata[i+1:i+9].decode('ascii').split("\x00")[0] for i in range(0, len(subdata), 9)}
+    return {subdata[i]: str(subdata[i+1:i+9], 'ascii').split("\x00")[0] for i in range(0, len(subdata), 9)}
+
+
+class GroupNamesMessage(Serializable):
+    """Group names response, each name is at most 8 ASCII characters"""
+    names: dict[int, str]
+
+    def __init__(self, names: dict[int, str]):
+        self.names = names
+
+    @staticmethod
+    def from_bytes(subdata: bytes) -> GroupNamesMessage:
+        return GroupNamesMessage(group_names_from_subdata(subdata))
+
+    def to_bytes(self) -> bytes:
+        buffer = prime_message_buffer(
+            Header(AddressMsgType.EXTENDED, MessageType.EXTENDED,
+                   EXTENDED_SUBHEADER_LENGTH + (1 + GROUP_NAME_LENGTH) * len(self.names)))
+        buffer.append(ExtendedSubHeader(ExtendedMessageSubType.GROUP_NAME))
+        for id, name in self.names.items():
+            encoded = name.encode('ascii')[:GROUP_NAME_LENGTH].ljust(GROUP_NAME_LENGTH, b'\x00')
+            buffer.append_bytes(bytes([id]) + encoded)
+        add_checksum_message_buffer(buffer)
+        return buffer.to_bytes()
 
 
 class RequestGroupNamesMessage(Serializable):
@@ -4,11 +4,19 @@ from dataclasses import dataclass
 from airtouch2.common.interfaces import Serializable
 from airtouch2.protocol.at2plus.control_status_common import CONTROL_STATUS_SUBHEADER_LENGTH, ControlStatusSubHeader, ControlStatusSubType, SubDataLength
 from airtouch2.protocol.at2plus.enums import GroupPower
-from airtouch2.common.Buffer import Buffer
 from airtouch2.protocol.at2plus.message_common import AddressMsgType, Header, MessageType, add_checksum_message_buffer, prime_message_buffer
+from airtouch2.protocol.at2plus.record_layout import Field, RecordLayout
 
 GROUP_STATUS_LENGTH = 8
 
+GROUP_STATUS_LAYOUT: RecordLayout[GroupStatus] = RecordLayout(GROUP_STATUS_LENGTH, [
+    Field("id", 0, bits=6),
+    Field("power", 0, bits=2, shift=6, decode=GroupPower),
+    Field("damp", 1, bits=7),
+    Field("supports_turbo", 6, bits=1, shift=7, decode=bool),
+    Field("spill_active", 6, bits=1, shift=1, decode=bool),
+])
+
 
 @dataclass
 class GroupStatus(Serializable):
@@ -19,29 +27,16 @@ class GroupStatus(Serializable):
     spill_active: bool
 
     def to_bytes(self) -> bytes:
-        buffer = Buffer(GROUP_STATUS_LENGTH)
-        buffer.append_bytes(
-            bytes([
-                (self.power << 6) | self.id,
-                self.damp,
-                0, 0, 0, 0,
-                self.supports_turbo << 7 | self.spill_active << 1,
-                0
-            ])
-        )
-        return buffer.to_bytes()
+        return _encode_group_status(self)
 
     @staticmethod
     def from_bytes(repeat_data: bytes) -> GroupStatus:
-        if (len(repeat_data) != GROUP_STATUS_LENGTH):
-            raise ValueError(f"repeat_data must be {GROUP_STATUS_LENGTH} bytes")
-        id = repeat_data[0] & 0x3F
-        power = GroupPower((repeat_data[0] >> 6) & 3)
-        damp = repeat_data[1] & 0x7F
-        supports_turbo = ((repeat_data[6] >> 7) & 1) > 0
-        spill_active = ((repeat_data[6] >> 1) & 1) > 0
+        return _decode_group_status(repeat_data)
 
-        return GroupStatus(id, power, damp, supports_turbo, spill_active)
+    @staticmethod
+    def id_from_bytes(repeat_data: bytes) -> int:
+        """Get the group id of 8-byte serial data without decoding the rest of it"""
+        return repeat_data[0] & 0x3F
 
     def __repr__(self) -> str:
         return f"""
@@ -52,6 +47,10 @@ supports_turbo: {self.supports_turbo}
   spill_active: {self.spill_active}"""
 
 
+_encode_group_status = GROUP_STATUS_LAYOUT.encoder()
+_decode_group_status = GROUP_STATUS_LAYOUT.decoder(GroupStatus)
+
+
 class GroupStatusMessage(Serializable):
     """GroupStatus message (can be response with repeat subdata or request with empty subdata)"""
     statuses: list[GroupStatus]
@@ -0,0 +1,175 @@
+from __future__ import annotations
+import asyncio
+import logging
+from typing import Callable
+
+from airtouch2.common.interfaces import Serializable
+from airtouch2.protocol.at2plus.constants import Limits
+from airtouch2.protocol.at2plus.control_status_common import ControlStatusSubHeader, ControlStatusSubType
+from airtouch2.protocol.at2plus.enums import (AcFanSpeed, AcMode, AcPower, AcSetMode, AcSetPower, GroupPower,
+                                              GroupSetDamper, GroupSetPower)
+from airtouch2.protocol.at2plus.extended_common import (EXTENDED_SUBHEADER_LENGTH, ExtendedMessageSubType,
+                                                        ExtendedSubHeader)
+from airtouch2.protocol.at2plus.frame_decoder import FrameDecoder
+from airtouch2.protocol.at2plus.message_common import MESSAGE_ID, Message, MessageType, make_response
+from airtouch2.protocol.at2plus.messages.AcAbilityMessage import AcAbility, AcAbilityMessage, SetpointLimits
+from airtouch2.protocol.at2plus.messages.AcControl import AcControlMessage, AcSettings
+from airtouch2.protocol.at2plus.messages.AcStatus import AcStatus, AcStatusMessage
+from airtouch2.protocol.at2plus.messages.GroupControl import GroupControlMessage, GroupSettings
+from airtouch2.protocol.at2plus.messages.GroupNames import GroupNamesMessage
+from airtouch2.protocol.at2plus.messages.GroupStatus import GroupStatus, GroupStatusMessage
+from airtouch2.simulator.SimulatorServer import SimulatorServer
+
+_LOGGER = logging.getLogger(__name__)
+
+# how much a damper increase/decrease changes the damper percentage
+DAMPER_STEP = 5
+
+_AC_POWER = {
+    AcSetPower.OFF: AcPower.OFF,
+    AcSetPower.ON: AcPower.ON,
+    AcSetPower.AWAY: AcPower.AWAY_ON,
+    AcSetPower.SLEEP: AcPower.SLEEP,
+}
+
+_GROUP_POWER = {
+    GroupSetPower.OFF: GroupPower.OFF,
+    GroupSetPower.ON: GroupPower.ON,
+    GroupSetPower.TURBO: GroupPower.TURBO,
+}
+
+
+class At2PlusSimulator(SimulatorServer):
+    """
+    An AirTouch 2+ console on the local machine, to test and benchmark At2PlusClient without hardware.
+
+    Holds 'acs' ACs and 'groups' groups (shared out between the ACs), answers status, ability and group name requests
+    and applies control messages, sending the resulting statuses to every connected client like the console does.
+    Each message is handled 'latency' seconds after it arrives and at most 'max_messages_per_second' messages are
+    handled per connection (unlimited if None). If 'push_interval' is set, the AC statuses are also pushed that often.
+    """
+
+    def __init__(self, acs: int = 1, groups: int = 4, host: str = "127.0.0.1", port: int = 0, latency: float = 0,
+                 max_messages_per_second: float | None = None, push_interval: float | None = None):
+        if not 0 < acs <= Limits.MAX_ACS:
+            raise ValueError(f"Number of ACs must be from 1 to {Limits.MAX_ACS}")
+        if not 0 <= groups <= Limits.MAX_GROUPS:
+            raise ValueError(f"Number of groups must be from 0 to {Limits.MAX_GROUPS}")
+        self.ac_statuses: dict[int, AcStatus] = {
+            id: AcStatus(id, AcPower.OFF, AcMode.COOL, AcFanSpeed.LOW, 24, 22.5, False, False, False, False, 0)
+            for id in range(acs)}
+        groups_per_ac = groups // acs
+        self.ac_abilities: dict[int, AcAbility] = {
+            id: AcAbility(id, f"AC {id}", id * groups_per_ac,
+                          groups - id * groups_per_ac if id == acs - 1 else groups_per_ac,
+                          [AcSetMode.AUTO, AcSetMode.HEAT, AcSetMode.DRY, AcSetMode.FAN, AcSetMode.COOL],
+                          [AcFanSpeed.LOW, AcFanSpeed.MEDIUM, AcFanSpeed.HIGH], SetpointLimits(16, 30))
+            for id in range(acs)}
+        self.group_statuses: dict[int, GroupStatus] = {
+            id: GroupStatus(id, GroupPower.ON, 100, False, False) for id in range(groups)}
+        self.group_names: dict[int, str] = {id: f"Group {id}" for id in range(groups)}
+
+        super().__init__(host, port, latency, max_messages_per_second, push_interval)
+
+    def set_ac_status(self, status: AcStatus) -> None:
+        """Change the status of an AC as if it happened at the console, telling every client"""
+        self.ac_statuses[status.id] = status
+        self._push(AcStatusMessage([status]))
+
+    def set_group_status(self, status: GroupStatus) -> None:
+        """Change the status of a group as if it happened at the console, telling every client"""
+        self.group_statuses[status.id] = status
+        self._push(GroupStatusMessage([status]))
+
+    def _new_decoder(self) -> Callable[[bytes], list[Message]]:
+        return FrameDecoder().feed
+
+    def _handle_message(self, message: Message, writer: asyncio.StreamWriter) -> None:
+        header = message.header
+        if header.type == MessageType.CONTROL_STATUS:
+            subheader = ControlStatusSubHeader.from_buffer(message.data_buffer)
+            length = subheader.subdata_length.total()
+            subdata = message.data_buffer.read_bytes(length) if length else b''
+            if subheader.sub_type == ControlStatusSubType.AC_STATUS:
+                self._send(writer, AcStatusMessage(list(self.ac_statuses.values())), header.message_id)
+            elif subheader.sub_type == ControlStatusSubType.GROUP_STATUS:
+                self._send(writer, GroupStatusMessage(list(self.group_statuses.values())), header.message_id)
+            elif subheader.sub_type == ControlStatusSubType.AC_CONTROL:
+                for ac_settings in AcControlMessage.from_bytes(subdata).settings:
+                    self._apply_ac_settings(ac_settings)
+                statuses = AcStatusMessage(list(self.ac_statuses.values()))
+                self._send(writer, statuses, header.message_id)
+                self._push(statuses, writer)
+            elif subheader.sub_type == ControlStatusSubType.GROUP_CONTROL:
+                for group_settings in GroupControlMessage.from_bytes(subdata).settings:
+                    self._apply_group_settings(group_settings)
+                statuses = GroupStatusMessage(list(self.group_statuses.values()))
+                self._send(writer, statuses, header.message_id)
+                self._push(statuses, writer)
+            else:
+                _LOGGER.warning(f"Ignoring unknown control/status message type {subheader.sub_type}")
+        elif header.type == MessageType.EXTENDED:
+            subheader = ExtendedSubHeader.from_buffer(message.data_buffer)
+            subdata = message.data_buffer.read_remaining() \
+                if header.data_length > EXTENDED_SUBHEADER_LENGTH else b''
+            if subheader.sub_type == ExtendedMessageSubType.ABILITY:
+                # a single AC if its ID is given, otherwise all of them
+                abilities = [self.ac_abilities[id] for id in (subdata[:1] or self.ac_abilities)
+                             if id in self.ac_abilities]
+                if abilities:
+                    self._send(writer, AcAbilityMessage(abilities), header.message_id)
+            elif subheader.sub_type == ExtendedMessageSubType.GROUP_NAME:
+                names = {id: self.group_names[id] for id in (subdata[:1] or self.group_names) if id in self.group_names}
+                self._send(writer, GroupNamesMessage(names), header.message_id)
+            else:
+                _LOGGER.warning(f"Ignoring unknown extended message type {subheader.sub_type}")
+        else:
+            _LOGGER.warning(f"Ignoring message of unknown type {header.type}")
+
+    def _apply_ac_settings(self, settings: AcSettings) -> None:
+        status = self.ac_statuses.get(settings.id)
+        if status is None:
+            return
+        if settings.power == AcSetPower.TOGGLE:
+            status.power = AcPower.ON if status.power == AcPower.OFF else AcPower.OFF
+        elif settings.power in _AC_POWER:
+            status.power = _AC_POWER[settings.power]
+        if settings.mode != AcSetMode.UNCHANGED:
+            status.mode = AcMode(settings.mode)
+        if settings.speed != AcFanSpeed.UNCHANGED:
+            status.fan_speed = settings.speed
+        if settings.setpoint is not None:
+            status.set_point = settings.setpoint
+
+    def _apply_group_settings(self, settings: GroupSettings) -> None:
+        status = self.group_statuses.get(settings.id)
+        if status is None:
+            return
+        if settings.power == GroupSetPower.NEXT:
+            if status.power == GroupPower.OFF:
+                status.power = GroupPower.ON
+            elif status.power == GroupPower.ON and status.supports_turbo:
+                status.power = GroupPower.TURBO
+            else:
+                status.power = GroupPower.OFF
+        elif settings.power in _GROUP_POWER and (settings.power != GroupSetPower.TURBO or status.supports_turbo):
+            status.power = _GROUP_POWER[settings.power]
+        if settings.damp_mode == GroupSetDamper.SET and settings.damp is not None:
+            status.damp = settings.damp
+        elif settings.damp_mode == GroupSetDamper.INC:
+            status.damp = min(100, status.damp + DAMPER_STEP)
+        elif settings.damp_mode == GroupSetDamper.DEC:
+            status.damp = max(0, status.damp - DAMPER_STEP)
+
+    def _send(self, writer: asyncio.StreamWriter, message: Serializable, message_id: int = MESSAGE_ID) -> None:
+        data = bytearray(message.to_bytes())
+        make_response(data, message_id)
+        self._write(writer, data)
+
+    def _push(self, message: Serializable, exclude: asyncio.StreamWriter | None = None) -> None:
+        for writer in self._connections:
+            if writer is not exclude:
+                self._send(writer, message)
+
+    def _push_state(self) -> None:
+        self._push(AcStatusMessage(list(self.ac_statuses.values())))
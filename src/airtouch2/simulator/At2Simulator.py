@@ -0,0 +1,123 @@
+from __future__ import annotations
+import asyncio
+import logging
+from typing import Callable
+
+from airtouch2.protocol.at2.command_decoder import CommandDecoder
+from airtouch2.protocol.at2.constants import ACCommands, CommandMessageConstants, CommandMessageType, GroupCommands
+from airtouch2.protocol.at2.conversions import fan_speed_from_val
+from airtouch2.protocol.at2.enums import ACBrand, ACFanSpeed, ACMode
+from airtouch2.protocol.at2.messages.SystemInfo import AcInfo, GroupInfo, SystemInfo
+from airtouch2.simulator.SimulatorServer import SimulatorServer
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_ACS = 2
+MAX_GROUPS = 16
+MIN_SET_TEMP = 16
+MAX_SET_TEMP = 30
+# dampers are in 10% steps
+MAX_DAMP = 10
+
+
+class At2Simulator(SimulatorServer):
+    """
+    An AirTouch 2 console on the local machine, to test and benchmark At2Client without hardware.
+
+    Holds 'acs' ACs and 'groups' groups, answers state requests and applies AC and group commands, sending the
+    resulting state to every connected client like the console does.
+    Each command is handled 'latency' seconds after it arrives and at most 'max_messages_per_second' commands are
+    handled per connection (unlimited if None). If 'push_interval' is set, the state is also pushed that often.
+    """
+
+    def __init__(self, acs: int = 1, groups: int = 4, host: str = "127.0.0.1", port: int = 0, latency: float = 0,
+                 max_messages_per_second: float | None = None, push_interval: float | None = None):
+        if not 0 < acs <= MAX_ACS:
+            raise ValueError(f"Number of ACs must be from 1 to {MAX_ACS}")
+        if not 0 <= groups <= MAX_GROUPS:
+            raise ValueError(f"Number of groups must be from 0 to {MAX_GROUPS}")
+        self.state = SystemInfo(
+            {number: AcInfo(number, f"AC{number}", False, ACMode.COOL,
+                            [ACFanSpeed.AUTO, ACFanSpeed.LOW, ACFanSpeed.MEDIUM, ACFanSpeed.HIGH], ACFanSpeed.LOW,
+                            24, 22, ACBrand.FUJITSU, 0, False, 0, True, False, False, False)
+             for number in range(acs)},
+            # names can't have spaces, the client only keeps the first word
+            {number: GroupInfo(f"GROUP{number}", number, True, MAX_DAMP, False, False) for number in range(groups)},
+            22, "AIRTOUCH")
+
+        super().__init__(host, port, latency, max_messages_per_second, push_interval)
+
+    def set_ac_info(self, info: AcInfo) -> None:
+        """Change an AC as if it happened at the console, telling every client"""
+        self.state.aircons_by_id[info.number] = info
+        self._push_state()
+
+    def set_group_info(self, info: GroupInfo) -> None:
+        """Change a group as if it happened at the console, telling every client"""
+        self.state.groups_by_id[info.number] = info
+        self._push_state()
+
+    def _new_decoder(self) -> Callable[[bytes], list[bytes]]:
+        decoder = CommandDecoder()
+
+        def decode(data: bytes) -> list[bytes]:
+            skipped = decoder.bytes_skipped
+            commands = decoder.feed(data)
+            if decoder.bytes_skipped > skipped:
+                # skipped by the decoder until it found a valid command again, the connection stays up
+                _LOGGER.warning(f"Ignoring {decoder.bytes_skipped - skipped} bytes that are not a valid command")
+            return commands
+        return decode
+
+    def _handle_message(self, message: bytes, writer: asyncio.StreamWriter) -> None:
+        command_type = message[1]
+        if command_type == CommandMessageType.REQUEST_STATE:
+            self._write(writer, self.state.to_bytes())
+            return
+        if command_type == CommandMessageType.AC_CONTROL:
+            self._apply_ac_command(message[3], message[4], message[5])
+        elif command_type == CommandMessageType.GROUP_CONTROL:
+            self._apply_group_command(message[3], message[4], message[5])
+        else:
+            _LOGGER.warning(f"Ignoring command of unknown type {command_type}")
+            return
+        self._push_state()
+
+    def _apply_ac_command(self, number: int, command: int, value: int) -> None:
+        ac = self.state.aircons_by_id.get(number)
+        if ac is None:
+            return
+        if command == CommandMessageConstants.TOGGLE:
+            ac.active = not ac.active
+        elif command == ACCommands.SET_MODE:
+            if value in ACMode.__members__.values():
+                ac.mode = ACMode(value)
+        elif command == ACCommands.SET_FAN_SPEED:
+            try:
+                ac.fan_speed = fan_speed_from_val(ac.supported_fan_speeds, value)
+            except IndexError:
+                _LOGGER.warning(f"Ignoring unsupported fan speed value {value}")
+        elif command == ACCommands.TEMP_INC:
+            ac.set_temp = min(MAX_SET_TEMP, ac.set_temp + 1)
+        elif command == ACCommands.TEMP_DEC:
+            ac.set_temp = max(MIN_SET_TEMP, ac.set_temp - 1)
+        else:
+            _LOGGER.warning(f"Ignoring unknown AC command {command}")
+
+    def _apply_group_command(self, number: int, command: int, value: int) -> None:
+        group = self.state.groups_by_id.get(number)
+        if group is None:
+            return
+        if command == CommandMessageConstants.TOGGLE and value == GroupCommands.TOGGLE:
+            group.active = not group.active
+        elif value == GroupCommands.CHANGE_DAMP and command == GroupCommands.DAMP_INC:
+            group.damp = min(MAX_DAMP, group.damp + 1)
+        elif value == GroupCommands.CHANGE_DAMP and command == GroupCommands.DAMP_DEC:
+            group.damp = max(0, group.damp - 1)
+        else:
+            _LOGGER.warning(f"Ignoring unknown group command {command}")
+
+    def _push_state(self) -> None:
+        response = self.state.to_bytes()
+        for writer in self._connections:
+            self._write(writer, response)
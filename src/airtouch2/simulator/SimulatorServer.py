@@ -0,0 +1,112 @@
+from __future__ import annotations
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SimulatorServer(ABC):
+    """
+    The TCP side of a simulated console, shared by the AirTouch 2 and 2+ simulators.
+
+    Each message is handled 'latency' seconds after it arrives and at most 'max_messages_per_second' messages are
+    handled per connection (unlimited if None). If 'push_interval' is set, the state is also pushed that often.
+    """
+
+    def __init__(self, host: str, port: int, latency: float, max_messages_per_second: float | None,
+                 push_interval: float | None):
+        self._host = host
+        self._port = port
+        self._latency = latency
+        self._message_interval = 1 / max_messages_per_second if max_messages_per_second else 0
+        self._push_interval = push_interval
+        self._server: asyncio.Server | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+        self._handlers: set[asyncio.Task] = set()
+        self._push_task: asyncio.Task[None] | None = None
+        # statistics
+        self.messages_received: int = 0
+        self.messages_sent: int = 0
+        self.messages_invalid: int = 0
+
+    @property
+    def port(self) -> int:
+        """The port listened on, the one picked by the OS if constructed with port 0"""
+        if self._server is None:
+            return self._port
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self._host, self._port)
+        if self._push_interval:
+            self._push_task = asyncio.create_task(self._push_periodically(self._push_interval))
+
+    async def stop(self) -> None:
+        if self._push_task is not None:
+            self._push_task.cancel()
+        if self._server is not None:
+            self._server.close()
+        for writer in self._connections:
+            writer.transport.abort()
+        # the handlers end as their connection is gone
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+    @abstractmethod
+    def _new_decoder(self) -> Callable[[bytes], list[Any]]:
+        """A function splitting the bytes received on a new connection into messages"""
+        pass
+
+    @abstractmethod
+    def _handle_message(self, message: Any, writer: asyncio.StreamWriter) -> None:
+        """Act on 'message' from a client, raise ValueError or IndexError if it is invalid"""
+        pass
+
+    @abstractmethod
+    def _push_state(self) -> None:
+        """Send the periodic state update to every client"""
+        pass
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        handler = asyncio.current_task()
+        assert handler is not None
+        self._handlers.add(handler)
+        decode = self._new_decoder()
+        loop = asyncio.get_running_loop()
+        next_slot = loop.time()
+        try:
+            while data := await reader.read(4096):
+                for message in decode(data):
+                    self.messages_received += 1
+                    if self._message_interval:
+                        next_slot = max(next_slot, loop.time())
+                        await asyncio.sleep(next_slot - loop.time())
+                        next_slot += self._message_interval
+                    if self._latency:
+                        await asyncio.sleep(self._latency)
+                    try:
+                        self._handle_message(message, writer)
+                    except (ValueError, IndexError) as e:
+                        # a real console ignores what it can't make sense of, the connection stays up
+                        self.messages_invalid += 1
+                        _LOGGER.warning(f"Ignoring invalid message {message!r}: {e!r}")
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            self._handlers.discard(handler)
+            writer.close()
+
+    def _write(self, writer: asyncio.StreamWriter, data: bytes | bytearray) -> None:
+        writer.write(data)
+        self.messages_sent += 1
+
+    async def _push_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self._push_state()
@@ -0,0 +1,2 @@
+from airtouch2.simulator.At2PlusSimulator import At2PlusSimulator
+from airtouch2.simulator.At2Simulator import At2Simulator
@@ -87,10 +87,8 @@ async def main():
     inp = await aioconsole.ainput(input_str)
     while inp != "q":
         if (inp == "r"):
-            ability = await client._request_ac_ability(0)
-            while not ability:
-                ability = await client._request_ac_ability(0)
-            ac0._set_ability(ability)
+            ac0.ability = None
+            await client._request_ac_abilities()
 
         if (inp == "t"):
             await client.aircons_by_id[0].toggle()
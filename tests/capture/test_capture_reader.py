@@ -0,0 +1,144 @@
+import os
+import tempfile
+import unittest
+
+from airtouch2.capture import CaptureReader, ConsoleProtocol, Direction
+from airtouch2.capture.capture_format import MAGIC, encode_record
+from airtouch2.protocol.at2.constants import CommandMessageType
+from airtouch2.protocol.at2.messages import RequestState, SystemInfo
+from airtouch2.protocol.at2plus.control_status_common import ControlStatusSubType
+from airtouch2.protocol.at2plus.enums import AcFanSpeed, AcMode, AcPower, GroupPower
+from airtouch2.protocol.at2plus.extended_common import ExtendedMessageSubType
+from airtouch2.protocol.at2plus.message_common import MessageType, make_response
+from airtouch2.protocol.at2plus.messages.AcStatus import AcStatus, AcStatusMessage
+from airtouch2.protocol.at2plus.messages.GroupNames import GroupNamesMessage
+from airtouch2.protocol.at2plus.messages.GroupStatus import GroupStatus, GroupStatusMessage
+from airtouch2.simulator import At2Simulator
+
+
+def response(message) -> bytes:
+    data = bytearray(message.to_bytes())
+    make_response(data)
+    return bytes(data)
+
+
+def ac_status(set_point: int) -> bytes:
+    return response(AcStatusMessage([AcStatus(0, AcPower.ON, AcMode.COOL, AcFanSpeed.LOW, set_point, 22.5,
+                                              False, False, False, False, 0)]))
+
+
+class TestCaptureReader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "wire.capture")
+        self.group_status = response(GroupStatusMessage([GroupStatus(i, GroupPower.ON, 50, False, False)
+                                                         for i in range(4)]))
+        self.request = AcStatusMessage([]).to_bytes()
+        self._write([
+            (100.0, Direction.SENT, self.request),
+            (100.5, Direction.RECEIVED, b"junk" + ac_status(20)),
+            # a frame arriving in two pieces, with something sent in between
+            (101.0, Direction.RECEIVED, self.group_status[:10]),
+            (101.1, Direction.SENT, self.request),
+            (101.2, Direction.RECEIVED, self.group_status[10:] + ac_status(21)[:3]),
+            (102.0, Direction.RECEIVED, ac_status(21)[3:] + response(GroupNamesMessage({0: "Living"}))),
+        ])
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def _write(self, records, mode: str = "wb") -> None:
+        with open(self.path, mode) as f:
+            if mode == "wb":
+                f.write(MAGIC)
+            for timestamp, direction, data in records:
+                f.write(encode_record(timestamp, direction, data))
+
+    def test_index(self):
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(reader.protocol, ConsoleProtocol.AT2PLUS)
+            entries = list(reader.frames())
+            self.assertEqual([(e.timestamp, e.direction, e.sub_type) for e in entries], [
+                (100.0, Direction.SENT, ControlStatusSubType.AC_STATUS),
+                (100.5, Direction.RECEIVED, ControlStatusSubType.AC_STATUS),
+                (101.1, Direction.SENT, ControlStatusSubType.AC_STATUS),
+                (101.2, Direction.RECEIVED, ControlStatusSubType.GROUP_STATUS),
+                (102.0, Direction.RECEIVED, ControlStatusSubType.AC_STATUS),
+                (102.0, Direction.RECEIVED, ExtendedMessageSubType.GROUP_NAME),
+            ])
+            self.assertEqual([e.contiguous for e in entries], [True, True, True, False, False, True])
+
+    def test_frames_in_pieces_are_put_together(self):
+        with CaptureReader(self.path) as reader:
+            group_status, ac = list(reader.frames(start=101, end=102.5, direction=Direction.RECEIVED))[:2]
+            self.assertEqual(reader.frame_bytes(group_status), self.group_status)
+            self.assertEqual(reader.frame_bytes(ac), ac_status(21))
+            self.assertEqual([status.damp for status in reader.decode(group_status).message.statuses], [50] * 4)
+
+    def test_decode_without_copying(self):
+        with CaptureReader(self.path) as reader:
+            entry = next(reader.frames(direction=Direction.RECEIVED, message_type=MessageType.CONTROL_STATUS,
+                                       sub_type=ControlStatusSubType.AC_STATUS))
+            self.assertIsInstance(reader.frame_bytes(entry), memoryview)
+            decoded = reader.decode(entry)
+            self.assertEqual(decoded.header.type, MessageType.CONTROL_STATUS)
+            self.assertEqual(decoded.message.statuses[0].set_point, 20)
+            names = next(reader.frames(message_type=MessageType.EXTENDED))
+            self.assertEqual(reader.decode(names).message.names, {0: "Living"})
+            # a request has no statuses
+            self.assertEqual(reader.decode(reader[0]).message.statuses, [])
+
+    def test_time_range(self):
+        with CaptureReader(self.path) as reader:
+            self.assertEqual([e.timestamp for e in reader.frames(start=100.2, end=102)], [100.5, 101.1, 101.2])
+            self.assertEqual(list(reader.frames(start=103)), [])
+
+    def test_index_is_reused_until_the_capture_grows(self):
+        CaptureReader(self.path).close()
+        index_path = self.path + ".idx"
+        modified = os.path.getmtime(index_path)
+        os.utime(index_path, (0, 0))
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(len(reader), 6)
+        self.assertEqual(os.path.getmtime(index_path), 0)
+
+        self._write([(103.0, Direction.RECEIVED, ac_status(22))], mode="ab")
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(len(reader), 7)
+            self.assertEqual(reader.decode(reader[6]).message.statuses[0].set_point, 22)
+        self.assertGreaterEqual(os.path.getmtime(index_path), modified)
+
+    def test_at2(self):
+        state = At2Simulator(groups=2).state
+        first = state.to_bytes()
+        state.groups_by_id[1].damp = 4
+        self._write([
+            (1.0, Direction.SENT, RequestState().to_bytes()),
+            (1.1, Direction.RECEIVED, first[:200]),
+            (1.2, Direction.RECEIVED, first[200:] + state.to_bytes()),
+        ])
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(reader.protocol, ConsoleProtocol.AT2)
+            self.assertEqual(reader[0].message_type, CommandMessageType.REQUEST_STATE)
+            responses = list(reader.frames(direction=Direction.RECEIVED))
+            self.assertEqual([e.contiguous for e in responses], [False, True])
+            info = reader.decode(responses[1]).message
+            self.assertIsInstance(info, SystemInfo)
+            self.assertEqual(info.groups_by_id[1].damp, 4)
+
+    def test_frames_are_not_joined_across_connections(self):
+        statuses = response(GroupStatusMessage([GroupStatus(i, GroupPower.ON, 50, False, False) for i in range(16)]))
+        self._write([
+            (1.0, Direction.CONNECTED, b""),
+            # long enough to swallow the frames that follow if they were taken for its rest
+            (1.1, Direction.RECEIVED, statuses[:12]),
+            # the rest never arrived, the connection was lost
+            (1.2, Direction.DISCONNECTED, b""),
+            (2.0, Direction.CONNECTED, b""),
+            (2.1, Direction.RECEIVED, ac_status(21)),
+            (2.2, Direction.RECEIVED, ac_status(22)),
+        ])
+        with CaptureReader(self.path) as reader:
+            entries = list(reader.frames())
+            self.assertEqual([(e.timestamp, e.contiguous) for e in entries], [(2.1, True), (2.2, True)])
+            self.assertEqual([reader.decode(e).message.statuses[0].set_point for e in entries], [21, 22])
@@ -0,0 +1,174 @@
+import gzip
+import io
+import os
+import struct
+import tempfile
+import unittest
+
+from airtouch2.capture import ConsoleProtocol, Direction, PcapImporter
+from airtouch2.protocol.at2.messages import RequestState, SystemInfo
+from airtouch2.protocol.at2plus.enums import AcFanSpeed, AcMode, AcPower
+from airtouch2.protocol.at2plus.message_common import MessageType, make_response
+from airtouch2.protocol.at2plus.messages.AcStatus import AcStatus, AcStatusMessage
+from airtouch2.simulator import At2Simulator
+
+CLIENT = bytes([192, 168, 1, 10])
+CONSOLE = bytes([192, 168, 1, 20])
+CLIENT_PORT = 50000
+SYN = 0x02
+ACK = 0x10
+FIN = 0x01
+
+
+def ac_status(set_point: int) -> bytes:
+    data = bytearray(AcStatusMessage([AcStatus(0, AcPower.ON, AcMode.COOL, AcFanSpeed.LOW, set_point, 22.5,
+                                               False, False, False, False, 0)]).to_bytes())
+    make_response(data)
+    return bytes(data)
+
+
+def ethernet(source: bytes, source_port: int, destination: bytes, destination_port: int, sequence: int,
+             payload: bytes = b"", flags: int = ACK) -> bytes:
+    tcp = struct.pack(">HHIIBBHHH", source_port, destination_port, sequence, 0, 5 << 4, flags, 65535, 0, 0)
+    ip = struct.pack(">BBHHHBBH4s4s", 0x45, 0, 20 + len(tcp) + len(payload), 0, 0x4000, 64, 6, 0,
+                     source, destination)
+    # ethernet pads short frames
+    return b"\x00" * 12 + b"\x08\x00" + ip + tcp + payload + b"\x00" * 6
+
+
+def sent(sequence: int, payload: bytes = b"", flags: int = ACK, port: int = 9200) -> bytes:
+    return ethernet(CLIENT, CLIENT_PORT, CONSOLE, port, sequence, payload, flags)
+
+
+def received(sequence: int, payload: bytes = b"", flags: int = ACK, port: int = 9200) -> bytes:
+    return ethernet(CONSOLE, port, CLIENT, CLIENT_PORT, sequence, payload, flags)
+
+
+def pcap(packets: list[tuple[float, bytes]], order: str = "<") -> bytes:
+    data = struct.pack(order + "IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1)
+    for timestamp, packet in packets:
+        data += struct.pack(order + "IIII", int(timestamp), round(timestamp % 1 * 1e6), len(packet), len(packet))
+        data += packet
+    return data
+
+
+def pcapng(packets: list[tuple[float, bytes]]) -> bytes:
+    def block(block_type: int, body: bytes) -> bytes:
+        body += b"\x00" * (-len(body) % 4)
+        return struct.pack("<II", block_type, len(body) + 12) + body + struct.pack("<I", len(body) + 12)
+
+    data = block(0x0A0D0D0A, struct.pack("<IHHq", 0x1A2B3C4D, 1, 0, -1))
+    # a linux cooked capture with nanosecond timestamps
+    options = struct.pack("<HHB3x", 9, 1, 9) + struct.pack("<HH", 0, 0)
+    data += block(1, struct.pack("<HHI", 113, 0, 65535) + options)
+    for timestamp, packet in packets:
+        # swap the ethernet header for a linux cooked one
+        packet = b"\x00" * 14 + packet[12:]
+        ticks = round(timestamp * 1e9)
+        data += block(6, struct.pack("<IIIII", 0, ticks >> 32, ticks & 0xFFFFFFFF, len(packet), len(packet)) + packet)
+    return data
+
+
+class TestPcapImporter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.request = AcStatusMessage([]).to_bytes()
+        self.first = ac_status(20)
+        self.second = ac_status(21)
+        self.packets = [
+            (10.0, sent(999, flags=SYN)),
+            (10.0, received(4999, flags=SYN | ACK)),
+            (10.1, sent(1000, self.request)),
+            # the console's answer in two segments arriving the wrong way round
+            (10.2, received(5000 + 10, self.first[10:])),
+            (10.3, received(5000, self.first[:10])),
+            # a retransmission, partly of what was already had
+            (10.4, received(5000 + 5, self.first[5:] + self.second[:4])),
+            (10.5, received(5000 + len(self.first) + 4, self.second[4:])),
+            # not console traffic
+            (10.6, ethernet(CLIENT, 40000, CONSOLE, 80, 1, b"GET / HTTP/1.1\r\n")),
+            (10.7, sent(1000 + len(self.request), flags=FIN | ACK)),
+        ]
+
+    def test_pcap(self):
+        for order in "<>":
+            with PcapImporter(io.BytesIO(pcap(self.packets, order))) as importer:
+                frames = list(importer.frames())
+            self.assertEqual([(frame.timestamp, frame.direction) for frame in frames], [
+                (10.1, Direction.SENT), (10.3, Direction.RECEIVED), (10.5, Direction.RECEIVED)])
+            self.assertEqual([frame.frame for frame in frames], [self.request, self.first, self.second])
+            self.assertEqual(frames[0].connection, ("192.168.1.10", CLIENT_PORT, "192.168.1.20", 9200))
+            self.assertEqual(frames[1].protocol, ConsoleProtocol.AT2PLUS)
+            self.assertEqual(frames[1].header.type, MessageType.CONTROL_STATUS)
+            self.assertEqual([frame.message.statuses[0].set_point for frame in frames[1:]], [20, 21])
+            self.assertEqual(importer.packets_read, 9)
+            self.assertEqual(importer.segments_imported, 8)
+            self.assertEqual(importer.gaps, 0)
+
+    def test_pcapng_gzip_file(self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "console.pcapng.gz")
+            with gzip.open(path, "wb") as f:
+                f.write(pcapng(self.packets))
+            with PcapImporter.from_file(path) as importer:
+                frames = list(importer.frames())
+        self.assertEqual([frame.frame for frame in frames], [self.request, self.first, self.second])
+        self.assertAlmostEqual(frames[2].timestamp, 10.5)
+
+    def test_at2(self):
+        state = At2Simulator(groups=2).state
+        response = state.to_bytes()
+        request = RequestState().to_bytes()
+        packets = [
+            # the capture started with the connection already open
+            (1.0, sent(1, request, port=8899)),
+            (1.1, received(7, response[:300], port=8899)),
+            (1.2, received(7 + 300, response[300:] + response[:50], port=8899)),
+        ]
+        with PcapImporter(io.BytesIO(pcap(packets))) as importer:
+            frames = list(importer.frames())
+        self.assertEqual([frame.protocol for frame in frames], [ConsoleProtocol.AT2] * 2)
+        self.assertEqual(frames[0].frame, request)
+        self.assertIsNone(frames[0].message)
+        self.assertEqual(frames[1].timestamp, 1.2)
+        self.assertIsInstance(frames[1].message, SystemInfo)
+        self.assertEqual(frames[1].message.system_name, "AIRTOUCH")
+
+    def test_lost_segment(self):
+        packets = [
+            (1.0, received(100, self.first[:10])),
+            # the rest of the first frame was never captured
+            (2.0, received(100 + len(self.first), self.second)),
+            (3.0, received(100 + len(self.first) + len(self.second), self.first)),
+        ]
+        importer = PcapImporter(io.BytesIO(pcap(packets)), max_held_bytes=len(self.first))
+        frames = list(importer.frames())
+        self.assertEqual([frame.frame for frame in frames], [self.second, self.first])
+        self.assertEqual(frames[0].timestamp, 3.0)
+        self.assertEqual(importer.gaps, 1)
+
+    def test_sequence_numbers_wrap_around(self):
+        start = 2**32 - 5
+        packets = [
+            (1.0, received(start, self.first[:20])),
+            (1.1, received(15, self.first[20:])),
+        ]
+        frames = list(PcapImporter(io.BytesIO(pcap(packets))).frames())
+        self.assertEqual([frame.frame for frame in frames], [self.first])
+
+    def test_offloaded_segments(self):
+        def offloaded(packet: bytes, total_length: int) -> bytes:
+            # a large packet isn't padded, its IP total length is left for the NIC or is of the unsplit packet
+            packet = bytearray(packet[:-6])
+            packet[16:18] = total_length.to_bytes(2, "big")
+            return bytes(packet)
+
+        packets = [
+            (1.0, offloaded(received(100, self.first), 0)),
+            (1.1, offloaded(received(100 + len(self.first), self.second), 60000)),
+        ]
+        frames = list(PcapImporter(io.BytesIO(pcap(packets))).frames())
+        self.assertEqual([frame.frame for frame in frames], [self.first, self.second])
+
+    def test_not_a_capture(self):
+        with self.assertRaises(ValueError):
+            list(PcapImporter(io.BytesIO(b"AT2WCAP\x01")).frames())
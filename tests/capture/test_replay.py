@@ -0,0 +1,114 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from dataclasses import replace
+
+from airtouch2.at2.At2Client import At2Client
+from airtouch2.at2plus.At2PlusClient import At2PlusClient
+from airtouch2.capture import Direction, Record, Replay, WireCapture
+from airtouch2.protocol.at2.messages.SystemInfo import SystemInfo
+from airtouch2.simulator import At2PlusSimulator, At2Simulator
+
+
+async def until(condition) -> None:
+    async def wait() -> None:
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(wait(), 2)
+
+
+class TestReplay(unittest.IsolatedAsyncioTestCase):
+    async def _capture_session(self, path: str) -> None:
+        """Record a client discovering a simulated console that then changes an AC's setpoint"""
+        simulator = At2PlusSimulator(acs=1, groups=2)
+        await simulator.start()
+        capture = WireCapture(path)
+        client = At2PlusClient("127.0.0.1", port=simulator.port, capture=capture, heartbeat_interval=0)
+        self.assertTrue(await client.connect())
+        client.run()
+        await until(lambda: client.aircons_by_id and client.aircons_by_id[0].ability is not None and
+                    len(client.groups_by_id) == 2 and client.groups_by_id[1].name is not None)
+        simulator.set_ac_status(replace(simulator.ac_statuses[0], set_point=19))
+        await until(lambda: client.aircons_by_id[0].status.set_point == 19)
+        await client.stop()
+        await simulator.stop()
+        capture.close()
+
+    async def test_replay_at2plus_capture(self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "wire.capture")
+            await self._capture_session(path)
+            replay = Replay.from_file(path, speed=None)
+
+        client = At2PlusClient("console", heartbeat_interval=0, connection_factory=replay.open_connection)
+        new_acs = []
+        client.add_new_ac_callback(lambda: new_acs.append(True))
+        self.assertTrue(await client.connect())
+        client.run()
+        await asyncio.wait_for(replay.finished.wait(), 2)
+        await until(lambda: client.aircons_by_id and client.aircons_by_id[0].status.set_point == 19)
+        self.assertEqual(len(new_acs), 1)
+        self.assertEqual(client.aircons_by_id[0].ability.name, "AC 0")
+        self.assertEqual(client.groups_by_id[1].name, "Group 1")
+        self.assertGreater(replay.bytes_sent, 0)
+        await client.stop()
+
+        # a capture is only replayed once
+        self.assertFalse(await client.connection.connect())
+
+    async def test_scaled_timing(self):
+        info = At2Simulator().state
+        first = info.to_bytes()
+        info.aircons_by_id[0].set_temp = 20
+        now = time.time()
+        replay = Replay([Record(now, Direction.RECEIVED, first), Record(now + 0.1, Direction.SENT, b"ignored"),
+                         Record(now + 0.4, Direction.RECEIVED, info.to_bytes())], speed=2)
+
+        client = At2Client("console", heartbeat_interval=0, connection_factory=replay.open_connection)
+        self.assertTrue(await client.connect())
+        client.run()
+        start = time.perf_counter()
+        await asyncio.wait_for(replay.finished.wait(), 2)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.18)
+        self.assertEqual(replay.records_replayed, 2)
+        await asyncio.sleep(0.01)
+        self.assertEqual(client.aircons_by_id[0].info.set_temp, 20)
+        await client.stop()
+
+    async def test_connection_boundaries(self):
+        info = At2Simulator().state
+        info.aircons_by_id[0].set_temp = 20
+        replay = Replay([
+            Record(0, Direction.CONNECTED, b""),
+            # the connection was lost halfway through a response
+            Record(0.1, Direction.RECEIVED, At2Simulator().state.to_bytes()[:200]),
+            Record(0.2, Direction.DISCONNECTED, b""),
+            Record(0.3, Direction.CONNECTED, b""),
+            Record(0.4, Direction.RECEIVED, info.to_bytes()),
+            Record(0.5, Direction.DISCONNECTED, b""),
+        ], speed=None)
+
+        client = At2Client("console", heartbeat_interval=0, connection_factory=replay.open_connection)
+        self.assertTrue(await client.connect())
+        client.run()
+        await asyncio.wait_for(replay.finished.wait(), 2)
+        await until(lambda: client.aircons_by_id)
+        self.assertEqual(client.aircons_by_id[0].info.set_temp, 20)
+        # reconnected for what was received on the second connection, not after the last
+        self.assertEqual(client.connection.reconnect_policy.outages, 1)
+        self.assertEqual(replay.records_replayed, 2)
+        await client.stop()
+        self.assertFalse(await client.connection.connect())
+
+    async def test_backpressure(self):
+        response = SystemInfo.from_bytes(At2Simulator().state.to_bytes()).to_bytes()
+        replay = Replay([Record(0, Direction.RECEIVED, response)] * 2000, speed=None)
+        reader, writer = await replay.open_connection("console", 0)
+        # nothing is read, so the replay has to stop once the reader's buffer is full
+        await asyncio.sleep(0.1)
+        self.assertLess(replay.records_replayed, 2000)
+        writer.transport.abort()
+        await asyncio.wait_for(replay.finished.wait(), 1)
+        await replay.stop()
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from airtouch2.at2plus.At2PlusClient import At2PlusClient
+from airtouch2.capture import Direction, WireCapture, open_capture, read_records
+from airtouch2.capture.capture_format import DATA_DIRECTIONS, MAGIC
+from airtouch2.simulator import At2PlusSimulator
+
+
+def records(path: str):
+    with open_capture(path) as f:
+        return list(read_records(f))
+
+
+class TestWireCapture(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "wire.capture")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_records_in_order(self):
+        capture = WireCapture(self.path)
+        capture.record(Direction.SENT, b"request")
+        capture.record(Direction.RECEIVED, b"response")
+        capture.close()
+        recorded = records(self.path)
+        self.assertEqual([(r.direction, r.data) for r in recorded],
+                         [(Direction.SENT, b"request"), (Direction.RECEIVED, b"response")])
+        self.assertLessEqual(recorded[0].timestamp, recorded[1].timestamp)
+        self.assertEqual(capture.records_written, 2)
+
+    def test_compressed(self):
+        capture = WireCapture(self.path, compress=True)
+        capture.record(Direction.RECEIVED, bytes(1000))
+        capture.close()
+        with open(self.path, "rb") as f:
+            self.assertNotEqual(f.read(len(MAGIC)), MAGIC)
+        self.assertEqual([r.data for r in records(self.path)], [bytes(1000)])
+
+    def test_rotation(self):
+        capture = WireCapture(self.path, max_bytes=100, backups=2)
+        for i in range(5):
+            capture.record(Direction.RECEIVED, bytes([i]) * 40)
+        capture.close()
+        self.assertEqual(capture.files_rotated, 4)
+        self.assertEqual([r.data[0] for r in records(self.path)], [4])
+        self.assertEqual([r.data[0] for r in records(self.path + ".1")], [3])
+        self.assertEqual([r.data[0] for r in records(self.path + ".2")], [2])
+        self.assertFalse(os.path.exists(self.path + ".3"))
+
+    def test_existing_capture_is_kept(self):
+        capture = WireCapture(self.path)
+        capture.record(Direction.RECEIVED, b"first")
+        capture.close()
+        capture = WireCapture(self.path)
+        capture.close()
+        self.assertEqual(records(self.path), [])
+        self.assertEqual([r.data for r in records(self.path + ".1")], [b"first"])
+
+    def test_truncated_record_is_left_out(self):
+        capture = WireCapture(self.path)
+        capture.record(Direction.RECEIVED, b"whole")
+        capture.record(Direction.RECEIVED, b"cut short")
+        capture.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+        self.assertEqual([r.data for r in records(self.path)], [b"whole"])
+
+
+class TestClientCapture(unittest.IsolatedAsyncioTestCase):
+    async def test_both_directions_are_captured(self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "wire.capture")
+            simulator = At2PlusSimulator()
+            await simulator.start()
+            capture = WireCapture(path)
+            client = At2PlusClient("127.0.0.1", port=simulator.port, capture=capture)
+            self.assertTrue(await client.connect())
+            client.run()
+            while not client.aircons_by_id:
+                await asyncio.sleep(0.01)
+            client.connection._abort_connection()
+            while client.connection.reconnect_policy.outages < 1 or not client.connection.connected:
+                await asyncio.sleep(0.01)
+            await client.stop()
+            await simulator.stop()
+            capture.close()
+
+            recorded = records(path)
+            # the connection's boundaries are recorded too
+            self.assertEqual([(r.direction, r.data) for r in (recorded[0], recorded[-1])],
+                             [(Direction.CONNECTED, b""), (Direction.DISCONNECTED, b"")])
+            self.assertEqual(recorded[1].direction, Direction.SENT)
+            self.assertEqual([r.direction for r in recorded if r.direction not in DATA_DIRECTIONS],
+                             [Direction.CONNECTED, Direction.DISCONNECTED] * 2)
+            self.assertIn(Direction.RECEIVED, {r.direction for r in recorded})
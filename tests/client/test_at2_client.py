@@ -0,0 +1,40 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from airtouch2.at2.At2Client import At2Client
+from airtouch2.capture import Direction, Record, Replay
+from airtouch2.protocol.at2.messages.SystemInfo import SystemInfo
+from airtouch2.simulator import At2Simulator
+
+
+class TestAt2Client(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_responses_are_dropped(self):
+        state = At2Simulator(groups=2).state
+        first = state.to_bytes()
+        state.groups_by_id[1].damp = 4
+        second = state.to_bytes()
+        group_updates: list[int] = []
+        frames: list[tuple[set[int], set[int]]] = []
+
+        def new_group() -> None:
+            if 1 in client.groups_by_id:
+                group = client.groups_by_id[1]
+                group.add_callback(lambda: group_updates.append(group.info.damp))
+
+        with patch.object(SystemInfo, "from_bytes", wraps=SystemInfo.from_bytes) as decode:
+            # the last two arrive together
+            replay = Replay([Record(0, Direction.RECEIVED, first), Record(0, Direction.RECEIVED, first),
+                             Record(0, Direction.RECEIVED, second + second)], speed=None)
+            client = At2Client("console", heartbeat_interval=0, connection_factory=replay.open_connection)
+            self.addAsyncCleanup(client.stop)
+            client.add_new_group_callback(new_group)
+            client.add_frame_callback(lambda acs, groups: frames.append((acs, groups)))
+            self.assertTrue(await client.connect())
+            client.run()
+            await asyncio.wait_for(replay.finished.wait(), 2)
+            await asyncio.sleep(0.05)
+            # a byte-identical response is never decoded, one with a byte changed is
+            self.assertEqual(decode.call_count, 2)
+        self.assertEqual(group_updates, [4])
+        self.assertEqual(frames, [({0}, {0, 1}), (set(), {1})])
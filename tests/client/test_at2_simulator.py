@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+from dataclasses import replace
+
+from airtouch2.at2.At2Client import At2Client
+from airtouch2.protocol.at2.enums import ACFanSpeed, ACMode
+from airtouch2.protocol.at2.messages import RequestState
+from airtouch2.simulator import At2Simulator
+
+
+class TestAt2Simulator(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.simulator = At2Simulator(acs=2, groups=3)
+        await self.simulator.start()
+        self.client = At2Client("127.0.0.1", port=self.simulator.port)
+        self.assertTrue(await self.client.connect())
+        self.client.run()
+        await asyncio.wait_for(self._discovered(), 2)
+
+    async def asyncTearDown(self) -> None:
+        await self.client.stop()
+        await self.simulator.stop()
+
+    async def _discovered(self) -> None:
+        while len(self.client.aircons_by_id) < 2 or len(self.client.groups_by_id) < 3:
+            await asyncio.sleep(0.01)
+
+    async def _until(self, condition) -> None:
+        async def wait() -> None:
+            while not condition():
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(wait(), 2)
+
+    async def test_discovery(self):
+        self.assertEqual(self.client.system_name, "AIRTOUCH")
+        self.assertEqual(self.client.aircons_by_id[1].info.name, "AC1")
+        self.assertEqual(self.client.groups_by_id[2].info.name, "GROUP2")
+        self.assertEqual(self.client.groups_by_id[2].info.damp, 10)
+
+    async def test_ac_control(self):
+        ac = self.client.aircons_by_id[0]
+        await ac.turn_on()
+        await ac.set_mode(ACMode.HEAT)
+        await ac.set_fan_speed(ACFanSpeed.HIGH)
+        await ac.set_set_temp(21)
+        await self._until(lambda: ac.info.set_temp == 21)
+        self.assertTrue(ac.info.active)
+        self.assertEqual(ac.info.mode, ACMode.HEAT)
+        self.assertEqual(ac.info.fan_speed, ACFanSpeed.HIGH)
+        self.assertEqual(self.simulator.state.aircons_by_id[0].set_temp, 21)
+
+    async def test_group_control(self):
+        group = self.client.groups_by_id[1]
+        await group.set_damp(7)
+        await self._until(lambda: group.info.damp == 7)
+        await group.turn_off()
+        await self._until(lambda: not group.info.active)
+        self.assertFalse(self.simulator.state.groups_by_id[1].active)
+
+    async def test_push(self):
+        group = self.simulator.state.groups_by_id[0]
+        self.simulator.set_group_info(replace(group, turbo=True))
+        await self._until(lambda: self.client.groups_by_id[0].info.turbo)
+
+    async def test_ignores_corrupted_commands(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.simulator.port)
+        with self.assertLogs("airtouch2.simulator.At2Simulator", "WARNING") as logs:
+            writer.write(b"\x00\x55" + bytes(13))
+            await writer.drain()
+            await self._until(lambda: self.simulator.messages_received == 1)
+        self.assertIn("not a valid command", "".join(logs.output))
+        # the connection is still served
+        writer.write(RequestState().to_bytes())
+        self.assertTrue(await asyncio.wait_for(reader.read(4096), 2))
+        writer.close()
+        await writer.wait_closed()
@@ -0,0 +1,332 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from typing import Callable
+from unittest.mock import patch
+
+from airtouch2.at2plus.At2PlusAircon import At2PlusAircon
+from airtouch2.at2plus.At2PlusClient import At2PlusClient
+from airtouch2.at2plus.At2PlusGroup import At2PlusGroup
+from airtouch2.at2plus.TopologyCache import Topology, TopologyCache
+from airtouch2.capture import Direction, Record, Replay
+from airtouch2.protocol.at2plus.enums import AcFanSpeed, AcMode, AcPower, AcSetMode, AcSetPower, GroupPower
+from airtouch2.protocol.at2plus.messages.AcControl import AcControlMessage, AcSettings
+from airtouch2.protocol.at2plus.frame_decoder import FrameDecoder
+from airtouch2.protocol.at2plus.message_common import add_checksum_message_bytes, make_response
+from airtouch2.protocol.at2plus.messages.AcAbilityMessage import AcAbility, AcAbilityMessage, SetpointLimits
+from airtouch2.protocol.at2plus.messages.AcStatus import AcStatus, AcStatusMessage
+from airtouch2.protocol.at2plus.messages.GroupNames import GroupNamesMessage
+from airtouch2.protocol.at2plus.messages.GroupStatus import GroupStatus, GroupStatusMessage
+from airtouch2.protocol.at2plus.message_common import IdentifiedMessage
+from airtouch2.simulator import At2PlusSimulator
+
+
+def response(message) -> bytes:
+    data = bytearray(message.to_bytes())
+    make_response(data)
+    return bytes(data)
+
+
+def ac_statuses(*set_points: int) -> bytes:
+    return response(AcStatusMessage([AcStatus(id, AcPower.ON, AcMode.COOL, AcFanSpeed.LOW, set_point, 22.5,
+                                              False, False, False, False, 0)
+                                     for id, set_point in enumerate(set_points)]))
+
+
+def group_statuses(*damps: int) -> bytes:
+    return response(GroupStatusMessage([GroupStatus(id, GroupPower.ON, damp, False, False)
+                                        for id, damp in enumerate(damps)]))
+
+
+def abilities(count: int) -> bytes:
+    return response(AcAbilityMessage([AcAbility(id, f"AC{id}", 0, 4, [AcSetMode.COOL, AcSetMode.HEAT],
+                                                [AcFanSpeed.LOW, AcFanSpeed.HIGH], SetpointLimits(16, 30))
+                                      for id in range(count)]))
+
+# the package exports the class under the module's name
+client_module = sys.modules[At2PlusClient.__module__]
+
+
+async def until(condition) -> None:
+    async def wait() -> None:
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(wait(), 2)
+
+
+class TestAt2PlusClient(unittest.IsolatedAsyncioTestCase):
+    async def _replay(self, frames: list[bytes], subscribe: Callable[[At2PlusClient], None],
+                      **kwargs) -> At2PlusClient:
+        """
+        A client that has received 'frames' from the console, subscribed to by 'subscribe' before connecting.
+        The frames arrive apart, so each status is handled before the next arrives.
+        """
+        replay = Replay([Record(i * 0.02, Direction.RECEIVED, frame) for i, frame in enumerate(frames)])
+        client = At2PlusClient("console", heartbeat_interval=0, connection_factory=replay.open_connection, **kwargs)
+        self.addAsyncCleanup(client.stop)
+        subscribe(client)
+        self.assertTrue(await client.connect())
+        client.run()
+        await asyncio.wait_for(replay.finished.wait(), 2)
+        # statuses are handled in tasks of their own
+        await asyncio.sleep(0.05)
+        return client
+
+    async def test_unchanged_statuses_are_skipped(self):
+        ac_updates: list[float] = []
+        frames: list[tuple[set[int], set[int]]] = []
+
+        def subscribe(client: At2PlusClient) -> None:
+            def new_ac() -> None:
+                ac = client.aircons_by_id[0]
+                ac.add_callback(lambda: ac_updates.append(ac.status.set_point))
+            client.add_new_ac_callback(new_ac)
+            client.add_frame_callback(lambda acs, groups: frames.append((acs, groups)))
+
+        with patch.object(AcStatus, "from_bytes", wraps=AcStatus.from_bytes) as decode:
+            await self._replay([abilities(1), ac_statuses(20), ac_statuses(20), ac_statuses(21), ac_statuses(21)],
+                               subscribe)
+            # a byte-identical record is never decoded, one with a byte changed is
+            self.assertEqual(decode.call_count, 2)
+        self.assertEqual(ac_updates, [20, 21])
+        self.assertEqual(frames, [({0}, set()), ({0}, set())])
+
+    async def test_frame_callbacks(self):
+        frames: list[tuple[set[int], set[int]]] = []
+        await self._replay([
+            abilities(3),
+            ac_statuses(20, 20, 20),
+            group_statuses(50, 50, 50),
+            response(GroupNamesMessage({0: "Living", 1: "Bed"})),
+            # only AC 1 and groups 0 and 2 change
+            ac_statuses(20, 24, 20),
+            group_statuses(40, 50, 60),
+            # nothing changes
+            ac_statuses(20, 24, 20),
+            response(GroupNamesMessage({0: "Living"})),
+            # a name changes
+            response(GroupNamesMessage({1: "Study"})),
+        ], lambda client: client.add_frame_callback(lambda acs, groups: frames.append((acs, groups))))
+        self.assertEqual(frames, [
+            ({0, 1, 2}, set()),
+            (set(), {0, 1, 2}),
+            (set(), {0, 1}),
+            ({1}, set()),
+            (set(), {0, 2}),
+            (set(), {1}),
+        ])
+
+    async def test_unsubscribe_frame_callback(self):
+        frames: list[tuple[set[int], set[int]]] = []
+
+        def subscribe(client: At2PlusClient) -> None:
+            remove = client.add_frame_callback(lambda acs, groups: frames.append((acs, groups)))
+            client.add_frame_callback(lambda acs, groups: remove())
+
+        await self._replay([ac_statuses(20), ac_statuses(21)], subscribe)
+        self.assertEqual(frames, [({0}, set())])
+
+    async def test_restored_topology_notifies_only_changes(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "topology.json")
+        ability = AcAbility(0, "AC0", 0, 1, [AcSetMode.COOL], [AcFanSpeed.LOW], SetpointLimits(16, 30))
+        await TopologyCache(path, "console").save(Topology(
+            {0: AcStatus(0, AcPower.ON, AcMode.COOL, AcFanSpeed.LOW, 20, 22.5, False, False, False, False,
+                         0).to_bytes()},
+            {0: ability.to_bytes()}, {0: GroupStatus(0, GroupPower.ON, 50, False, False).to_bytes()}, {0: "Living"}))
+        # built as cached, not updated from the status they were just built with
+        with patch.object(At2PlusAircon, "_update_status") as update_ac, \
+                patch.object(At2PlusGroup, "_update_status") as update_group:
+            await At2PlusClient("console", cache_path=path)._restore_topology()
+        update_ac.assert_not_called()
+        update_group.assert_not_called()
+        notified: list[object] = []
+
+        def subscribe(client: At2PlusClient) -> None:
+            def new_ac() -> None:
+                ac = client.aircons_by_id[0]
+                ac.add_callback(lambda: notified.append("ac"))
+                ac.add_field_callback("set_point", lambda old, new: notified.append((old, new)))
+
+            def new_group() -> None:
+                client.groups_by_id[0].add_callback(lambda: notified.append("group"))
+            client.add_new_ac_callback(new_ac)
+            client.add_new_group_callback(new_group)
+            client.add_frame_callback(lambda acs, groups: notified.append((acs, groups)))
+
+        # the console confirms what was cached, then the AC changes
+        client = await self._replay([ac_statuses(20), group_statuses(50), ac_statuses(21)], subscribe,
+                                    cache_path=path)
+        self.assertEqual(client.groups_by_id[0].name, "Living")
+        self.assertEqual(client.aircons_by_id[0].ability, ability)
+        self.assertEqual(notified, [(20, 21), "ac", ({0}, set())])
+
+    async def test_invalid_ability_message_is_skipped(self):
+        invalid = bytearray(abilities(1))
+        # the length of the ability is one the console doesn't send, and longer than the message
+        invalid[invalid.index(b"AC0") - 1] = 30
+        add_checksum_message_bytes(invalid)
+        with self.assertLogs(client_module._LOGGER, "WARNING") as logs:
+            client = await self._replay([bytes(invalid), abilities(1), ac_statuses(20)], lambda client: None)
+        self.assertIn("Ignoring invalid ability message", "".join(logs.output))
+        self.assertEqual(client.aircons_by_id[0].ability.name, "AC0")
+
+    async def test_request_answered_when_handling_the_response_fails(self):
+        client = At2PlusClient("console", heartbeat_interval=0)
+        message_id, answer = client._requests.track()
+        data = bytearray(AcStatusMessage([]).to_bytes())
+        make_response(data, message_id)
+        messages = FrameDecoder().feed(bytes(data))
+
+        async def read_messages():
+            return messages
+        client._read_messages = read_messages
+        with patch.object(client, "_handle_message", side_effect=ValueError("bad response")):
+            with self.assertRaises(ValueError):
+                await client.handle_one_message()
+        self.assertIs(answer.result(), messages[0])
+        self.assertEqual(client._requests.in_flight(), 0)
+
+    async def test_no_request_for_unanswered_messages(self):
+        client = At2PlusClient("console", heartbeat_interval=0)
+        with self.assertRaises(ValueError):
+            await client.request(IdentifiedMessage(AcStatusMessage([]), 2))
+        self.assertEqual(client._requests.in_flight(), 0)
+
+
+@patch.object(client_module, "ABILITY_RETRY_DELAY", 0.01)
+class TestAt2PlusClientDiscovery(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.simulator = At2PlusSimulator(acs=2, groups=4)
+        await self.simulator.start()
+        self.addAsyncCleanup(self.simulator.stop)
+        self.client = At2PlusClient("127.0.0.1", port=self.simulator.port, heartbeat_interval=0)
+        self.requests = 0
+        request = self.client.request
+
+        async def counted_request(*args, **kwargs):
+            self.requests += 1
+            return await request(*args, **kwargs)
+        self.client.request = counted_request
+
+    async def _run(self) -> None:
+        self.assertTrue(await self.client.connect())
+        self.client.run()
+        self.addAsyncCleanup(self.client.stop)
+
+    async def test_discovery(self):
+        await self._run()
+        await until(lambda: len(self.client.aircons_by_id) == 2 and not self.client._missing_abilities() and
+                    len(self.client.groups_by_id) == 4 and
+                    all(group.name is not None for group in self.client.groups_by_id.values()))
+        self.assertEqual(self.client.aircons_by_id[1].ability.start_group, 2)
+        self.assertEqual(self.client.groups_by_id[3].name, "Group 3")
+        # both abilities came in one response
+        self.assertEqual(self.requests, 1)
+
+    async def test_gives_up_on_ac_missing_from_response(self):
+        ability = self.simulator.ac_abilities.pop(1)
+        await self._run()
+        await until(lambda: len(self.client.aircons_by_id) == 2 and self.requests > 0)
+        await until(lambda: not self.client._requesting_abilities)
+        self.assertIsNotNone(self.client.aircons_by_id[0].ability)
+        self.assertIsNone(self.client.aircons_by_id[1].ability)
+        self.assertEqual(self.requests, client_module.ABILITY_MAX_REQUESTS)
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.requests, client_module.ABILITY_MAX_REQUESTS)
+
+        # asked for again once reconnected
+        self.simulator.ac_abilities[1] = ability
+        self.client.connection._abort_connection()
+        await until(lambda: self.client.aircons_by_id[1].ability is not None)
+
+    async def test_send_errors_are_retried(self):
+        send = self.client.connection.send
+        failures = [asyncio.QueueFull(), ConnectionError()]
+
+        async def failing_send(message, *args, **kwargs):
+            if isinstance(message, IdentifiedMessage) and failures:
+                raise failures.pop(0)
+            await send(message, *args, **kwargs)
+        self.client.connection.send = failing_send
+        await self._run()
+        await until(lambda: len(self.client.aircons_by_id) == 2 and not self.client._missing_abilities())
+        self.assertEqual(self.requests, 3)
+
+
+class TestAt2PlusClientCommands(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        # pushing statuses all the time, none of which acknowledge a command
+        self.simulator = At2PlusSimulator(acs=1, groups=2, latency=0.1, push_interval=0.02)
+        await self.simulator.start()
+        self.addAsyncCleanup(self.simulator.stop)
+        self.client = At2PlusClient("127.0.0.1", port=self.simulator.port, heartbeat_interval=0)
+        self.assertTrue(await self.client.connect())
+        self.client.run()
+        self.addAsyncCleanup(self.client.stop)
+        # discovered, so the console isn't busy answering anything else
+        await until(lambda: 0 in self.client.aircons_by_id and not self.client._missing_abilities() and
+                    len(self.client.groups_by_id) == 2 and
+                    all(group.name is not None for group in self.client.groups_by_id.values()))
+        await asyncio.sleep(0.1)
+
+    def settings(self, power: AcSetPower = AcSetPower.UNCHANGED, setpoint: float | None = None) -> AcControlMessage:
+        return AcControlMessage([AcSettings(0, power, AcSetMode.UNCHANGED, AcFanSpeed.UNCHANGED, setpoint)])
+
+    async def test_done_once_written(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await self.client.send(self.settings(setpoint=20))
+        # not waiting for the console's answer
+        self.assertLess(loop.time() - start, 0.1)
+        self.assertEqual(self.client._requests.in_flight(), 0)
+        await until(lambda: self.simulator.ac_statuses[0].set_point == 20)
+
+    async def test_acknowledged_by_echoed_message_id(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await self.client.send(self.settings(setpoint=20), ack=True)
+        self.assertGreaterEqual(loop.time() - start, 0.1)
+        self.assertEqual(self.simulator.ac_statuses[0].set_point, 20)
+        self.assertEqual(self.client._requests.in_flight(), 0)
+
+    async def _lose_connection_while_sending(self, message: AcControlMessage) -> None:
+        sent = asyncio.create_task(self.client.send(message, ack=True))
+        # written, but the console hasn't answered yet
+        await asyncio.sleep(0.05)
+        self.client.connection._abort_connection()
+        await asyncio.wait_for(sent, 2)
+
+    async def test_relative_command_is_not_resent(self):
+        with self.assertRaises(ConnectionError):
+            await self._lose_connection_while_sending(self.settings(AcSetPower.TOGGLE))
+        await until(lambda: self.client.connection.connected)
+        await asyncio.sleep(0.2)
+        # toggled once, by the message written before the connection was lost
+        self.assertEqual(self.simulator.ac_statuses[0].power, AcPower.ON)
+        self.assertEqual(self.client.connection.messages_resent, 0)
+        self.assertEqual(self.client.connection.messages_dropped, 1)
+
+    async def test_absolute_command_is_resent(self):
+        await self._lose_connection_while_sending(self.settings(AcSetPower.ON, 18))
+        self.assertEqual(self.simulator.ac_statuses[0].power, AcPower.ON)
+        self.assertEqual(self.simulator.ac_statuses[0].set_point, 18)
+        self.assertEqual(self.client.connection.messages_resent, 1)
+
+
+class TestAt2PlusClientHeartbeat(unittest.IsolatedAsyncioTestCase):
+    async def test_rtt_measured_from_the_heartbeat_response(self):
+        # pushes arrive while the heartbeat is waiting for its response
+        simulator = At2PlusSimulator(acs=1, groups=2, latency=0.1, push_interval=0.03)
+        await simulator.start()
+        self.addAsyncCleanup(simulator.stop)
+        client = At2PlusClient("127.0.0.1", port=simulator.port, heartbeat_interval=0.02)
+        self.assertTrue(await client.connect())
+        client.run()
+        self.addAsyncCleanup(client.stop)
+        await until(lambda: client.connection.rtt is not None)
+        self.assertGreaterEqual(client.connection.rtt, 0.1)
+        self.assertEqual(client.connection.missed_heartbeats, 0)
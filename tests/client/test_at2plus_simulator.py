@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+
+from airtouch2.at2plus.At2PlusClient import At2PlusClient
+from airtouch2.protocol.at2plus.enums import AcFanSpeed, AcMode, AcPower, GroupPower
+from airtouch2.protocol.at2plus.frame_decoder import FrameDecoder
+from airtouch2.protocol.at2plus.message_common import AddressMsgType, Header, MessageType, add_checksum_message_bytes
+from airtouch2.protocol.at2plus.messages.AcStatus import AcStatus, AcStatusMessage
+from airtouch2.simulator import At2PlusSimulator
+
+
+class TestAt2PlusSimulator(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.simulator = At2PlusSimulator(acs=2, groups=4)
+        await self.simulator.start()
+        self.client = At2PlusClient("127.0.0.1", port=self.simulator.port)
+        self.assertTrue(await self.client.connect())
+        self.client.run()
+        await asyncio.wait_for(self._discovered(), 2)
+
+    async def asyncTearDown(self) -> None:
+        await self.client.stop()
+        await self.simulator.stop()
+
+    async def _discovered(self) -> None:
+        while len(self.client.aircons_by_id) < 2 or len(self.client.groups_by_id) < 4 or \
+                any(ac.ability is None for ac in self.client.aircons_by_id.values()) or \
+                any(group.name is None for group in self.client.groups_by_id.values()):
+            await asyncio.sleep(0.01)
+
+    async def _changed(self, entity, field: str) -> None:
+        changed = asyncio.Event()
+        remove = entity.add_field_callback(field, lambda old, new: changed.set())
+        try:
+            await asyncio.wait_for(changed.wait(), 2)
+        finally:
+            remove()
+
+    async def test_discovery(self):
+        self.assertEqual(self.client.aircons_by_id[1].ability.start_group, 2)
+        self.assertEqual(self.client.groups_by_id[3].name, "Group 3")
+
+    async def test_control(self):
+        ac = self.client.aircons_by_id[0]
+        changed = asyncio.create_task(self._changed(ac, "set_point"))
+        await asyncio.sleep(0)
+        await ac.set_setpoint(21)
+        await changed
+        self.assertEqual(ac.status.set_point, 21)
+        self.assertEqual(self.simulator.ac_statuses[0].set_point, 21)
+
+        group = self.client.groups_by_id[2]
+        changed = asyncio.create_task(self._changed(group, "damp"))
+        await asyncio.sleep(0)
+        await group.set_damp(40)
+        await changed
+        self.assertEqual(group.status.damp, 40)
+
+        changed = asyncio.create_task(self._changed(group, "power"))
+        await asyncio.sleep(0)
+        await group.turn_off()
+        await changed
+        self.assertEqual(self.simulator.group_statuses[2].power, GroupPower.OFF)
+
+    async def test_push(self):
+        ac = self.client.aircons_by_id[1]
+        changed = asyncio.create_task(self._changed(ac, "power"))
+        await asyncio.sleep(0)
+        self.simulator.set_ac_status(
+            AcStatus(1, AcPower.ON, AcMode.HEAT, AcFanSpeed.HIGH, 25, 20, False, False, False, False, 0))
+        await changed
+        self.assertEqual(ac.status.mode, AcMode.HEAT)
+
+    async def test_invalid_message_is_skipped(self):
+        # too short for the control/status subheader it announces
+        invalid = bytearray(Header(AddressMsgType.NORMAL, MessageType.CONTROL_STATUS, 3).to_bytes() +
+                            bytes([0x20, 0, 0, 0, 0]))
+        add_checksum_message_bytes(invalid)
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.simulator.port)
+        self.addCleanup(writer.close)
+        with self.assertLogs("airtouch2.simulator.SimulatorServer", "WARNING"):
+            writer.write(bytes(invalid) + AcStatusMessage([]).to_bytes())
+            decoder = FrameDecoder()
+            messages = []
+            while not messages:
+                data = await asyncio.wait_for(reader.read(4096), 2)
+                self.assertTrue(data, "The simulator dropped the connection")
+                messages = decoder.feed(data)
+        # the request after it is still answered
+        self.assertEqual(messages[0].header.type, MessageType.CONTROL_STATUS)
+        self.assertEqual(self.simulator.messages_invalid, 1)
+
+
+class TestLimits(unittest.IsolatedAsyncioTestCase):
+    async def test_latency_and_throughput(self):
+        simulator = At2PlusSimulator(latency=0.05, max_messages_per_second=20)
+        await simulator.start()
+        client = At2PlusClient("127.0.0.1", port=simulator.port)
+        start = asyncio.get_running_loop().time()
+        self.assertTrue(await client.connect())
+        client.run()
+        await client.wait_for_ac()
+        # group status and AC status requests, the second waits for its slot
+        self.assertGreaterEqual(asyncio.get_running_loop().time() - start, 0.09)
+        await client.stop()
+        await simulator.stop()
@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+
+from airtouch2.at2plus.CommandBatcher import CommandBatcher
+from airtouch2.common.interfaces import Serializable
+from airtouch2.protocol.at2plus.enums import AcFanSpeed, AcSetMode, AcSetPower, GroupSetDamper, GroupSetPower
+from airtouch2.protocol.at2plus.messages.AcControl import AcControlMessage, AcSettings
+from airtouch2.protocol.at2plus.messages.GroupControl import GroupControlMessage, GroupSettings
+
+
+class TestCommandBatcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.sent: list[Serializable] = []
+
+        async def send(message: Serializable) -> None:
+            self.sent.append(message)
+
+        self.batcher = CommandBatcher(send, 0.01)
+
+    async def test_settings_are_merged_per_entity(self):
+        await asyncio.gather(
+            self.batcher.add_ac_settings(AcSettings(0, AcSetPower.ON, AcSetMode.UNCHANGED, AcFanSpeed.UNCHANGED)),
+            self.batcher.add_ac_settings(AcSettings(0, AcSetPower.UNCHANGED, AcSetMode.COOL, AcFanSpeed.UNCHANGED, 22)),
+            self.batcher.add_ac_settings(AcSettings(0, AcSetPower.UNCHANGED, AcSetMode.HEAT, AcFanSpeed.UNCHANGED)),
+            self.batcher.add_ac_settings(AcSettings(1, AcSetPower.OFF, AcSetMode.UNCHANGED, AcFanSpeed.UNCHANGED)),
+            self.batcher.add_group_settings(GroupSettings(3, GroupSetDamper.SET, GroupSetPower.UNCHANGED, 40)),
+            self.batcher.add_group_settings(GroupSettings(3, GroupSetDamper.SET, GroupSetPower.UNCHANGED, 60)),
+        )
+        self.assertEqual(len(self.sent), 2)
+        ac_message, group_message = self.sent
+        assert isinstance(ac_message, AcControlMessage)
+        assert isinstance(group_message, GroupControlMessage)
+        ac0, ac1 = ac_message.settings
+        self.assertEqual((ac0.id, ac0.power, ac0.mode, ac0.setpoint), (0, AcSetPower.ON, AcSetMode.HEAT, 22))
+        self.assertEqual((ac1.id, ac1.power), (1, AcSetPower.OFF))
+        self.assertEqual([(s.id, s.damp) for s in group_message.settings], [(3, 60)])
+
+    async def test_relative_settings_are_not_merged(self):
+        await asyncio.gather(
+            self.batcher.add_ac_settings(AcSettings(0, AcSetPower.TOGGLE, AcSetMode.UNCHANGED, AcFanSpeed.UNCHANGED)),
+            self.batcher.add_ac_settings(AcSettings(0, AcSetPower.TOGGLE, AcSetMode.UNCHANGED, AcFanSpeed.UNCHANGED)),
+        )
+        self.assertEqual(len(self.sent), 2)
+        for message in self.sent:
+            assert isinstance(message, AcControlMessage)
+            self.assertEqual([s.power for s in message.settings], [AcSetPower.TOGGLE])
+
+    async def test_absolute_overrides_relative(self):
+        await asyncio.gather(
+            self.batcher.add_group_settings(GroupSettings(0, GroupSetDamper.INC, GroupSetPower.UNCHANGED)),
+            self.batcher.add_group_settings(GroupSettings(0, GroupSetDamper.SET, GroupSetPower.UNCHANGED, 20)),
+        )
+        self.assertEqual(len(self.sent), 1)
+        message = self.sent[0]
+        assert isinstance(message, GroupControlMessage)
+        self.assertEqual((message.settings[0].damp_mode, message.settings[0].damp), (GroupSetDamper.SET, 20))
+
+    async def test_only_the_failed_batch_fails(self):
+        async def send(message: Serializable) -> None:
+            if isinstance(message, AcControlMessage):
+                raise ConnectionError("lost")
+            self.sent.append(message)
+        self.batcher = CommandBatcher(send, 0.01)
+        ac, group = await asyncio.gather(
+            self.batcher.add_ac_settings(AcSettings(0, AcSetPower.ON, AcSetMode.UNCHANGED, AcFanSpeed.UNCHANGED)),
+            self.batcher.add_group_settings(GroupSettings(3, GroupSetDamper.SET, GroupSetPower.UNCHANGED, 40)),
+            return_exceptions=True)
+        self.assertIsInstance(ac, ConnectionError)
+        self.assertIsNone(group)
+        self.assertEqual(len(self.sent), 1)
+        self.assertIsInstance(self.sent[0], GroupControlMessage)
@@ -0,0 +1,178 @@
+import asyncio
+import unittest
+
+from airtouch2.common.ReconnectPolicy import ReconnectPolicy
+from airtouch2.common.interfaces import Callback, add_callback
+from airtouch2.manager import ConsoleManager
+
+
+class FakeConnection:
+    def __init__(self, reconnects: bool):
+        self.reconnect_policy = ReconnectPolicy()
+        self.connected = False
+        self.last_received = 0.0
+        self.rtt = None
+        self.missed_heartbeats = 0
+        self._reconnects = reconnects
+        self._give_up_callbacks: list[Callback] = []
+        # while set, reconnecting doesn't finish, as if still connecting
+        self.hold: asyncio.Event | None = None
+
+    def queued(self) -> int:
+        return 0
+
+    async def reconnect(self) -> bool:
+        self.connected = self._reconnects
+        if self.hold is not None:
+            await self.hold.wait()
+        return self._reconnects
+
+    def add_give_up_callback(self, callback: Callback) -> Callback:
+        return add_callback(callback, self._give_up_callbacks)
+
+    def give_up(self) -> None:
+        self.connected = False
+        for callback in self._give_up_callbacks:
+            callback()
+
+
+class FakeClient:
+    """Stands in for At2PlusClient/At2Client, 'ids' are the IDs of the ACs and groups it finds once running"""
+
+    def __init__(self, ids: list[int], connects: bool = True, reconnects: bool = True):
+        self.aircons_by_id: dict[int, object] = {}
+        self.groups_by_id: dict[int, object] = {}
+        self.connection = FakeConnection(reconnects)
+        self.connect_times: list[float] = []
+        self.rediscoveries = 0
+        self.running = False
+        self.stops = 0
+        self._ids = ids
+        self._connects = connects
+        self._new_ac_callbacks: list[Callback] = []
+        self._new_group_callbacks: list[Callback] = []
+
+    async def connect(self) -> bool:
+        self.connect_times.append(asyncio.get_running_loop().time())
+        self.connection.connected = self._connects
+        return self._connects
+
+    def run(self) -> None:
+        self.running = True
+        for id in self._ids:
+            self.aircons_by_id[id] = object()
+            for callback in self._new_ac_callbacks:
+                callback()
+            self.groups_by_id[id] = object()
+            for callback in self._new_group_callbacks:
+                callback()
+
+    async def stop(self) -> None:
+        self.running = False
+        self.stops += 1
+        self.connection.connected = False
+
+    async def rediscover(self) -> None:
+        self.rediscoveries += 1
+
+    def add_new_ac_callback(self, callback: Callback) -> Callback:
+        return add_callback(callback, self._new_ac_callbacks)
+
+    def add_new_group_callback(self, callback: Callback) -> Callback:
+        return add_callback(callback, self._new_group_callbacks)
+
+
+class TestConsoleManager(unittest.IsolatedAsyncioTestCase):
+    async def test_staggered_connect_and_registry(self):
+        manager = ConsoleManager(connect_spacing=0.02, rediscovery_interval=None)
+        a, b = FakeClient([0, 1]), FakeClient([0])
+        manager.add_console("a", a)
+        manager.add_console("b", b)
+        self.assertEqual(await manager.start(), 2)
+        self.assertGreaterEqual(b.connect_times[0] - a.connect_times[0], 0.015)
+        self.assertEqual(set(manager.aircons), {("a", 0), ("a", 1), ("b", 0)})
+        self.assertEqual(set(manager.groups), {("a", 0), ("a", 1), ("b", 0)})
+        health = manager.health()
+        self.assertTrue(health["a"].connected)
+        self.assertEqual(health["a"].acs, 2)
+        await manager.remove_console("a")
+        self.assertFalse(a.running)
+        self.assertEqual(set(manager.aircons), {("b", 0)})
+        await manager.stop()
+        self.assertFalse(b.running)
+
+    async def test_duplicate_name(self):
+        manager = ConsoleManager()
+        manager.add_console("a", FakeClient([]))
+        with self.assertRaises(ValueError):
+            manager.add_console("a", FakeClient([]))
+
+    async def test_unreachable_console_retried(self):
+        manager = ConsoleManager(connect_spacing=0, rediscovery_interval=None)
+        down, gone = FakeClient([3], connects=False), FakeClient([4], connects=False, reconnects=False)
+        manager.add_console("down", down)
+        manager.add_console("gone", gone)
+        self.assertEqual(await manager.start(), 0)
+        await asyncio.sleep(0)
+        self.assertTrue(down.running)
+        self.assertFalse(gone.running)
+        self.assertIn(("down", 3), manager.aircons)
+        self.assertFalse(manager.health()["gone"].connected)
+        await manager.stop()
+
+    async def test_rediscovery_spread_over_interval(self):
+        manager = ConsoleManager(connect_spacing=0, rediscovery_interval=0.2)
+        clients = [FakeClient([]) for _ in range(4)]
+        for i, client in enumerate(clients):
+            manager.add_console(str(i), client)
+        await manager.start()
+        await asyncio.sleep(0.12)
+        self.assertEqual(sum(client.rediscoveries for client in clients), 2)
+        await asyncio.sleep(0.1)
+        self.assertTrue(all(client.rediscoveries == 1 for client in clients))
+        await manager.stop()
+
+    async def test_remove_console_while_connecting(self):
+        manager = ConsoleManager(connect_spacing=0, rediscovery_interval=None)
+        client = FakeClient([0], connects=False)
+        client.connection.hold = asyncio.Event()
+        manager.add_console("a", client)
+        self.assertEqual(await manager.start(), 0)
+        await asyncio.sleep(0)
+        # the connection is open but the client isn't running yet
+        self.assertTrue(client.connection.connected)
+        await manager.remove_console("a")
+        self.assertEqual(client.stops, 1)
+        self.assertFalse(client.connection.connected)
+        # nothing left to run it once connecting would have finished
+        client.connection.hold.set()
+        await asyncio.sleep(0.01)
+        self.assertFalse(client.running)
+        await manager.stop()
+
+    async def test_console_restarted_after_giving_up(self):
+        manager = ConsoleManager(connect_spacing=0, rediscovery_interval=None, restart_delay=0.01)
+        client = FakeClient([0])
+        manager.add_console("a", client)
+        self.assertEqual(await manager.start(), 1)
+        client.connection.give_up()
+        await asyncio.sleep(0)
+        self.assertEqual(client.stops, 1)
+        self.assertFalse(manager.health()["a"].connected)
+        await asyncio.sleep(0.05)
+        self.assertTrue(client.running)
+        self.assertTrue(manager.health()["a"].connected)
+        await manager.stop()
+        self.assertEqual(client.stops, 2)
+
+    async def test_not_restarted_without_restart_delay(self):
+        manager = ConsoleManager(connect_spacing=0, rediscovery_interval=None, restart_delay=None)
+        client = FakeClient([0])
+        manager.add_console("a", client)
+        await manager.start()
+        client.connection.give_up()
+        await asyncio.sleep(0.05)
+        self.assertFalse(client.running)
+        self.assertEqual(client.stops, 1)
+        await manager.stop()
+        self.assertEqual(client.stops, 1)
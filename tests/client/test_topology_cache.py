@@ -0,0 +1,58 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from airtouch2.at2plus.TopologyCache import Topology, TopologyCache
+
+
+class TestTopologyCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "topology.json")
+
+    async def asyncTearDown(self) -> None:
+        self.dir.cleanup()
+
+    async def test_round_trip_per_host(self):
+        topology = Topology({0: bytes(10)}, {0: bytes(range(24))}, {0: bytes(8), 1: bytes([1] + [0] * 7)},
+                            {1: "Living"})
+        await TopologyCache(self.path, "10.0.0.2").save(topology)
+        await TopologyCache(self.path, "10.0.0.3").save(Topology())
+
+        self.assertEqual(await TopologyCache(self.path, "10.0.0.2").load(), topology)
+        self.assertEqual(await TopologyCache(self.path, "10.0.0.3").load(), Topology())
+        self.assertIsNone(await TopologyCache(self.path, "10.0.0.4").load())
+
+    async def test_missing_or_corrupt_file(self):
+        cache = TopologyCache(self.path, "10.0.0.2")
+        self.assertIsNone(await cache.load())
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertIsNone(await cache.load())
+        # a corrupt cache is moved away on the next save, not silently overwritten
+        with self.assertLogs("airtouch2.at2plus.TopologyCache", "WARNING"):
+            await cache.save(Topology(group_statuses={0: bytes(8)}, group_names={0: "Bed"}))
+        self.assertEqual(await cache.load(), Topology(group_statuses={0: bytes(8)}, group_names={0: "Bed"}))
+        with open(self.path + ".bak") as f:
+            self.assertEqual(f.read(), "{not json")
+
+    async def test_unreadable_file_is_not_overwritten(self):
+        cache = TopologyCache(self.path, "10.0.0.2")
+        # reading a directory fails with an OSError other than FileNotFoundError
+        os.mkdir(self.path)
+        await cache.save(Topology(group_statuses={0: bytes(8)}))
+        self.assertTrue(os.path.isdir(self.path))
+        self.assertEqual(os.listdir(self.dir.name), ["topology.json"])
+
+    async def test_concurrent_saves_of_different_hosts(self):
+        hosts = [f"10.0.0.{i}" for i in range(20)]
+        caches = [TopologyCache(self.path, host) for host in hosts]
+        for _ in range(3):
+            await asyncio.gather(*(cache.save(Topology(group_statuses={0: bytes(8)}, group_names={0: host}))
+                                   for host, cache in zip(hosts, caches)))
+        for host in hosts:
+            self.assertEqual(await TopologyCache(self.path, host).load(),
+                             Topology(group_statuses={0: bytes(8)}, group_names={0: host}))
+        # no temporary files are left behind
+        self.assertEqual(os.listdir(self.dir.name), ["topology.json"])
@@ -0,0 +1,48 @@
+import unittest
+
+from airtouch2.common.Buffer import Buffer
+
+
+class TestBuffer(unittest.TestCase):
+    def test_fill_and_read(self):
+        buffer = Buffer(6)
+        self.assertFalse(buffer.append_bytes(b"\x01\x02"))
+        self.assertTrue(buffer.append_bytes(b"\x03\x04\x05\x06"))
+        self.assertEqual(buffer.to_bytes(), b"\x01\x02\x03\x04\x05\x06")
+        self.assertEqual(buffer.read_bytes(2), b"\x01\x02")
+        self.assertEqual(buffer.read_remaining(), b"\x03\x04\x05\x06")
+
+    def test_reads_are_bytes(self):
+        buffer = Buffer.from_bytes(b"AC1\x00")
+        data = buffer.read_bytes(3)
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(hash(data), hash(b"AC1"))
+        self.assertIsInstance(buffer.read_remaining(), bytes)
+
+    def test_views(self):
+        data = bytearray(b"\x01\x02\x03\x04")
+        buffer = Buffer(4)
+        buffer.append_bytes(data)
+        view = buffer.read_view(1)
+        self.assertIsInstance(view, memoryview)
+        self.assertTrue(view.readonly)
+        self.assertEqual(view, b"\x01")
+        self.assertEqual(buffer.read_remaining_view(), b"\x02\x03\x04")
+        # the buffer holds its own copy
+        data[0] = 9
+        self.assertEqual(view, b"\x01")
+
+    def test_misuse(self):
+        buffer = Buffer(2)
+        with self.assertRaises(BufferError):
+            buffer.read_bytes(1)
+        with self.assertRaises(BufferError):
+            buffer.to_bytes()
+        with self.assertRaises(BufferError):
+            buffer.append_bytes(b"\x00\x00\x00")
+        buffer.append_bytes(b"\x00\x00")
+        with self.assertRaises(BufferError):
+            buffer.append_bytes(b"\x00")
+        buffer.read_remaining()
+        with self.assertRaises(BufferError):
+            buffer.read_bytes(1)
@@ -0,0 +1,284 @@
+import asyncio
+import unittest
+
+from airtouch2.common.NetClient import NetClient
+from airtouch2.common.ReconnectPolicy import ReconnectPolicy
+from airtouch2.common.interfaces import Serializable
+
+
+class Ping(Serializable):
+    def to_bytes(self) -> bytes:
+        return b"ping"
+
+
+class TestHeartbeat(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.connections = 0
+        self.answer = True
+        # unsolicited data the server sends every so often instead of answering
+        self.push = False
+
+        async def push(writer: asyncio.StreamWriter) -> None:
+            while not writer.is_closing():
+                writer.write(b"push")
+                await asyncio.sleep(0.01)
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            self.connections += 1
+            if self.push:
+                pushing = asyncio.create_task(push(writer))
+            while data := await reader.read(100):
+                if self.answer:
+                    writer.write(data)
+            if self.push:
+                pushing.cancel()
+
+        self.server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self) -> None:
+        self.server.close()
+
+    def client(self) -> NetClient:
+        async def on_connect() -> None:
+            pass
+
+        async def handle_message() -> None:
+            data = await client.read_chunk()
+            if data and b"ping" in data:
+                client.heartbeat_answered()
+
+        client = NetClient("127.0.0.1", self.port, on_connect, handle_message,
+                           heartbeat=Ping, heartbeat_interval=0.02, max_missed_heartbeats=2)
+        return client
+
+    async def test_rtt_measured(self):
+        client = self.client()
+        self.assertTrue(await client.connect())
+        client.run()
+        await asyncio.sleep(0.1)
+        await client.stop()
+        self.assertIsNotNone(client.rtt)
+        self.assertEqual(client.missed_heartbeats, 0)
+        self.assertEqual(self.connections, 1)
+
+    async def test_heartbeats_are_written_by_the_writer_task(self):
+        client = self.client()
+        writers: set[asyncio.Task | None] = set()
+        write = client._write
+
+        def recorded_write(data: bytes) -> None:
+            writers.add(asyncio.current_task())
+            write(data)
+        client._write = recorded_write
+        self.assertTrue(await client.connect())
+        client.run()
+        await asyncio.sleep(0.1)
+        self.assertEqual(writers, {client._writer_task})
+        await client.stop()
+        self.assertIsNotNone(client.rtt)
+
+    async def test_unsolicited_data_keeps_the_connection_alive_without_measuring_rtt(self):
+        self.answer = False
+        self.push = True
+        client = self.client()
+        self.assertTrue(await client.connect())
+        client.run()
+        await asyncio.sleep(0.2)
+        await client.stop()
+        self.assertIsNone(client.rtt)
+        self.assertEqual(client.missed_heartbeats, 0)
+        self.assertEqual(self.connections, 1)
+
+    async def test_silent_connection_is_reestablished(self):
+        self.answer = False
+        client = self.client()
+        self.assertTrue(await client.connect())
+        client.run()
+        await asyncio.sleep(0.2)
+        await client.stop()
+        self.assertIsNone(client.rtt)
+        self.assertGreater(self.connections, 1)
+        self.assertGreaterEqual(client.reconnect_policy.outages, 1)
+        self.assertIsNotNone(client.reconnect_policy.last_outage_duration)
+
+
+class TestSendQueue(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        # data received on each connection, the first connection is closed after an unsolicited reply
+        self.received: list[bytes] = []
+        self.close_first = True
+        self.answer = True
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            first = not self.received
+            self.received.append(b"")
+            index = len(self.received) - 1
+            while data := await reader.read(100):
+                self.received[index] += data
+                if first and self.close_first:
+                    # receiving something doesn't acknowledge what was sent
+                    writer.write(b"push")
+                    await writer.drain()
+                    writer.close()
+                    return
+                if self.answer:
+                    writer.write(b"ack")
+
+        self.server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        # resolved in order by the acks of the server
+        self.acknowledgements: list[asyncio.Future[None]] = []
+
+    async def asyncTearDown(self) -> None:
+        self.server.close()
+
+    def client(self, **kwargs) -> NetClient:
+        async def on_connect() -> None:
+            pass
+
+        async def handle_message() -> None:
+            data = await client.read_chunk()
+            for _ in range(data.count(b"ack") if data else 0):
+                acknowledgement = self.acknowledgements.pop(0)
+                if not acknowledgement.done():
+                    acknowledgement.set_result(None)
+
+        client = NetClient("127.0.0.1", self.port, on_connect, handle_message, **kwargs)
+        return client
+
+    def acknowledgement(self) -> asyncio.Future[None]:
+        self.acknowledgements.append(asyncio.get_running_loop().create_future())
+        return self.acknowledgements[-1]
+
+    async def test_done_once_acknowledged(self):
+        self.close_first = False
+        self.answer = False
+        client = self.client()
+        self.assertTrue(await client.connect())
+        client.run()
+        acknowledgement = asyncio.get_running_loop().create_future()
+        sent = client.submit(Ping(), acknowledgement=acknowledgement)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.received, [b"ping"])
+        # written isn't done
+        self.assertFalse(sent.done())
+        acknowledgement.set_result(None)
+        await asyncio.wait_for(sent, 1)
+
+        acknowledgement = asyncio.get_running_loop().create_future()
+        sent = client.submit(Ping(), acknowledgement=acknowledgement)
+        acknowledgement.set_exception(TimeoutError())
+        with self.assertRaises(TimeoutError):
+            await sent
+        await client.stop()
+
+    async def test_unacknowledged_resent_after_reconnect(self):
+        client = self.client()
+        self.assertTrue(await client.connect())
+        client.run()
+        await asyncio.wait_for(client.send(Ping(), acknowledgement=self.acknowledgement(), resend=True), 1)
+        await client.stop()
+        self.assertEqual(self.received, [b"ping", b"ping"])
+        self.assertEqual(client.messages_resent, 1)
+        self.assertEqual(client.messages_dropped, 0)
+
+    async def test_unacknowledged_dropped_if_not_resendable(self):
+        client = self.client()
+        self.assertTrue(await client.connect())
+        client.run()
+        with self.assertRaises(ConnectionError):
+            await asyncio.wait_for(client.send(Ping(), acknowledgement=self.acknowledgement()), 1)
+        await asyncio.sleep(0.05)
+        await client.stop()
+        self.assertEqual(self.received, [b"ping", b""])
+        self.assertEqual(client.messages_resent, 0)
+        self.assertEqual(client.messages_dropped, 1)
+
+    async def test_unacknowledged_dropped_after_reconnect(self):
+        client = self.client(resend_unacknowledged=False)
+        self.assertTrue(await client.connect())
+        client.run()
+        with self.assertRaises(ConnectionError):
+            await asyncio.wait_for(client.send(Ping(), acknowledgement=self.acknowledgement(), resend=True), 1)
+        await asyncio.sleep(0.05)
+        await client.stop()
+        self.assertEqual(self.received, [b"ping", b""])
+        self.assertEqual(client.messages_dropped, 1)
+
+    async def test_done_once_written_without_acknowledgement(self):
+        self.close_first = False
+        client = self.client()
+        self.assertTrue(await client.connect())
+        await asyncio.wait_for(client.send(Ping()), 1)
+        self.assertEqual(client._unacknowledged, [])
+
+    async def test_stop_before_run_closes_the_connection(self):
+        client = self.client()
+        self.assertTrue(await client.connect())
+        await client.stop()
+        self.assertFalse(client.connected)
+        self.assertTrue(client._writer.is_closing())
+
+    async def test_queue_bounded(self):
+        client = self.client(max_queued=2)
+        self.assertTrue(await client.connect())
+        first = client.submit(Ping())
+        client.submit(Ping())
+        with self.assertRaises(asyncio.QueueFull):
+            client.submit(Ping())
+        await first
+
+    async def test_deadline(self):
+        client = self.client()
+        self.assertTrue(await client.connect())
+        # as if the connection was lost
+        client._connected.clear()
+        with self.assertRaises(TimeoutError):
+            await client.send(Ping(), timeout=0.01)
+        self.assertEqual(client.messages_expired, 1)
+
+
+class TestGiveUp(unittest.IsolatedAsyncioTestCase):
+    async def test_stops_cleanly_when_the_policy_gives_up(self):
+        connections: list[asyncio.StreamWriter] = []
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            connections.append(writer)
+            while await reader.read(100):
+                pass
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def on_connect() -> None:
+            pass
+
+        async def handle_message() -> None:
+            await client.read_chunk()
+
+        client = NetClient("127.0.0.1", port, on_connect, handle_message, heartbeat=Ping, heartbeat_interval=10,
+                           reconnect_policy=ReconnectPolicy(max_attempts=2))
+        gave_up: list[bool] = []
+        client.add_give_up_callback(lambda: gave_up.append(client.gave_up))
+        self.assertTrue(await client.connect())
+        client.run()
+        sent = client.submit(Ping(), acknowledgement=asyncio.get_running_loop().create_future())
+        await asyncio.sleep(0.05)
+
+        # the server goes away for good
+        server.close()
+        for connection in connections:
+            connection.close()
+        with self.assertRaises(ConnectionError):
+            await asyncio.wait_for(sent, 2)
+        self.assertEqual(gave_up, [True])
+        self.assertFalse(client.connected)
+        await asyncio.sleep(0)
+        self.assertTrue(client._main_loop_task.done())
+        self.assertIsNone(client._main_loop_task.exception())
+        self.assertTrue(client._heartbeat_task.done())
+        with self.assertRaises(ConnectionError):
+            client.submit(Ping())
+        # nothing left to raise
+        await client.stop()
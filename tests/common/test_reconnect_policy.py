@@ -0,0 +1,70 @@
+import unittest
+
+from airtouch2.common.ReconnectPolicy import CircuitState, ReconnectPolicy
+
+
+class TestBackoff(unittest.TestCase):
+    def test_exponential_and_capped(self):
+        policy = ReconnectPolicy(initial_delay=1, multiplier=2, max_delay=5, jitter=0)
+        delays = [policy.attempt_failed() for _ in range(5)]
+        self.assertEqual(delays, [1, 2, 4, 5, 5])
+
+    def test_jitter_shortens_delay(self):
+        policy = ReconnectPolicy(initial_delay=4, jitter=0.5, random_fraction=lambda: 1)
+        self.assertEqual(policy.attempt_failed(), 2)
+
+    def test_invalid_jitter(self):
+        with self.assertRaises(ValueError):
+            ReconnectPolicy(jitter=1.5)
+
+    def test_gives_up(self):
+        policy = ReconnectPolicy(max_attempts=2)
+        self.assertIsNotNone(policy.attempt_failed())
+        self.assertIsNone(policy.attempt_failed())
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_and_half_opens(self):
+        policy = ReconnectPolicy(initial_delay=1, jitter=0, breaker_threshold=2, breaker_cooldown=60)
+        policy.attempt_starting()
+        self.assertEqual(policy.attempt_failed(), 1)
+        policy.attempt_starting()
+        self.assertEqual(policy.attempt_failed(), 60)
+        self.assertEqual(policy.state, CircuitState.OPEN)
+        policy.attempt_starting()
+        self.assertEqual(policy.state, CircuitState.HALF_OPEN)
+        self.assertEqual(policy.attempt_failed(), 60)
+        self.assertEqual(policy.state, CircuitState.OPEN)
+        policy.attempt_starting()
+        policy.connected()
+        self.assertEqual(policy.state, CircuitState.CLOSED)
+
+
+class TestOutage(unittest.TestCase):
+    def test_outage_metrics(self):
+        policy = ReconnectPolicy()
+        self.assertIsNone(policy.outage_duration())
+        error = ConnectionResetError()
+        policy.connection_lost(error)
+        self.assertTrue(policy.in_outage)
+        self.assertIsNotNone(policy.outage_start)
+        refused = ConnectionRefusedError()
+        policy.attempt_failed(refused)
+        policy.attempt_failed()
+        self.assertEqual(policy.attempts, 2)
+        self.assertIs(policy.last_error, refused)
+        self.assertGreaterEqual(policy.outage_duration(), 0)
+        policy.connected()
+        self.assertFalse(policy.in_outage)
+        self.assertEqual(policy.outages, 1)
+        self.assertIsNotNone(policy.last_outage_duration)
+        self.assertEqual(policy.attempts, 2)
+
+    def test_new_outage_resets_attempts(self):
+        policy = ReconnectPolicy()
+        policy.connection_lost()
+        policy.attempt_failed()
+        policy.connected()
+        policy.connection_lost()
+        self.assertEqual(policy.attempts, 0)
+        self.assertEqual(policy.outages, 2)
@@ -0,0 +1,47 @@
+import asyncio
+import unittest
+
+from airtouch2.common.RequestTracker import RequestTracker
+
+
+class TestRequestTracker(unittest.IsolatedAsyncioTestCase):
+    async def test_responses_resolve_their_request(self):
+        tracker: RequestTracker[str] = RequestTracker(2, 255)
+        id1, future1 = tracker.track()
+        id2, future2 = tracker.track()
+        self.assertNotEqual(id1, id2)
+        self.assertEqual(tracker.in_flight(), 2)
+        self.assertTrue(tracker.resolve(id2, "second"))
+        self.assertTrue(tracker.resolve(id1, "first"))
+        self.assertEqual(await future1, "first")
+        self.assertEqual(await future2, "second")
+        self.assertFalse(tracker.resolve(id1, "again"))
+        self.assertEqual(tracker.in_flight(), 0)
+
+    async def test_matches(self):
+        tracker: RequestTracker[str] = RequestTracker(2, 255)
+        message_id, future = tracker.track(lambda response: response.startswith("ability"))
+        self.assertFalse(tracker.resolve(message_id, "status"))
+        self.assertTrue(tracker.resolve(message_id, "ability 1"))
+        self.assertEqual(await future, "ability 1")
+        self.assertEqual(tracker.unmatched, 1)
+
+    async def test_timeout(self):
+        tracker: RequestTracker[str] = RequestTracker(2, 255, timeout=0.01)
+        message_id, future = tracker.track()
+        with self.assertRaises(TimeoutError):
+            await future
+        self.assertEqual(tracker.timeouts, 1)
+        self.assertFalse(tracker.resolve(message_id, "late"))
+
+    async def test_ids_rotate_and_skip_those_in_flight(self):
+        tracker: RequestTracker[str] = RequestTracker(10, 12)
+        ids = [tracker.track()[0] for _ in range(3)]
+        self.assertEqual(ids, [10, 11, 12])
+        with self.assertRaises(RuntimeError):
+            tracker.track()
+        tracker.resolve(11, "done")
+        self.assertEqual(tracker.track()[0], 11)
+        tracker.cancel_all()
+        self.assertEqual(tracker.in_flight(), 0)
+        await asyncio.sleep(0)
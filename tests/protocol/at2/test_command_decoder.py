@@ -0,0 +1,31 @@
+import unittest
+
+from airtouch2.protocol.at2.command_decoder import CommandDecoder
+from airtouch2.protocol.at2.messages import RequestState
+
+
+class TestCommandDecoder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.command = RequestState().to_bytes()
+
+    def test_split_across_feeds(self):
+        decoder = CommandDecoder()
+        stream = self.command * 2
+        commands: list[bytes] = []
+        for i in range(0, len(stream), 5):
+            commands += decoder.feed(stream[i:i+5])
+        self.assertEqual(commands, [self.command] * 2)
+        self.assertEqual(decoder.commands_decoded, 2)
+        self.assertEqual(decoder.buffered(), 0)
+
+    def test_garbage_is_skipped(self):
+        decoder = CommandDecoder()
+        self.assertEqual(decoder.feed(b"\x00\x01\x02" + self.command), [self.command])
+        self.assertEqual(decoder.bytes_skipped, 3)
+
+    def test_reset_drops_partial_command(self):
+        decoder = CommandDecoder()
+        decoder.feed(self.command[:6])
+        decoder.reset()
+        self.assertEqual(decoder.feed(self.command), [self.command])
+        self.assertEqual(decoder.bytes_skipped, 6)
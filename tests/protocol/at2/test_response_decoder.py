@@ -0,0 +1,65 @@
+import unittest
+
+from airtouch2.protocol.at2.constants import MessageLength, ResponseMessageConstants, ResponseMessageOffsets
+from airtouch2.protocol.at2.message_common import checksum
+from airtouch2.protocol.at2.messages import SystemInfo
+from airtouch2.protocol.at2.response_decoder import ResponseDecoder
+
+
+def response(system_name: bytes) -> bytes:
+    """A minimal valid response with no ACs or groups"""
+    data = bytearray(MessageLength.RESPONSE)
+    data[ResponseMessageOffsets.HEADER] = ResponseMessageConstants.HEADER_BYTE_0
+    data[ResponseMessageOffsets.HEADER + 1] = ResponseMessageConstants.HEADER_BYTE_1
+    data[ResponseMessageOffsets.SYSTEM_NAME:ResponseMessageOffsets.SYSTEM_NAME + len(system_name)] = system_name
+    data[ResponseMessageOffsets.HASH] = checksum(data[:ResponseMessageOffsets.HASH])
+    return bytes(data)
+
+
+class TestResponseDecoder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.response1 = response(b"HOUSE")
+        self.response2 = response(b"OFFICE")
+
+    def test_consecutive_responses(self):
+        decoder = ResponseDecoder()
+        responses = decoder.feed(self.response1 + self.response2)
+        self.assertEqual(responses, [self.response1, self.response2])
+        self.assertEqual(SystemInfo.from_bytes(responses[1]).system_name, "OFFICE")
+        self.assertEqual(decoder.bytes_skipped, 0)
+
+    def test_split_across_feeds(self):
+        decoder = ResponseDecoder()
+        stream = self.response1 + self.response2
+        responses: list[bytes] = []
+        for i in range(0, len(stream), 7):
+            responses += decoder.feed(stream[i:i+7])
+        self.assertEqual(responses, [self.response1, self.response2])
+        self.assertEqual(decoder.buffered(), 0)
+
+    def test_lost_byte_resynchronises(self):
+        decoder = ResponseDecoder()
+        # a byte lost in the middle of the first response
+        damaged = self.response1[:200] + self.response1[201:]
+        responses = decoder.feed(damaged + self.response2 + self.response1)
+        self.assertEqual(responses, [self.response2, self.response1])
+        self.assertEqual(decoder.bytes_skipped, len(damaged))
+        self.assertEqual(decoder.hash_errors, 1)
+
+    def test_hash_mismatch(self):
+        decoder = ResponseDecoder()
+        corrupted = bytearray(self.response1)
+        corrupted[ResponseMessageOffsets.SYSTEM_NAME] ^= 0x01
+        responses = decoder.feed(bytes(corrupted) + self.response2)
+        self.assertEqual(responses, [self.response2])
+        self.assertEqual(decoder.hash_errors, 1)
+        self.assertEqual(decoder.bytes_skipped, len(corrupted))
+
+    def test_leading_garbage(self):
+        decoder = ResponseDecoder()
+        garbage = bytes([0x00, ResponseMessageConstants.HEADER_BYTE_0, 0x13])
+        responses = decoder.feed(garbage + self.response1 + garbage[:2])
+        self.assertEqual(responses, [self.response1])
+        # the trailing header byte is held back in case it starts the next response
+        self.assertEqual(decoder.buffered(), 1)
+        self.assertEqual(decoder.bytes_skipped, len(garbage) + 1)
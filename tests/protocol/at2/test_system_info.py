@@ -0,0 +1,135 @@
+import unittest
+
+from airtouch2.protocol.at2.constants import MessageLength, ResponseMessageConstants, ResponseMessageOffsets
+from airtouch2.protocol.at2.enums import ACBrand, ACFanSpeed, ACMode
+from airtouch2.protocol.at2.message_common import checksum
+from airtouch2.protocol.at2.messages import SystemInfo
+
+
+def system_response() -> bytes:
+    """A response of a system with one Fujitsu AC and 3 groups, the last of which spans 2 zones"""
+    data = bytearray(MessageLength.RESPONSE)
+    data[ResponseMessageOffsets.HEADER] = ResponseMessageConstants.HEADER_BYTE_0
+    data[ResponseMessageOffsets.HEADER + 1] = ResponseMessageConstants.HEADER_BYTE_1
+    for group_id, name in enumerate([b"LIVING", b"BED 1", b"KITCHEN"]):
+        start = ResponseMessageOffsets.GROUP_NAMES_START + group_id * ResponseMessageConstants.SHORT_STRING_LENGTH
+        data[start:start + len(name)] = name
+    zones = ResponseMessageOffsets.GROUP_ZONES_START
+    data[zones:zones + 3] = bytes([0x01, 0x11, 0x22])
+    statuses = ResponseMessageOffsets.ZONE_STATUSES_START
+    data[statuses:statuses + 4] = bytes([0x80, 0x00, 0x80, 0xC0])
+    data[ResponseMessageOffsets.ZONE_DAMPS_START:ResponseMessageOffsets.ZONE_DAMPS_START + 4] = bytes([5, 0, 8, 8])
+    data[ResponseMessageOffsets.NUM_GROUPS] = 3
+    data[ResponseMessageOffsets.TURBO_GROUP] = 1
+    data[ResponseMessageOffsets.ACs_STATUS] = 0x08
+    data[ResponseMessageOffsets.TOUCHPAD_TEMP] = 23
+    data[ResponseMessageOffsets.SYSTEM_NAME:ResponseMessageOffsets.SYSTEM_NAME + 5] = b"HOUSE"
+    data[ResponseMessageOffsets.AC_STATUS_START] = 0x81
+    data[ResponseMessageOffsets.AC_BRAND_START] = ACBrand.NONE
+    data[ResponseMessageOffsets.AC_MODE_START] = ACMode.COOL
+    data[ResponseMessageOffsets.AC_FAN_SPEED_START] = 0x32
+    data[ResponseMessageOffsets.AC_SET_TEMP_START] = 22
+    data[ResponseMessageOffsets.AC_MEASURED_TEMP_START] = 25
+    data[ResponseMessageOffsets.AC_GATEWAY_ID_START] = 0x0D
+    data[ResponseMessageOffsets.AC_NAME_START:ResponseMessageOffsets.AC_NAME_START + 6] = b"DUCTED"
+    data[ResponseMessageOffsets.HASH] = checksum(data[:ResponseMessageOffsets.HASH])
+    return bytes(data)
+
+
+def two_ac_response() -> bytes:
+    """A response of a system with two Fujitsu ACs, the second of which is in turbo and spilling"""
+    data = bytearray(system_response())
+    # each AC's bits are in its own byte, the first AC's byte isn't read for the second
+    data[ResponseMessageOffsets.ACs_STATUS] = 0x10 | 0x04 | 0x01
+    data[ResponseMessageOffsets.ACs_STATUS + 1] = 0x10 | 0x01
+    data[ResponseMessageOffsets.AC_STATUS_START + 1] = 0x02
+    data[ResponseMessageOffsets.AC_MODE_START + 1] = ACMode.HEAT
+    data[ResponseMessageOffsets.AC_FAN_SPEED_START + 1] = 0x31
+    data[ResponseMessageOffsets.AC_SET_TEMP_START + 1] = 26
+    data[ResponseMessageOffsets.AC_MEASURED_TEMP_START + 1] = 19
+    data[ResponseMessageOffsets.AC_GATEWAY_ID_START + 1] = 0x0D
+    start = ResponseMessageOffsets.AC_NAME_START + ResponseMessageConstants.SHORT_STRING_LENGTH
+    data[start:start + 5] = b"UPPER"
+    data[ResponseMessageOffsets.HASH] = checksum(data[:ResponseMessageOffsets.HASH])
+    return bytes(data)
+
+
+class TestSystemInfo(unittest.TestCase):
+    def test_parse(self):
+        info = SystemInfo.from_bytes(system_response())
+        self.assertEqual(info.system_name, "HOUSE")
+        self.assertEqual(info.touchpad_temp, 23)
+
+        self.assertEqual(list(info.aircons_by_id), [0])
+        ac = info.aircons_by_id[0]
+        self.assertEqual(ac.name, "DUCTED")
+        self.assertTrue(ac.active)
+        self.assertFalse(ac.error)
+        self.assertEqual(ac.program, 1)
+        self.assertEqual(ac.mode, ACMode.COOL)
+        self.assertEqual(ac.brand, ACBrand.FUJITSU)
+        self.assertEqual(ac.supported_fan_speeds,
+                         [ACFanSpeed.AUTO, ACFanSpeed.LOW, ACFanSpeed.MEDIUM, ACFanSpeed.HIGH])
+        self.assertEqual(ac.fan_speed, ACFanSpeed.MEDIUM)
+        self.assertEqual(ac.set_temp, 22)
+        self.assertEqual(ac.measured_temp, 25)
+        self.assertTrue(ac.safety)
+        self.assertFalse(ac.turbo)
+
+        self.assertEqual([group.name for group in info.groups_by_id.values()], ["LIVING", "BED", "KITCHEN"])
+        living, bed, kitchen = info.groups_by_id.values()
+        self.assertTrue(living.active)
+        self.assertEqual(living.damp, 5)
+        self.assertFalse(bed.active)
+        self.assertTrue(bed.turbo)
+        self.assertTrue(kitchen.active)
+        self.assertTrue(kitchen.spill)
+        self.assertEqual(kitchen.damp, 8)
+
+    def test_parse_second_ac(self):
+        info = SystemInfo.from_bytes(two_ac_response())
+        first, second = info.aircons_by_id[0], info.aircons_by_id[1]
+        self.assertEqual(second.name, "UPPER")
+        self.assertFalse(second.active)
+        self.assertEqual(second.program, 2)
+        self.assertEqual(second.mode, ACMode.HEAT)
+        self.assertEqual(second.fan_speed, ACFanSpeed.LOW)
+        self.assertEqual(second.set_temp, 26)
+        # read from the byte after ACs_STATUS
+        self.assertTrue(second.turbo)
+        self.assertFalse(second.safety)
+        self.assertTrue(second.spill)
+        self.assertFalse(first.turbo)
+        self.assertFalse(first.safety)
+        self.assertFalse(first.spill)
+        self.assertEqual(SystemInfo.from_bytes(info.to_bytes()), info)
+
+    def test_each_ac_reads_its_own_status_byte(self):
+        data = bytearray(two_ac_response())
+        for first, second in [(0x00, 0x3F), (0x3F, 0x00), (0x2A, 0x15)]:
+            data[ResponseMessageOffsets.ACs_STATUS] = first
+            data[ResponseMessageOffsets.ACs_STATUS + 1] = second
+            data[ResponseMessageOffsets.HASH] = checksum(data[:ResponseMessageOffsets.HASH])
+            info = SystemInfo.from_bytes(bytes(data))
+            for ac_id, status in enumerate((first, second)):
+                ac = info.aircons_by_id[ac_id]
+                self.assertEqual((ac.turbo, ac.safety, ac.spill),
+                                 tuple(status & (1 << (bit - ac_id)) > 0 for bit in (5, 3, 1)))
+
+    def test_memoised_values_are_not_shared(self):
+        first = SystemInfo.from_bytes(system_response())
+        second = SystemInfo.from_bytes(system_response())
+        self.assertEqual(first, second)
+        first.aircons_by_id[0].supported_fan_speeds.clear()
+        self.assertEqual(len(second.aircons_by_id[0].supported_fan_speeds), 4)
+
+    def test_round_trip(self):
+        info = SystemInfo.from_bytes(system_response())
+        data = info.to_bytes()
+        self.assertEqual(len(data), MessageLength.RESPONSE)
+        self.assertEqual(data[ResponseMessageOffsets.HASH], checksum(data[:ResponseMessageOffsets.HASH]))
+        self.assertEqual(SystemInfo.from_bytes(data), info)
+
+    def test_serialize_without_acs_and_groups(self):
+        info = SystemInfo({}, {}, 20, "EMPTY")
+        self.assertEqual(SystemInfo.from_bytes(info.to_bytes()), info)
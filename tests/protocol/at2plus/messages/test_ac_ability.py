@@ -107,3 +107,29 @@ class TestAcAbilityMessage(unittest.TestCase):
         expected = bytearray(Header(AddressMsgType.EXTENDED, MessageType.EXTENDED, EXTENDED_SUBHEADER_LENGTH +
                                     1).to_bytes() + bytes([SUBHEADER_MAGIC, ExtendedMessageSubType.ABILITY, 0, 0]))
         add_checksum_message_bytes(expected)
+
+    def test_multiple_abilities(self):
+        abilities = [
+            AcAbility(0, "downstairs", 0, 4, [AcSetMode.AUTO, AcSetMode.COOL], [AcFanSpeed.LOW, AcFanSpeed.HIGH],
+                      SetpointLimits(16, 30)),
+            AcAbility(1, "upstairs", 4, 3, [AcSetMode.HEAT], [AcFanSpeed.AUTO],
+                      DualSetpointLimits(SetpointLimits(18, 28), SetpointLimits(15, 25))),
+            AcAbility(2, "granny flat", 7, 1, [AcSetMode.FAN], [AcFanSpeed.MEDIUM], SetpointLimits(17, 31)),
+        ]
+        subdata = b''.join(ability.to_bytes() for ability in abilities)
+        msg = AcAbilityMessage.from_bytes(subdata)
+        self.assertEqual(msg.abilities, abilities)
+
+    def test_truncated_abilities(self):
+        subdata = AcAbility(0, "downstairs", 0, 4, [AcSetMode.COOL], [AcFanSpeed.LOW],
+                            SetpointLimits(16, 30)).to_bytes()
+        for data in [subdata[:-1], subdata + subdata[:10], subdata + subdata[:1]]:
+            with self.assertRaises(ValueError):
+                AcAbilityMessage.from_bytes(data)
+
+    def test_unknown_ability_length(self):
+        subdata = bytearray(AcAbility(0, "downstairs", 0, 4, [AcSetMode.COOL], [AcFanSpeed.LOW],
+                                      SetpointLimits(16, 30)).to_bytes())
+        subdata[1] = 30
+        with self.assertRaises(ValueError):
+            AcAbilityMessage.from_bytes(bytes(subdata) + bytes(10))
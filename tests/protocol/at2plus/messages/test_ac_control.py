@@ -71,3 +71,10 @@ class TestAcControlMessage(unittest.TestCase):
                              expected1 + expected2 + bytes([0, 0]))
         add_checksum_message_bytes(expected)
         self.assertEqual(serialized.hex(':'), expected.hex(':'))
+
+    def test_deserialize(self):
+        settings = [AcSettings(3, AcSetPower.ON, AcSetMode.HEAT, AcFanSpeed.MEDIUM, 23),
+                    AcSettings(7, AcSetPower.SLEEP, AcSetMode.FAN, AcFanSpeed.TURBO)]
+        subdata = b''.join(setting.to_bytes() for setting in settings)
+        parsed = AcControlMessage.from_bytes(subdata).settings
+        self.assertEqual([setting.to_bytes() for setting in parsed], [setting.to_bytes() for setting in settings])
@@ -68,3 +68,10 @@ class TestGroupControlMessage(unittest.TestCase):
         )
         add_checksum_message_bytes(expected)
         self.assertEqual(serialized.hex(':'), expected.hex(':'))
+
+    def test_deserialize(self):
+        settings = [GroupSettings(3, GroupSetDamper.SET, GroupSetPower.ON, 85),
+                    GroupSettings(10, GroupSetDamper.INC, GroupSetPower.UNCHANGED)]
+        subdata = b''.join(setting.to_bytes() for setting in settings)
+        parsed = GroupControlMessage.from_bytes(subdata).settings
+        self.assertEqual([setting.to_bytes() for setting in parsed], [setting.to_bytes() for setting in settings])
@@ -1,7 +1,10 @@
 from pprint import pprint
 import unittest
 
-from airtouch2.protocol.at2plus.messages.GroupNames import RequestGroupNamesMessage, group_names_from_subdata
+from airtouch2.protocol.at2plus.extended_common import EXTENDED_SUBHEADER_LENGTH
+from airtouch2.protocol.at2plus.message_common import HEADER_LENGTH
+from airtouch2.protocol.at2plus.messages.GroupNames import (GroupNamesMessage, RequestGroupNamesMessage,
+                                                            group_names_from_subdata)
 
 
 class TestDeserialize(unittest.TestCase):
@@ -25,3 +28,12 @@ class TestRequestGroupNamesMessage(unittest.TestCase):
         msg = RequestGroupNamesMessage()
         expected = bytes([0x55, 0x55, 0x90, 0xb0, 0x01, 0x1f, 0x00, 0x02, 0xff, 0x12, 0x82, 0x0c])
         self.assertEqual(msg.to_bytes().hex(':'), expected.hex(':'))
+
+
+class TestGroupNamesMessage(unittest.TestCase):
+    def test_round_trip(self):
+        names = {0: 'Dining', 1: 'Bedrooms', 2: 'Much too long'}
+        serialized = GroupNamesMessage(names).to_bytes()
+        subdata = serialized[HEADER_LENGTH + EXTENDED_SUBHEADER_LENGTH:-2]
+        self.assertEqual(len(subdata), 27)
+        self.assertEqual(GroupNamesMessage.from_bytes(subdata).names, {0: 'Dining', 1: 'Bedrooms', 2: 'Much too'})
@@ -0,0 +1,91 @@
+import unittest
+
+from airtouch2.protocol.at2plus.control_status_common import (CONTROL_STATUS_SUBHEADER_LENGTH, ControlStatusSubHeader,
+                                                              ControlStatusSubType, SubDataLength)
+from airtouch2.protocol.at2plus.enums import GroupPower
+from airtouch2.protocol.at2plus.frame_decoder import FrameDecoder
+from airtouch2.protocol.at2plus.message_common import AddressMsgType, Header, MessageType, add_checksum_message_bytes
+from airtouch2.protocol.at2plus.messages.GroupStatus import GROUP_STATUS_LENGTH, GroupStatus, GroupStatusMessage
+
+
+def group_status_frame(*statuses: GroupStatus) -> bytes:
+    """A group status message as it is received from the console"""
+    frame = bytearray(
+        Header(AddressMsgType.NORMAL, MessageType.CONTROL_STATUS,
+               CONTROL_STATUS_SUBHEADER_LENGTH + len(statuses) * GROUP_STATUS_LENGTH, True).to_bytes() +
+        ControlStatusSubHeader(
+            ControlStatusSubType.GROUP_STATUS, SubDataLength(0, len(statuses), GROUP_STATUS_LENGTH)).to_bytes() +
+        b''.join(status.to_bytes() for status in statuses) + bytes([0, 0]))
+    add_checksum_message_bytes(frame)
+    return bytes(frame)
+
+
+class TestFrameDecoder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.frame1 = group_status_frame(GroupStatus(0, GroupPower.ON, 50, False, False))
+        self.frame2 = group_status_frame(GroupStatus(1, GroupPower.OFF, 20, True, False),
+                                         GroupStatus(2, GroupPower.TURBO, 100, True, True))
+
+    def test_multiple_frames_in_one_chunk(self):
+        decoder = FrameDecoder()
+        messages = decoder.feed(self.frame1 + self.frame2 + self.frame1)
+        self.assertEqual(len(messages), 3)
+        self.assertEqual(decoder.frames_decoded, 3)
+        self.assertEqual(decoder.bytes_discarded, 0)
+        self.assertEqual(decoder.buffered(), 0)
+
+        message = messages[1]
+        self.assertEqual(message.header.type, MessageType.CONTROL_STATUS)
+        subheader = ControlStatusSubHeader.from_buffer(message.data_buffer)
+        self.assertEqual(subheader.sub_type, ControlStatusSubType.GROUP_STATUS)
+        statuses = GroupStatusMessage.from_bytes(message.data_buffer.read_remaining()).statuses
+        self.assertEqual([status.id for status in statuses], [1, 2])
+
+    def test_split_across_feeds(self):
+        decoder = FrameDecoder()
+        stream = self.frame1 + self.frame2
+        frames: list[bytes] = []
+        for i in range(len(stream)):
+            frames += decoder.feed_frames(stream[i:i+1])
+        self.assertEqual(frames, [self.frame1, self.frame2])
+        self.assertEqual(decoder.bytes_discarded, 0)
+
+    def test_garbage_is_skipped_and_counted(self):
+        decoder = FrameDecoder()
+        garbage = bytes([0x00, 0x55, 0x12, 0x55, 0x55, 0x01])
+        frames = decoder.feed_frames(garbage + self.frame1 + garbage[:2])
+        self.assertEqual(frames, [self.frame1])
+        # the trailing magic byte is held back in case the next header starts with it
+        self.assertEqual(decoder.buffered(), 1)
+        self.assertEqual(decoder.bytes_discarded, len(garbage) + 1)
+
+    def test_checksum_mismatch_keeps_following_frames(self):
+        decoder = FrameDecoder()
+        corrupted = bytearray(self.frame2)
+        corrupted[-1] ^= 0xFF
+        frames = decoder.feed_frames(bytes(corrupted) + self.frame1)
+        self.assertEqual(frames, [self.frame1])
+        self.assertEqual(decoder.checksum_errors, 1)
+        self.assertEqual(decoder.bytes_discarded, len(corrupted))
+
+    def test_corrupted_length_does_not_swallow_frames(self):
+        decoder = FrameDecoder()
+        corrupted = bytearray(self.frame1)
+        # claim a longer frame, the next frame's bytes would be eaten as its data
+        corrupted[7] += GROUP_STATUS_LENGTH
+        frames = decoder.feed_frames(bytes(corrupted) + self.frame2 + self.frame1)
+        self.assertEqual(frames, [self.frame2, self.frame1])
+        self.assertEqual(decoder.checksum_errors, 1)
+
+    def test_truncated_frame_then_resync(self):
+        decoder = FrameDecoder()
+        frames = decoder.feed_frames(self.frame1[:12] + self.frame2)
+        self.assertEqual(frames, [self.frame2])
+        self.assertEqual(decoder.bytes_discarded, 12)
+
+    def test_reset(self):
+        decoder = FrameDecoder()
+        decoder.feed(self.frame1[:5])
+        decoder.reset()
+        self.assertEqual(decoder.buffered(), 0)
+        self.assertEqual(decoder.feed_frames(self.frame2), [self.frame2])
@@ -1,5 +1,9 @@
 import unittest
-from airtouch2.protocol.at2plus.message_common import AddressMsgType, AddressSource, HEADER_MAGIC, MESSAGE_ID, Header, MessageType
+from airtouch2.protocol.at2plus.crc16_modbus import crc16
+from airtouch2.protocol.at2plus.message_common import (AddressMsgType, AddressSource, CommonMessageOffsets,
+                                                       HEADER_MAGIC, MESSAGE_ID, Header, IdentifiedMessage,
+                                                       MessageType, make_response, set_message_id)
+from airtouch2.protocol.at2plus.messages.AcAbilityMessage import RequestAcAbilityMessage
 
 class TestHeader(unittest.TestCase):
     def test_serialize(self):
@@ -14,3 +18,37 @@ class TestHeader(unittest.TestCase):
         header = Header.from_bytes(raw)
 
         self.assertEqual(raw.hex(':'), header.to_bytes().hex(':'))
+
+    def test_deserialize_sent(self):
+        header = Header(AddressMsgType.EXTENDED, MessageType.EXTENDED, 2)
+        parsed = Header.from_bytes(header.to_bytes())
+        self.assertFalse(parsed._received)
+        self.assertEqual(parsed.address_msg_type, AddressMsgType.EXTENDED)
+        self.assertEqual(header.to_bytes(), parsed.to_bytes())
+
+    def test_message_id(self):
+        header = Header(AddressMsgType.EXTENDED, MessageType.EXTENDED, 2, True, 0x7A)
+        parsed = Header.from_bytes(header.to_bytes())
+        self.assertEqual(parsed.message_id, 0x7A)
+        self.assertEqual(header.to_bytes(), parsed.to_bytes())
+
+
+class TestSetMessageId(unittest.TestCase):
+    def test_checksum_updated(self):
+        message = RequestAcAbilityMessage()
+        data = bytearray(message.to_bytes())
+        set_message_id(data, 42)
+        self.assertEqual(data[CommonMessageOffsets.MESAGE_ID], 42)
+        self.assertEqual(bytes(data[-2:]), crc16(data[2:-2]))
+        self.assertEqual(IdentifiedMessage(message, 42).to_bytes(), bytes(data))
+
+
+class TestMakeResponse(unittest.TestCase):
+    def test_address_and_id(self):
+        data = bytearray(RequestAcAbilityMessage().to_bytes())
+        make_response(data, 42)
+        header = Header.from_bytes(bytes(data[:8]))
+        self.assertTrue(header._received)
+        self.assertEqual(header.address_msg_type, AddressMsgType.EXTENDED)
+        self.assertEqual(header.message_id, 42)
+        self.assertEqual(bytes(data[-2:]), crc16(data[2:-2]))
@@ -0,0 +1,55 @@
+import unittest
+from dataclasses import dataclass
+
+from airtouch2.protocol.at2plus.enums import GroupPower
+from airtouch2.protocol.at2plus.record_layout import Field, RecordLayout, enum_lookup
+
+
+@dataclass
+class Record:
+    id: int
+    power: GroupPower
+    flag: bool
+    word: int
+    name: bytes
+
+
+LAYOUT: RecordLayout[Record] = RecordLayout(6, [
+    Field("id", 0, bits=4),
+    Field("power", 0, bits=3, shift=4, decode=enum_lookup(GroupPower, GroupPower.OFF, bits=3)),
+    Field("flag", 1, bits=1, shift=7, decode=bool, encode=int),
+    Field("word", 2, size=2),
+    Field("name", 4, size=2, raw=True, decode=bytes),
+], constants={1: 0x05})
+
+
+class TestRecordLayout(unittest.TestCase):
+    def test_decode(self):
+        record = LAYOUT.decoder(Record)(bytes([0x3A, 0x85, 0x12, 0x34, 0x61, 0x62]))
+        self.assertEqual(record, Record(10, GroupPower.TURBO, True, 0x1234, b'ab'))
+
+    def test_encode_round_trip(self):
+        record = Record(7, GroupPower.ON, False, 0xBEEF, b'xy')
+        raw = LAYOUT.encoder()(record)
+        self.assertEqual(raw, bytes([0x17, 0x05, 0xBE, 0xEF, 0x78, 0x79]))
+        self.assertEqual(LAYOUT.decoder(Record)(raw), record)
+
+    def test_unknown_enum_value_uses_fallback(self):
+        record = LAYOUT.decoder(Record)(bytes([0x70, 0, 0, 0, 0, 0]))
+        self.assertEqual(record.power, GroupPower.OFF)
+
+    def test_wrong_length(self):
+        with self.assertRaises(ValueError):
+            LAYOUT.decoder(Record)(bytes(5))
+
+    def test_invalid_fields(self):
+        with self.assertRaises(ValueError):
+            Field("a", 0, bits=4, shift=6)
+        with self.assertRaises(ValueError):
+            Field("a", 0, size=2, bits=4)
+        with self.assertRaises(ValueError):
+            Field("a", 0, bits=4, decode=(1, 2))
+        with self.assertRaises(ValueError):
+            RecordLayout(2, [Field("a", 1, size=2)])
+        with self.assertRaises(ValueError):
+            Field("a.b", 0)